@@ -0,0 +1,114 @@
+"""
+Measures latency of the database lookups done when a package is loaded from the database.
+
+A fresh SQLite database is filled with the given number of problems, each with
+a special file and two extra files, then random problems are looked up the way
+``identify_db``, ``DjangoHandler`` and ``SinolpackDjangoHandler`` do it. For every
+lookup, the median and the 99th percentile latency are reported, with the query
+plan of the lookup.
+
+Usage: python benchmarks/bench_db_lookup.py --problems 100000
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from run import _setup_django  # noqa: E402
+
+
+def populate(problems: int, batch_size: int = 10000):
+    from sio3pack.django.common.models import SIO3Package
+    from sio3pack.django.sinolpack.models import SinolpackAdditionalFile, SinolpackExtraFile, SinolpackSpecialFile
+
+    # Problem IDs are shuffled, so that they don't follow primary keys.
+    problem_ids = list(range(1, problems + 1))
+    random.shuffle(problem_ids)
+    for start in range(0, problems, batch_size):
+        packages = SIO3Package.objects.bulk_create(
+            [SIO3Package(problem_id=i, short_name=f"p{i}") for i in problem_ids[start : start + batch_size]]
+        )
+        files = SinolpackAdditionalFile.objects.bulk_create(
+            [SinolpackAdditionalFile(package=p, name="chk.cpp", file=f"{p.problem_id}/chk.cpp") for p in packages]
+        )
+        SinolpackSpecialFile.objects.bulk_create(
+            [SinolpackSpecialFile(package=f.package, type="checker", additional_file=f) for f in files]
+        )
+        SinolpackExtraFile.objects.bulk_create(
+            [
+                SinolpackExtraFile(package=p, package_path=path, file=f"{p.problem_id}/{path}")
+                for p in packages
+                for path in ("prog/lib.h", "prog/lib.cpp")
+            ]
+        )
+
+
+def measure(name: str, lookup, problem_ids: list[int]) -> dict:
+    latencies = []
+    for problem_id in problem_ids:
+        start = time.perf_counter()
+        lookup(problem_id)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "lookup": name,
+        "median_us": statistics.median(latencies) * 1e6,
+        "p99_us": latencies[int(len(latencies) * 0.99)] * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--problems", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--json", help="Write results to this file.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        if not _setup_django(tmpdir):
+            print("Django is not installed.")
+            sys.exit(1)
+        from sio3pack.django.common.models import SIO3Package
+        from sio3pack.django.sinolpack.models import SinolpackExtraFile, SinolpackSpecialFile
+
+        start = time.perf_counter()
+        populate(args.problems)
+        print(f"Created {args.problems} problems in {time.perf_counter() - start:.1f} s")
+
+        pks = dict(SIO3Package.objects.values_list("problem_id", "pk"))
+        problem_ids = [random.randint(1, args.problems) for _ in range(args.lookups)]
+        lookups = {
+            "identify_db": lambda i: SIO3Package.objects.filter(problem_id=i).exists(),
+            "get_package": lambda i: SIO3Package.objects.get(problem_id=i),
+            "special_file": lambda i: SinolpackSpecialFile.objects.filter(package_id=pks[i], type="checker").first(),
+            "extra_file": lambda i: SinolpackExtraFile.objects.get(package_id=pks[i], package_path="prog/lib.cpp"),
+        }
+        plans = {
+            "identify_db": SIO3Package.objects.filter(problem_id=1),
+            "get_package": SIO3Package.objects.filter(problem_id=1),
+            "special_file": SinolpackSpecialFile.objects.filter(package_id=pks[1], type="checker"),
+            "extra_file": SinolpackExtraFile.objects.filter(package_id=pks[1], package_path="prog/lib.cpp"),
+        }
+
+        results = []
+        print(f"{'lookup':>14} {'median [us]':>12} {'p99 [us]':>10}  plan")
+        for name, lookup in lookups.items():
+            result = measure(name, lookup, problem_ids)
+            result["plan"] = plans[name].explain()
+            results.append(result)
+            print(f"{name:>14} {result['median_us']:>12.1f} {result['p99_us']:>10.1f}  {result['plan']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
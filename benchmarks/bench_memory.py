@@ -0,0 +1,109 @@
+"""
+Measures memory used by run workflows and the work they give to the garbage collector.
+
+For every number of tests, a run workflow is built and the following is reported:
+the memory still allocated while the workflow is alive, the peak memory during
+building, the number of objects tracked by the garbage collector which the workflow
+added, and the number and total time of garbage collections during building.
+
+Usage: python benchmarks/bench_memory.py --tests 1000 10000
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic import create_sinolpack  # noqa: E402
+
+import sio3pack  # noqa: E402
+from sio3pack.packages.package.configuration import SIO3PackConfig  # noqa: E402
+
+
+class GCStats:
+    """
+    Counts garbage collections and their total time, using ``gc.callbacks``.
+    """
+
+    def __init__(self):
+        self.collections = 0
+        self.seconds = 0.0
+        self._start = None
+
+    def callback(self, phase: str, info: dict):
+        if phase == "start":
+            self._start = time.perf_counter()
+        elif self._start is not None:
+            self.collections += 1
+            self.seconds += time.perf_counter() - self._start
+            self._start = None
+
+
+def measure(tests: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        package = sio3pack.from_file(
+            create_sinolpack(tmpdir, tests=tests, groups=max(1, tests // 100)), SIO3PackConfig.detect()
+        )
+        program = package.main_model_solution
+        gc.collect()
+        objects_before = len(gc.get_objects())
+
+        stats = GCStats()
+        gc.callbacks.append(stats.callback)
+        tracemalloc.start()
+        start = time.perf_counter()
+        workflow = next(package.get_run_operation(program).get_workflow())
+        elapsed = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        gc.callbacks.remove(stats.callback)
+
+        gc.collect()
+        objects = len(gc.get_objects()) - objects_before
+        result = {
+            "tests": tests,
+            "tasks": len(workflow.tasks),
+            "retained_bytes": current,
+            "peak_bytes": peak,
+            "gc_objects": objects,
+            "gc_collections": stats.collections,
+            "gc_seconds": stats.seconds,
+            "seconds": elapsed,
+        }
+        del workflow
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tests", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--json", help="Write results to this file.")
+    args = parser.parse_args()
+
+    results = []
+    print(
+        f"{'tests':>8} {'retained [MB]':>14} {'peak [MB]':>10} {'gc objects':>11} "
+        f"{'collections':>12} {'gc [s]':>8} {'time [s]':>9}"
+    )
+    for tests in args.tests:
+        result = measure(tests)
+        results.append(result)
+        print(
+            f"{tests:>8} {result['retained_bytes'] / 2**20:>14.1f} {result['peak_bytes'] / 2**20:>10.1f} "
+            f"{result['gc_objects']:>11} {result['gc_collections']:>12} {result['gc_seconds']:>8.3f} "
+            f"{result['seconds']:>9.3f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Compare two result files of ``benchmarks/run.py``.
+
+Usage: python benchmarks/compare.py old.json new.json --threshold 1.2
+
+Exits with status 1 if any benchmark got slower by more than the threshold.
+"""
+
+import argparse
+import json
+
+
+def _key(result: dict) -> tuple:
+    return (result["benchmark"],) + tuple(sorted(result["params"].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old", help="Results of the base commit.")
+    parser.add_argument("new", help="Results of the compared commit.")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Maximum allowed ratio of new time to old time.")
+    args = parser.parse_args()
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    old_results = {_key(result): result for result in old["results"]}
+
+    print(f"old: {old['meta'].get('commit')}")
+    print(f"new: {new['meta'].get('commit')}")
+    print(f"{'benchmark':<24} {'tests':>8} {'old [s]':>10} {'new [s]':>10} {'ratio':>7}")
+    regressions = []
+    for result in new["results"]:
+        old_result = old_results.get(_key(result))
+        if old_result is None:
+            continue
+        ratio = result["best"] / old_result["best"] if old_result["best"] > 0 else float("inf")
+        mark = ""
+        if ratio > args.threshold:
+            regressions.append(result)
+            mark = " !"
+        print(
+            f"{result['benchmark']:<24} {result['params']['tests']:>8} "
+            f"{old_result['best']:>10.4f} {result['best']:>10.4f} {ratio:>7.2f}{mark}"
+        )
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower by more than {args.threshold}x")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
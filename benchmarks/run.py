@@ -0,0 +1,284 @@
+"""
+Benchmark suite for loading packages and generating workflows.
+
+Each benchmark is run on synthetic packages of every requested size. Results
+are printed and can be written to a JSON file, which can be compared with
+results of another commit by ``benchmarks/compare.py``.
+
+Usage: python benchmarks/run.py --tests 10 1000 10000 --output results.json
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic import create_archive, create_sinolpack  # noqa: E402
+
+import sio3pack  # noqa: E402
+from sio3pack.packages.package.configuration import SIO3PackConfig  # noqa: E402
+from sio3pack.utils.archive import Archive  # noqa: E402
+
+_problem_ids = itertools.count(1)
+
+
+class BenchmarkContext:
+    """
+    Everything a benchmark needs: the synthetic package and its parameters.
+    """
+
+    def __init__(self, tmpdir: str, params: dict):
+        self.tmpdir = tmpdir
+        self.params = params
+        self.config = SIO3PackConfig.detect()
+        self.package_path = create_sinolpack(
+            os.path.join(tmpdir, "package"),
+            tests=params["tests"],
+            groups=params["groups"],
+            input_size=params["input_size"],
+            output_size=params["input_size"],
+        )
+        self._archives = {}
+        self._package = None
+
+    @property
+    def package(self):
+        """
+        A package loaded once and shared by benchmarks that don't modify it.
+        """
+        if self._package is None:
+            self._package = sio3pack.from_file(self.package_path, self.config)
+        return self._package
+
+    def load(self):
+        return sio3pack.from_file(self.package_path, self.config)
+
+    def get_archive(self, extension: str) -> str:
+        if extension not in self._archives:
+            path = os.path.join(self.tmpdir, f"package.{extension}")
+            self._archives[extension] = create_archive(self.package_path, path)
+        return self._archives[extension]
+
+    def next_problem_id(self) -> int:
+        # All contexts share the database, so IDs have to be unique across them.
+        return next(_problem_ids)
+
+
+def _setup_django(tmpdir: str) -> bool:
+    """
+    Configure Django with a fresh SQLite database. Returns False if Django isn't installed.
+    """
+    try:
+        import django
+        from django.conf import settings
+        from django.core.management import call_command
+    except ImportError:
+        return False
+
+    settings.configure(
+        INSTALLED_APPS=[
+            "django.contrib.contenttypes",
+            "django.contrib.auth",
+            "sio3pack.django.common",
+            "sio3pack.django.sinolpack",
+        ],
+        DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": os.path.join(tmpdir, "db.sqlite3")}},
+        MEDIA_ROOT=os.path.join(tmpdir, "media"),
+        DEFAULT_AUTO_FIELD="django.db.models.AutoField",
+        USE_TZ=True,
+    )
+    django.setup()
+    call_command("migrate", verbosity=0)
+    return True
+
+
+def bench_extract_zip(ctx: BenchmarkContext):
+    archive = ctx.get_archive("zip")
+    to_path = tempfile.mkdtemp(dir=ctx.tmpdir)
+    start = time.perf_counter()
+    Archive(archive).extract(to_path=to_path)
+    elapsed = time.perf_counter() - start
+    shutil.rmtree(to_path)
+    return elapsed
+
+
+def bench_extract_tgz(ctx: BenchmarkContext):
+    archive = ctx.get_archive("tar.gz")
+    to_path = tempfile.mkdtemp(dir=ctx.tmpdir)
+    start = time.perf_counter()
+    Archive(archive).extract(to_path=to_path)
+    elapsed = time.perf_counter() - start
+    shutil.rmtree(to_path)
+    return elapsed
+
+
+def bench_load(ctx: BenchmarkContext):
+    start = time.perf_counter()
+    ctx.load()
+    return time.perf_counter() - start
+
+
+def bench_unpack_operation(ctx: BenchmarkContext):
+    package = ctx.load()
+    start = time.perf_counter()
+    for _ in package.get_unpack_operation().get_workflow():
+        pass
+    return time.perf_counter() - start
+
+
+def bench_run_operation(ctx: BenchmarkContext):
+    package = ctx.package
+    package.workflow_manager.clear_run_skeletons()
+    start = time.perf_counter()
+    for _ in package.get_run_operation(package.main_model_solution).get_workflow():
+        pass
+    return time.perf_counter() - start
+
+
+def bench_run_operation_cached(ctx: BenchmarkContext):
+    # Next submissions for the same problem reuse the skeleton of the run workflow.
+    package = ctx.package
+    for _ in package.get_run_operation(package.main_model_solution).get_workflow():
+        pass
+    start = time.perf_counter()
+    for _ in package.get_run_operation(package.main_model_solution).get_workflow():
+        pass
+    return time.perf_counter() - start
+
+
+def bench_run_operation_chunked(ctx: BenchmarkContext):
+    package = ctx.package
+    groups = {f"obsreg:group_grade_res_{test.group}": "OK" for test in package.tests}
+    op = package.get_run_operation(package.main_model_solution, chunk_size=1000)
+    start = time.perf_counter()
+    for _ in op.get_workflow():
+        op.return_results(groups)
+    return time.perf_counter() - start
+
+
+def bench_to_json(ctx: BenchmarkContext):
+    package = ctx.package
+    workflow = next(package.get_run_operation(package.main_model_solution).get_workflow())
+    start = time.perf_counter()
+    workflow.to_json()
+    return time.perf_counter() - start
+
+
+def bench_to_json_int_regs(ctx: BenchmarkContext):
+    package = ctx.package
+    # Converting to integer registers modifies the workflow, so a new one is needed every time.
+    workflow = next(package.get_run_operation(package.main_model_solution).get_workflow())
+    start = time.perf_counter()
+    workflow.to_json(to_int_regs=True)
+    return time.perf_counter() - start
+
+
+def bench_to_json_parametric(ctx: BenchmarkContext):
+    package = ctx.package
+    workflow = next(package.get_run_operation(package.main_model_solution).get_workflow())
+    start = time.perf_counter()
+    workflow.to_json(parametric=True)
+    return time.perf_counter() - start
+
+
+def bench_save_to_db(ctx: BenchmarkContext):
+    package = ctx.load()
+    problem_id = ctx.next_problem_id()
+    start = time.perf_counter()
+    package.save_to_db(problem_id)
+    return time.perf_counter() - start
+
+
+def bench_load_from_db(ctx: BenchmarkContext):
+    problem_id = ctx.next_problem_id()
+    ctx.load().save_to_db(problem_id)
+    start = time.perf_counter()
+    sio3pack.from_db(problem_id, ctx.config)
+    return time.perf_counter() - start
+
+
+BENCHMARKS = {
+    "extract_zip": bench_extract_zip,
+    "extract_tgz": bench_extract_tgz,
+    "load": bench_load,
+    "unpack_operation": bench_unpack_operation,
+    "run_operation": bench_run_operation,
+    "run_operation_cached": bench_run_operation_cached,
+    "run_operation_chunked": bench_run_operation_chunked,
+    "to_json": bench_to_json,
+    "to_json_int_regs": bench_to_json_int_regs,
+    "to_json_parametric": bench_to_json_parametric,
+}
+
+DB_BENCHMARKS = {
+    "save_to_db": bench_save_to_db,
+    "load_from_db": bench_load_from_db,
+}
+
+
+def _get_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(__file__), stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tests", type=int, nargs="+", default=[10, 1000, 10000], help="Numbers of tests.")
+    parser.add_argument("--tests-per-group", type=int, default=100, help="Number of tests in each group.")
+    parser.add_argument("--input-size", type=int, default=16, help="Size of each test file in bytes.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs of each benchmark.")
+    parser.add_argument("--only", nargs="+", help="Run only benchmarks with these names.")
+    parser.add_argument("--no-db", action="store_true", help="Skip benchmarks that need Django.")
+    parser.add_argument("--output", help="Write results to this JSON file.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        benchmarks = dict(BENCHMARKS)
+        if not args.no_db and _setup_django(tmpdir):
+            benchmarks.update(DB_BENCHMARKS)
+        if args.only:
+            benchmarks = {name: func for name, func in benchmarks.items() if name in args.only}
+
+        results = []
+        print(f"{'benchmark':<24} {'tests':>8} {'best [s]':>10} {'median [s]':>11}")
+        for tests in args.tests:
+            params = {
+                "tests": tests,
+                "groups": max(1, tests // args.tests_per_group),
+                "input_size": args.input_size,
+            }
+            ctx = BenchmarkContext(tempfile.mkdtemp(dir=tmpdir), params)
+            for name, func in benchmarks.items():
+                runs = [func(ctx) for _ in range(args.repeat)]
+                results.append({"benchmark": name, "params": params, "best": min(runs), "runs": runs})
+                print(f"{name:<24} {tests:>8} {min(runs):>10.4f} {statistics.median(runs):>11.4f}")
+            shutil.rmtree(ctx.tmpdir)
+
+    if args.output:
+        meta = {
+            "commit": _get_commit(),
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        }
+        with open(args.output, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
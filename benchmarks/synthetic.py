@@ -0,0 +1,104 @@
+"""
+Generators of synthetic packages for benchmarks.
+"""
+
+import os
+import string
+import tarfile
+import zipfile
+
+import yaml
+
+
+def _test_suffix(index: int) -> str:
+    """
+    Get a suffix of a test ID for the test with the given index in a group,
+    for example ``a``, ``b``, ..., ``z``, ``ba``, ``bb``, ...
+    """
+    letters = string.ascii_lowercase
+    suffix = letters[index % 26]
+    index //= 26
+    while index > 0:
+        suffix = letters[index % 26] + suffix
+        index //= 26
+    return suffix
+
+
+def create_sinolpack(
+    directory: str,
+    tests: int = 100,
+    groups: int = 10,
+    input_size: int = 16,
+    output_size: int = 16,
+    task_id: str = "bch",
+    checker: bool = True,
+    config: dict = None,
+) -> str:
+    """
+    Create an unpacked Sinolpack with the given number of tests.
+
+    Tests are spread evenly over groups ``1..groups``. Group ``0`` has one example test.
+
+    :param directory: The directory in which the package is created.
+    :param tests: The number of tests, including the example test.
+    :param groups: The number of groups, excluding the example group.
+    :param input_size: The size of each input file in bytes.
+    :param output_size: The size of each output file in bytes.
+    :param task_id: The short name of the task.
+    :param checker: Whether the package has a checker.
+    :param config: Additional entries of ``config.yml``.
+    :return: The path to the package.
+    """
+    path = os.path.join(directory, task_id)
+    for subdir in ["in", "out", "prog", "doc"]:
+        os.makedirs(os.path.join(path, subdir), exist_ok=True)
+
+    package_config = {"title": f"Synthetic package with {tests} tests", "time_limit": 1000, "memory_limit": 262144}
+    package_config.update(config or {})
+    with open(os.path.join(path, "config.yml"), "w") as f:
+        yaml.dump(package_config, f)
+
+    with open(os.path.join(path, "prog", f"{task_id}.cpp"), "w") as f:
+        f.write("#include <iostream>\n\nint main() {}\n")
+    if checker:
+        with open(os.path.join(path, "prog", f"{task_id}chk.cpp"), "w") as f:
+            f.write("#include <iostream>\n\nint main() {}\n")
+
+    test_ids = ["0"]
+    for i in range(tests - 1):
+        group = i % max(groups, 1) + 1
+        test_ids.append(f"{group}{_test_suffix(i // max(groups, 1))}")
+
+    input_data = "1" * input_size
+    output_data = "1" * output_size
+    for test_id in test_ids:
+        with open(os.path.join(path, "in", f"{task_id}{test_id}.in"), "w") as f:
+            f.write(input_data)
+        with open(os.path.join(path, "out", f"{task_id}{test_id}.out"), "w") as f:
+            f.write(output_data)
+    return path
+
+
+def create_archive(package_path: str, archive_path: str) -> str:
+    """
+    Pack an unpacked package into an archive. The format is chosen by the
+    extension of ``archive_path`` (``.zip``, ``.tar.gz`` or ``.tgz``).
+
+    :param package_path: The path to the unpacked package.
+    :param archive_path: The path to the created archive.
+    :return: The path to the archive.
+    """
+    root = os.path.dirname(os.path.abspath(package_path))
+    name = os.path.basename(os.path.abspath(package_path))
+    if archive_path.endswith(".zip"):
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            for dirpath, _, filenames in os.walk(package_path):
+                for filename in filenames:
+                    file_path = os.path.join(dirpath, filename)
+                    archive.write(file_path, os.path.relpath(file_path, root))
+    elif archive_path.endswith(".tar.gz") or archive_path.endswith(".tgz"):
+        with tarfile.open(archive_path, "w:gz") as archive:
+            archive.add(package_path, arcname=name)
+    else:
+        raise ValueError(f"Unknown archive format of {archive_path}")
+    return archive_path
@@ -1,10 +1,11 @@
 __version__ = "1.0.0.dev3"
 
 from sio3pack.files import LocalFile
+from sio3pack.instrumentation import span
 from sio3pack.packages.exceptions import *
 from sio3pack.packages.package import Package
 
-__all__ = ["from_file", "from_db"]
+__all__ = ["from_file", "from_db", "from_pool"]
 
 from sio3pack.packages.package.configuration import SIO3PackConfig
 
@@ -19,7 +20,8 @@ def from_file(file: str | LocalFile, configuration: SIO3PackConfig = None) -> Pa
     """
     if isinstance(file, str):
         file = LocalFile(file)
-    return Package.from_file(file, configuration=configuration)
+    with span("from_file"):
+        return Package.from_file(file, configuration=configuration)
 
 
 def from_db(problem_id: int, configuration: SIO3PackConfig = None) -> Package:
@@ -37,6 +39,25 @@ def from_db(problem_id: int, configuration: SIO3PackConfig = None) -> Package:
 
         configuration = configuration or SIO3PackConfig()
         configuration.django_settings = settings
-        return Package.from_db(problem_id, configuration)
+        with span("from_db"):
+            return Package.from_db(problem_id, configuration)
     except ImportError:
         raise ImproperlyConfigured("sio3pack is not installed with Django support.")
+
+
+def from_pool(problem_id: int, revision=None, configuration: SIO3PackConfig = None) -> Package:
+    """
+    Get a package from the process-wide package pool, loading it from the database
+    with :func:`from_db` if it's not there. The returned package is shared, so it
+    shouldn't be modified. See :mod:`sio3pack.pool`.
+
+    :param problem_id: The problem id.
+    :param revision: The revision of the package. If not given, the revision stored in
+        the database is checked, so packages changed by other processes are loaded again.
+    :param configuration: Configuration of the package. Packages loaded with different
+        configurations are pooled separately.
+    :return: The package object.
+    """
+    from sio3pack.pool import get_package_pool
+
+    return get_package_pool().get(problem_id, revision, configuration)
@@ -0,0 +1,42 @@
+from sio3pack.django.common.models import SIO3Package, SIO3PackCompiledExecutable
+from sio3pack.packages.package.executable_cache import ExecutableCache
+
+
+class DjangoExecutableCache(ExecutableCache):
+    """
+    A store of compiled executables for packages saved in the database.
+
+    :param SIO3Package db_package: The package the executables belong to.
+    """
+
+    def __init__(self, db_package: SIO3Package):
+        """
+        :param db_package: The package the executables belong to.
+        """
+        self.db_package = db_package
+
+    def get(self, key: str) -> str | None:
+        if self.db_package is None:
+            return None
+        paths = SIO3PackCompiledExecutable.objects.filter(package=self.db_package, cache_key=key).values_list(
+            "executable_path", flat=True
+        )
+        return next(iter(paths), None)
+
+    def put(self, key: str, exe_path: str):
+        if self.db_package is None:
+            return
+        SIO3PackCompiledExecutable.objects.filter(package=self.db_package, executable_path=exe_path).exclude(
+            cache_key=key
+        ).delete()
+        SIO3PackCompiledExecutable.objects.update_or_create(
+            package=self.db_package, cache_key=key, defaults={"executable_path": exe_path}
+        )
+
+    def invalidate(self, exe_path: str = None):
+        if self.db_package is None:
+            return
+        executables = SIO3PackCompiledExecutable.objects.filter(package=self.db_package)
+        if exe_path is not None:
+            executables = executables.filter(executable_path=exe_path)
+        executables.delete()
@@ -1,10 +1,13 @@
+import functools
 import json
 from typing import Any
 
 from django.core.files import File
 from django.db import transaction
+from django.db.models import F
 
 import sio3pack
+from sio3pack.django.common.executable_cache import DjangoExecutableCache
 from sio3pack.django.common.models import (
     SIO3Package,
     SIO3PackMainModelSolution,
@@ -16,9 +19,12 @@ from sio3pack.django.common.models import (
 )
 from sio3pack.files import LocalFile
 from sio3pack.files.remote_file import RemoteFile
+from sio3pack.instrumentation import instrumented
 from sio3pack.packages.exceptions import PackageAlreadyExists
+from sio3pack.pool import get_package_pool
 from sio3pack.test import Test
 from sio3pack.workflow import Workflow
+from sio3pack.workflow.validation import check_workflows
 
 
 class DjangoHandler:
@@ -43,10 +49,12 @@ class DjangoHandler:
         except SIO3Package.DoesNotExist:
             self.db_package = None
 
+    @instrumented("django.save_to_db")
     @transaction.atomic
     def save_to_db(self):
         """
-        Save the package to the database.
+        Save the package to the database. Saving the package is its first change,
+        so it gets revision 1.
         """
         if SIO3Package.objects.filter(problem_id=self.problem_id).exists():
             raise PackageAlreadyExists(self.problem_id)
@@ -55,6 +63,8 @@ class DjangoHandler:
             problem_id=self.problem_id,
             short_name=self.package.short_name,
             full_name=self.package.full_name,
+            revision=0,
+            fingerprint=self.package.fingerprint,
         )
 
         self._save_translated_titles()
@@ -63,7 +73,34 @@ class DjangoHandler:
         self._save_problem_statements()
         self._save_tests()
         self._save_workflows()
+        self.bump_revision()
 
+    @instrumented("django.update_workflows")
+    @transaction.atomic
+    def update_workflows(self):
+        """
+        Replace the saved workflows of the package with the current workflows of its
+        workflow manager, for example after some of ``package.workflow_manager.workflows``
+        were replaced.
+        """
+        SIO3PackWorkflow.objects.filter(package=self.db_package).delete()
+        self._save_workflows()
+        self.bump_revision()
+
+    def bump_revision(self):
+        """
+        Mark the package as changed. Every method changing the saved package calls it
+        in the same transaction as the change, so that caches keyed by :attr:`revision`
+        are invalidated. The revision is incremented in the database, so concurrent
+        bumps aren't lost. Pooled packages of this problem are removed from the pool
+        once the transaction is committed.
+        """
+        SIO3Package.objects.filter(pk=self.db_package.pk).update(revision=F("revision") + 1)
+        self.db_package.refresh_from_db(fields=["revision"])
+        # Pooled packages of this problem are stale once the change is visible to other connections.
+        transaction.on_commit(functools.partial(get_package_pool().invalidate, self.problem_id))
+
+    @instrumented("django.save_translated_titles")
     def _save_translated_titles(self):
         """
         Save the translated titles to the database.
@@ -75,6 +112,7 @@ class DjangoHandler:
                 name=title,
             )
 
+    @instrumented("django.save_main_model_solution")
     def _save_main_model_solution(self):
         """
         Save the main model solution to the database.
@@ -87,6 +125,7 @@ class DjangoHandler:
         )
         instance.save()
 
+    @instrumented("django.save_model_solutions")
     def _save_model_solutions(self):
         for order, solution in enumerate(self.package.model_solutions):
             instance = SIO3PackModelSolution(
@@ -97,6 +136,7 @@ class DjangoHandler:
             instance.source_file.save(solution.filename, File(open(solution.path, "rb")))
             instance.save()
 
+    @instrumented("django.save_problem_statements")
     def _save_problem_statements(self):
         def _add_statement(language: str, statement: LocalFile):
             instance = SIO3PackStatement(
@@ -110,6 +150,7 @@ class DjangoHandler:
         for lang, statement in self.package.lang_statements.items():
             _add_statement(lang, statement)
 
+    @instrumented("django.save_tests")
     def _save_tests(self):
         for test in self.package.tests:
             instance = SIO3PackTest(
@@ -124,12 +165,15 @@ class DjangoHandler:
                 instance.output_file.save(test.out_file.filename, File(open(test.out_file.path, "rb")))
             instance.save()
 
+    @instrumented("django.save_workflows")
     def _save_workflows(self):
-        for name, wf in self.package.workflow_manager.all().items():
+        workflows = {name: wf.to_json() for name, wf in self.package.workflow_manager.all().items()}
+        check_workflows(workflows)
+        for name, data in workflows.items():
             instance = SIO3PackWorkflow(
                 package=self.db_package,
                 name=name,
-                workflow_raw=json.dumps(wf.to_json()),
+                workflow_raw=json.dumps(data),
             )
             instance.save()
 
@@ -139,10 +183,32 @@ class DjangoHandler:
         :param program: The program to get the path for.
         :return: The executable path or None if not found.
         """
-        if isinstance(program, File):
-            return program.path + ".e"
-        elif isinstance(program, str):
+        if isinstance(program, str):
             return program + ".e"
+        elif hasattr(program, "path"):
+            return program.path + ".e"
+
+    @property
+    def executable_cache(self) -> DjangoExecutableCache:
+        """
+        A store of compiled executables of the package.
+        """
+        return DjangoExecutableCache(self.db_package)
+
+    @property
+    def revision(self) -> str:
+        """
+        A token identifying the saved version of the package. It includes the fingerprint,
+        so that packages saved again under the same problem ID don't share revisions.
+        """
+        return f"{self.db_package.revision}-{self.db_package.fingerprint}"
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        SHA-256 hash of the contents of the package when it was saved.
+        """
+        return self.db_package.fingerprint
 
     @property
     def short_name(self) -> str:
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0006_alter_sio3packmainmodelsolution_package_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SIO3PackCompiledExecutable",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("cache_key", models.CharField(max_length=64, verbose_name="cache key")),
+                ("executable_path", models.CharField(max_length=255, verbose_name="executable path")),
+                (
+                    "package",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="compiled_executables",
+                        to="common.sio3package",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "compiled executable",
+                "verbose_name_plural": "compiled executables",
+                "unique_together": {("package", "cache_key")},
+            },
+        ),
+    ]
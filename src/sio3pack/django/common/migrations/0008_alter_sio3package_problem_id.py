@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0007_sio3packcompiledexecutable"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="sio3package",
+            name="problem_id",
+            field=models.IntegerField(unique=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0008_alter_sio3package_problem_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sio3package",
+            name="fingerprint",
+            field=models.CharField(default="", max_length=64, verbose_name="fingerprint"),
+        ),
+        migrations.AddField(
+            model_name="sio3package",
+            name="revision",
+            field=models.PositiveIntegerField(default=1, verbose_name="revision"),
+        ),
+    ]
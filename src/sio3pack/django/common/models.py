@@ -30,9 +30,11 @@ class SIO3Package(models.Model):
     A generic package type.
     """
 
-    problem_id = models.IntegerField()
+    problem_id = models.IntegerField(unique=True)
     short_name = models.CharField(max_length=30, verbose_name=_("short name"))
     full_name = models.CharField(max_length=255, default="", verbose_name=_("full name"))
+    revision = models.PositiveIntegerField(default=1, verbose_name=_("revision"))
+    fingerprint = models.CharField(max_length=64, default="", verbose_name=_("fingerprint"))
 
     def __str__(self):
         return f"<SIO3Package {self.short_name}>"
@@ -141,3 +143,22 @@ class SIO3PackWorkflow(models.Model):
     class Meta(object):
         verbose_name = _("workflow")
         verbose_name_plural = _("workflows")
+
+
+class SIO3PackCompiledExecutable(models.Model):
+    """
+    Model to store compiled executables of the package's programs,
+    keyed by :func:`sio3pack.packages.package.executable_cache.get_executable_cache_key`.
+    """
+
+    package = models.ForeignKey(SIO3Package, on_delete=models.CASCADE, related_name="compiled_executables")
+    cache_key = models.CharField(max_length=64, verbose_name=_("cache key"))
+    executable_path = models.CharField(max_length=255, verbose_name=_("executable path"))
+
+    def __str__(self):
+        return f"<SIO3PackCompiledExecutable {self.executable_path}>"
+
+    class Meta(object):
+        verbose_name = _("compiled executable")
+        verbose_name_plural = _("compiled executables")
+        unique_together = ("package", "cache_key")
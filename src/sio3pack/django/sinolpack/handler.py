@@ -14,6 +14,7 @@ from sio3pack.django.sinolpack.models import (
     SinolpackSpecialFile,
 )
 from sio3pack.files.remote_file import RemoteFile
+from sio3pack.instrumentation import instrumented
 
 
 class SinolpackDjangoHandler(DjangoHandler):
@@ -25,6 +26,7 @@ class SinolpackDjangoHandler(DjangoHandler):
     def __init__(self, package: "sio3pack.Sinolpack", problem_id: int):
         super().__init__(package, problem_id)
 
+    @instrumented("django.sinolpack.save_to_db")
     @transaction.atomic
     def save_to_db(self):
         """
@@ -38,6 +40,7 @@ class SinolpackDjangoHandler(DjangoHandler):
         self._save_extra_files()
         self._save_attachments()
 
+    @instrumented("django.sinolpack.save_config")
     def _save_config(self):
         """
         Save the ``config.yml`` to the database.
@@ -48,6 +51,7 @@ class SinolpackDjangoHandler(DjangoHandler):
             config=yaml.dump(config),
         )
 
+    @instrumented("django.sinolpack.save_model_solutions")
     def _save_model_solutions(self):
         for order, ms in enumerate(self.package.model_solutions):
             kind = ms["kind"]
@@ -60,6 +64,7 @@ class SinolpackDjangoHandler(DjangoHandler):
             )
             instance.source_file.save(solution.filename, File(open(solution.path, "rb")))
 
+    @instrumented("django.sinolpack.save_additional_files")
     def _save_additional_files(self):
         for file in self.package.additional_files:
             instance = SinolpackAdditionalFile(
@@ -68,6 +73,7 @@ class SinolpackDjangoHandler(DjangoHandler):
             )
             instance.file.save(file.filename, File(open(file.path, "rb")))
 
+    @instrumented("django.sinolpack.save_special_files")
     def _save_special_files(self):
         for type, file in self.package.special_files.items():
             if file is not None:
@@ -82,6 +88,7 @@ class SinolpackDjangoHandler(DjangoHandler):
                 )
                 instance.save()
 
+    @instrumented("django.sinolpack.save_extra_files")
     def _save_extra_files(self):
         for path, file in self.package.extra_files.items():
             instance = SinolpackExtraFile(
@@ -90,6 +97,7 @@ class SinolpackDjangoHandler(DjangoHandler):
             )
             instance.file.save(file.filename, File(open(file.path, "rb")))
 
+    @instrumented("django.sinolpack.save_attachments")
     def _save_attachments(self):
         for attachment in self.package.attachments:
             instance = SinolpackAttachment(
@@ -127,14 +135,12 @@ class SinolpackDjangoHandler(DjangoHandler):
         A dictionary of special files (as :class:`sio3pack.RemoteFile`) for the problem.
         The keys are the types of the special files.
         """
-        res = {}
-        for type in self.package.special_file_types():
-            special_file = SinolpackSpecialFile.objects.filter(package=self.db_package, type=type)
-            if special_file.exists():
-                res[type] = RemoteFile(special_file.first().additional_file.file)
-            else:
-                res[type] = None
-        return res
+        types = self.package.special_file_types()
+        special_files = SinolpackSpecialFile.objects.filter(package=self.db_package, type__in=types).select_related(
+            "additional_file"
+        )
+        found = {special_file.type: RemoteFile(special_file.additional_file.file) for special_file in special_files}
+        return {type: found.get(type) for type in types}
 
     @property
     def extra_execution_files(self) -> list[RemoteFile]:
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0008_alter_sio3package_problem_id"),
+        ("sinolpack", "0004_sinolpackextrafile"),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="sinolpackextrafile",
+            unique_together={("package", "package_path")},
+        ),
+        migrations.AlterUniqueTogether(
+            name="sinolpackspecialfile",
+            unique_together={("package", "type")},
+        ),
+        migrations.AddIndex(
+            model_name="sinolpackadditionalfile",
+            index=models.Index(fields=["package", "name"], name="sinolpack_s_package_de962b_idx"),
+        ),
+    ]
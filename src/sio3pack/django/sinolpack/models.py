@@ -61,6 +61,7 @@ class SinolpackAdditionalFile(models.Model):
     class Meta:
         verbose_name = _("additional file")
         verbose_name_plural = _("additional files")
+        indexes = [models.Index(fields=["package", "name"])]
 
 
 class SinolpackSpecialFile(models.Model):
@@ -76,6 +77,7 @@ class SinolpackSpecialFile(models.Model):
     class Meta:
         verbose_name = _("special file")
         verbose_name_plural = _("special files")
+        unique_together = ("package", "type")
 
 
 class SinolpackAttachment(models.Model):
@@ -102,3 +104,6 @@ class SinolpackExtraFile(models.Model):
 
     def __str__(self):
         return f"<SinolpackExtraFile {self.package_path}>"
+
+    class Meta:
+        unique_together = ("package", "package_path")
@@ -12,3 +12,11 @@ class WorkflowCreationError(Exception):
     def __init__(self, message: str):
         super().__init__(message)
         self.message = message
+
+
+class WorkflowValidationError(Exception):
+    """Raised when a workflow is structurally invalid. Contains all errors found in it."""
+
+    def __init__(self, errors: list[str]):
+        super().__init__("Invalid workflow:\n" + "\n".join(errors))
+        self.errors = errors
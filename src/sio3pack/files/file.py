@@ -19,6 +19,14 @@ class File:
         """
         raise NotImplementedError()
 
+    def size(self) -> int:
+        """
+        Get the size of the file.
+
+        :return: The size of the file in bytes.
+        """
+        raise NotImplementedError()
+
     def write(self, text: str):
         """
         Write to the file.
@@ -1,6 +1,7 @@
 import os
 
 from sio3pack.files.file import File
+from sio3pack.instrumentation import instrumented
 
 
 class LocalFile(File):
@@ -38,10 +39,15 @@ class LocalFile(File):
         super().__init__(path)
         self.filename = os.path.basename(path)
 
+    @instrumented("local_file.read")
     def read(self) -> str:
         with open(self.path, "r") as f:
             return f.read()
 
+    def size(self) -> int:
+        return os.path.getsize(self.path)
+
+    @instrumented("local_file.write")
     def write(self, text: str):
         with open(self.path, "w") as f:
             f.write(text)
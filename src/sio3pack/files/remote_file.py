@@ -25,3 +25,9 @@ class RemoteFile(File):
         Read the file.
         """
         return self.file.read()
+
+    def size(self) -> int:
+        """
+        Get the size of the file.
+        """
+        return self.file.size
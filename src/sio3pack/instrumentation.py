@@ -0,0 +1,229 @@
+"""
+Instrumentation of sio3pack. Named spans are placed around the expensive steps
+(processing packages, extracting archives, building workflows, database and file I/O).
+Durations of finished spans are reported to the current instrumentation, which
+is set with :func:`set_instrumentation`. By default, spans are not measured at all.
+
+Example::
+
+    from sio3pack import instrumentation
+
+    aggregator = instrumentation.AggregatingInstrumentation()
+    instrumentation.set_instrumentation(aggregator)
+    package = sio3pack.from_file(path)
+    print(aggregator.report())
+"""
+
+import functools
+import threading
+import time
+from typing import Any, Callable
+
+
+class Instrumentation:
+    """
+    Base class for instrumentations. Instrumentations which are not
+    ``enabled`` get no spans, so that disabled instrumentation costs
+    only a single attribute check per span.
+    """
+
+    enabled = True
+
+    def on_span(self, name: str, duration: float, attributes: dict[str, Any]):
+        """
+        Called when a span finishes.
+
+        :param name: The name of the span.
+        :param duration: The duration of the span in seconds.
+        :param attributes: Additional data about the span.
+        """
+        raise NotImplementedError()
+
+
+class NoInstrumentation(Instrumentation):
+    """
+    Instrumentation that doesn't measure anything. It's the default.
+    """
+
+    enabled = False
+
+    def on_span(self, name: str, duration: float, attributes: dict[str, Any]):
+        pass
+
+
+class SpanStats:
+    """
+    Aggregated durations of spans with the same name.
+
+    :param int count: The number of finished spans.
+    :param float total: The sum of durations in seconds.
+    :param float min: The shortest duration in seconds.
+    :param float max: The longest duration in seconds.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def add(self, duration: float):
+        self.count += 1
+        self.total += duration
+        self.min = min(self.min, duration)
+        self.max = max(self.max, duration)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_json(self) -> dict:
+        return {"count": self.count, "total": self.total, "min": self.min, "max": self.max, "mean": self.mean}
+
+
+class AggregatingInstrumentation(Instrumentation):
+    """
+    Instrumentation that aggregates durations of spans in memory, by their names.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats: dict[str, SpanStats] = {}
+
+    def on_span(self, name: str, duration: float, attributes: dict[str, Any]):
+        with self._lock:
+            if name not in self.stats:
+                self.stats[name] = SpanStats()
+            self.stats[name].add(duration)
+
+    def reset(self):
+        """
+        Forget all aggregated spans.
+        """
+        with self._lock:
+            self.stats = {}
+
+    def to_json(self) -> dict[str, dict]:
+        """
+        Get aggregated spans as a dictionary.
+        """
+        with self._lock:
+            return {name: stats.to_json() for name, stats in self.stats.items()}
+
+    def report(self) -> str:
+        """
+        Get a human-readable table of aggregated spans, sorted by the total time.
+        """
+        lines = [f"{'span':<48} {'count':>8} {'total [s]':>10} {'mean [ms]':>10} {'max [ms]':>10}"]
+        with self._lock:
+            stats = sorted(self.stats.items(), key=lambda item: item[1].total, reverse=True)
+            for name, span_stats in stats:
+                lines.append(
+                    f"{name:<48} {span_stats.count:>8} {span_stats.total:>10.4f} "
+                    f"{span_stats.mean * 1000:>10.3f} {span_stats.max * 1000:>10.3f}"
+                )
+        return "\n".join(lines)
+
+
+class CallbackInstrumentation(Instrumentation):
+    """
+    Instrumentation that passes every finished span to a callback, for example
+    to report it to a metrics system.
+
+    :param callable callback: A function called with the name, the duration in
+        seconds and the attributes of every finished span.
+    """
+
+    def __init__(self, callback: Callable[[str, float, dict[str, Any]], None]):
+        self.callback = callback
+
+    def on_span(self, name: str, duration: float, attributes: dict[str, Any]):
+        self.callback(name, duration, attributes)
+
+
+_instrumentation: Instrumentation = NoInstrumentation()
+
+
+def get_instrumentation() -> Instrumentation:
+    """
+    Get the current instrumentation.
+    """
+    return _instrumentation
+
+
+def set_instrumentation(instrumentation: Instrumentation | None) -> Instrumentation:
+    """
+    Set the instrumentation which gets all spans. Passing None disables instrumentation.
+
+    :param instrumentation: The new instrumentation.
+    :return: The previous instrumentation.
+    """
+    global _instrumentation
+    previous = _instrumentation
+    _instrumentation = instrumentation or NoInstrumentation()
+    return previous
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    def __init__(self, instrumentation: Instrumentation, name: str, attributes: dict[str, Any]):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.attributes = attributes
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.instrumentation.on_span(self.name, duration, self.attributes)
+        return False
+
+
+def span(name: str, **attributes):
+    """
+    A context manager that measures the duration of its body and reports it
+    to the current instrumentation.
+
+    :param name: The name of the span.
+    :param attributes: Additional data about the span.
+    """
+    instrumentation = _instrumentation
+    if not instrumentation.enabled:
+        return _NOOP_SPAN
+    return _Span(instrumentation, name, attributes)
+
+
+def instrumented(name: str):
+    """
+    A decorator that measures every call of the function as a span with the given name.
+
+    :param name: The name of the span.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            instrumentation = _instrumentation
+            if not instrumentation.enabled:
+                return func(*args, **kwargs)
+            with _Span(instrumentation, name, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
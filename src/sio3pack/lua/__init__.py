@@ -1,4 +1,6 @@
+import math
 import os
+from typing import Any
 
 
 def get_script(name: str, templates: dict[str, str] = None) -> str:
@@ -19,14 +21,58 @@ def get_script(name: str, templates: dict[str, str] = None) -> str:
     return script
 
 
-def to_lua_map(data: dict[str, str]) -> str:
+def to_lua_string(value: str) -> str:
     """
-    Convert a dictionary to a Lua map.
+    Convert a string to a Lua string literal.
+
+    :param value: The string to convert.
+    """
+    escaped = []
+    for char in value:
+        if char in ('"', "\\"):
+            escaped.append("\\" + char)
+        elif char == "\n":
+            escaped.append("\\n")
+        elif ord(char) < 32 or ord(char) == 127:
+            escaped.append(f"\\{ord(char):03d}")
+        else:
+            escaped.append(char)
+    return '"' + "".join(escaped) + '"'
+
+
+def to_lua_value(value: Any) -> str:
+    """
+    Convert a JSON-like value to a Lua expression. Dictionaries and lists are
+    converted to Lua tables, None to ``nil``.
+
+    :param value: The value to convert.
+    """
+    if value is None:
+        return "nil"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "(0/0)"
+        if math.isinf(value):
+            return "math.huge" if value > 0 else "-math.huge"
+        return repr(value)
+    if isinstance(value, str):
+        return to_lua_string(value)
+    if isinstance(value, dict):
+        return to_lua_map(value)
+    if isinstance(value, (list, tuple)):
+        return "{" + ", ".join(to_lua_value(item) for item in value) + "}"
+    raise TypeError(f"Can't convert {type(value).__name__} to Lua")
+
+
+def to_lua_map(data: dict[str, Any]) -> str:
+    """
+    Convert a dictionary to a Lua map. Values are converted with :func:`to_lua_value`.
 
     :param data: The dictionary to convert.
     """
-    lua_map = "{"
-    for key, value in data.items():
-        lua_map += f'"{key}" = "{value}", '
-    lua_map = lua_map.rstrip(", ") + "}"
-    return lua_map
+    entries = [f"[{to_lua_value(key)}] = {to_lua_value(value)}" for key, value in data.items()]
+    return "{" + ", ".join(entries) + "}"
@@ -10,7 +10,56 @@ Example:
 ]]--
 local test_grading = <LUA_MAP_TEST_ID_REG>
 
-for reg, test_id in pairs(outgens) do
-    -- do some epic grading stuff
-    print("ok")
+--[[
+The template bellow contains IDs of the tests, in the order of the input
+registers of this task. The grade of the i-th test is read with get_register(i - 1),
+which returns nil if the register wasn't written yet.
+Example:
+{"1a", "1b"}
+
+]]--
+local test_ids = <LUA_LIST_TEST_IDS>
+
+--[[
+Whether the group is graded in the fail-fast mode. The script is reactive, so it's
+run every time one of its input registers is written, and the value it returns is
+written to its output register. It returns nil until the group's grade is decided.
+The score of a group is decided by its worst test, so in the fail-fast mode the grade
+is returned as soon as a test scores 0, without waiting for the remaining tests.
+]]--
+local fail_fast = <FAIL_FAST>
+
+local function get_status(result)
+    if type(result) == "table" then
+        return result.status
+    end
+    return result
+end
+
+local function get_score(result)
+    if type(result) == "table" and result.score ~= nil then
+        return result.score
+    end
+    if get_status(result) == "OK" then
+        return 100
+    end
+    return 0
+end
+
+local grade = nil
+local finished = 0
+for i, test_id in ipairs(test_ids) do
+    local result = get_register(i - 1)
+    if result ~= nil then
+        finished = finished + 1
+        local score = get_score(result)
+        if grade == nil or score < grade.score then
+            grade = {status = get_status(result), score = score}
+        end
+    end
+end
+
+if finished == #test_ids or (fail_fast and grade ~= nil and grade.score == 0) then
+    return grade
 end
+return nil
@@ -10,7 +10,59 @@ Example:
 ]]--
 local test_grading = <LUA_MAP_TEST_ID_REG>
 
-for reg, test_id in pairs(outgens) do
-    -- do some epic grading stuff
-    print("ok")
+--[[
+The template bellow contains grades of groups that were graded in other workflows,
+when the run is split into chunks. Empty otherwise.
+Example:
+{
+    ["0"] = "OK",
+    ["1"] = "WA",
+}
+
+]]--
+local group_results = <LUA_MAP_GROUP_RESULTS>
+
+--[[
+The template bellow contains IDs of the groups, in the order of the input
+registers of this task. The grade of the i-th group is read with get_register(i - 1),
+which returns nil if the register wasn't written yet.
+Example:
+{"0", "1"}
+
+]]--
+local group_ids = <LUA_LIST_GROUP_IDS>
+
+local function get_status(result)
+    if type(result) == "table" then
+        return result.status
+    end
+    return result
+end
+
+-- The script is reactive, so it returns nil until grades of all groups are written.
+local groups = {}
+for group, result in pairs(group_results) do
+    groups[group] = result
+end
+for i, group in ipairs(group_ids) do
+    local result = get_register(i - 1)
+    if result == nil then
+        return nil
+    end
+    groups[group] = result
+end
+
+-- The status of the run is the status of the first group which isn't OK.
+local names = {}
+for group in pairs(groups) do
+    table.insert(names, group)
+end
+table.sort(names)
+local status = "OK"
+for _, group in ipairs(names) do
+    if get_status(groups[group]) ~= "OK" then
+        status = get_status(groups[group])
+        break
+    end
 end
+return {status = status, groups = groups}
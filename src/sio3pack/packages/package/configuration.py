@@ -27,6 +27,7 @@ class SIO3PackConfig:
         django_settings=None,
         compilers_config: dict[str, CompilerConfig] = None,
         extensions_config: dict[str, str] = None,
+        executable_cache: "ExecutableCache" = None,
     ):
         """
         Initialize the configuration with Django settings.
@@ -36,6 +37,8 @@ class SIO3PackConfig:
             and the values are CompilerConfig objects.
         :param extensions_config: Dictionary of language configurations. The keys are the file extensions,
             and the values are the corresponding languages.
+        :param executable_cache: Store of compiled executables. If not set, packages use
+            a store matching their origin (local directory or database).
         """
         self.django_settings = django_settings
         self.compilers_config = compilers_config if compilers_config else {}
@@ -49,6 +52,7 @@ class SIO3PackConfig:
             }
         else:
             self.extensions_config = extensions_config
+        self.executable_cache = executable_cache
 
     @classmethod
     def detect(cls) -> "SIO3PackConfig":
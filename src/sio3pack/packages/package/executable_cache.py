@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import threading
+
+from sio3pack.files import File, LocalFile
+
+
+def get_file_hash(file: File | str) -> str | None:
+    """
+    Compute the SHA-256 hash of a file's contents.
+
+    :param file: The file (or a local path to the file) to hash.
+    :return: The hex digest, or None if the file's contents can't be read.
+    """
+    sha = hashlib.sha256()
+    if isinstance(file, LocalFile):
+        file = file.path
+    if isinstance(file, str):
+        if not os.path.isfile(file):
+            return None
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    # Remote files wrap a Django FieldFile. Rewind it afterwards, so that
+    # the hashing doesn't affect anyone reading the file later.
+    field_file = getattr(file, "file", None)
+    if field_file is None or not hasattr(field_file, "chunks"):
+        return None
+    try:
+        field_file.open("rb")
+        for chunk in field_file.chunks():
+            sha.update(chunk)
+        field_file.seek(0)
+    except (OSError, ValueError):
+        return None
+    return sha.hexdigest()
+
+
+def get_executable_cache_key(
+    source: File | str, extra_files: list[File | str], compiler_full_name: str, flags: list[str]
+) -> str | None:
+    """
+    Compute the key of a compiled executable. Two compilations with the same key
+    produce interchangeable executables.
+
+    :param source: The source file that is compiled.
+    :param extra_files: Extra files that are available during the compilation.
+    :param compiler_full_name: Full name of the compiler, with its version.
+    :param flags: Flags passed to the compiler.
+    :return: The key, or None if the key can't be computed (for example, when
+        the contents of some file can't be read).
+    """
+    source_hash = get_file_hash(source)
+    if source_hash is None:
+        return None
+    extra_hashes = []
+    for file in extra_files:
+        file_hash = get_file_hash(file)
+        if file_hash is None:
+            return None
+        name = file if isinstance(file, str) else file.path
+        extra_hashes.append([os.path.basename(name), file_hash])
+    extra_hashes.sort()
+
+    key = json.dumps([source_hash, extra_hashes, compiler_full_name, list(flags)])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class ExecutableCache:
+    """
+    Base class for stores of compiled executables. A store maps keys computed by
+    :func:`get_executable_cache_key` to paths of compiled executables.
+    """
+
+    def get(self, key: str) -> str | None:
+        """
+        Get the path to a valid executable with the given key.
+
+        :param key: The key of the executable.
+        :return: The path to the executable or None if there is no such executable.
+        """
+        raise NotImplementedError()
+
+    def put(self, key: str, exe_path: str):
+        """
+        Remember that the executable with the given key is stored under the given path.
+        Any other executable stored under the same path is forgotten.
+
+        :param key: The key of the executable.
+        :param exe_path: The path to the compiled executable.
+        """
+        raise NotImplementedError()
+
+    def invalidate(self, exe_path: str = None):
+        """
+        Forget the executable stored under the given path. If no path is given,
+        forget all executables.
+
+        :param exe_path: The path to the compiled executable.
+        """
+        raise NotImplementedError()
+
+
+class NoExecutableCache(ExecutableCache):
+    """
+    A store that never holds anything. Can be used to disable the cache.
+    """
+
+    def get(self, key: str) -> str | None:
+        return None
+
+    def put(self, key: str, exe_path: str):
+        pass
+
+    def invalidate(self, exe_path: str = None):
+        pass
+
+
+class LocalExecutableCache(ExecutableCache):
+    """
+    A store for packages on the local filesystem. The index is kept in a JSON file
+    next to the executables. An entry is valid only while the executable exists.
+
+    :param str directory: The directory with compiled executables.
+    """
+
+    INDEX_FILENAME = "index.json"
+
+    def __init__(self, directory: str):
+        """
+        :param directory: The directory with compiled executables.
+        """
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._index: dict[str, str] | None = None
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.directory, self.INDEX_FILENAME)
+
+    def _load(self) -> dict[str, str]:
+        if self._index is None:
+            try:
+                with open(self.index_path, "r") as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _dump(self):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.index_path, "w") as f:
+                json.dump(self._index, f)
+        except OSError:
+            # The cache is only an optimization, so a read-only package is not an error.
+            pass
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            exe_path = self._load().get(key)
+        if exe_path is None or not os.path.isfile(exe_path):
+            return None
+        return exe_path
+
+    def put(self, key: str, exe_path: str):
+        with self._lock:
+            index = self._load()
+            for other in [k for k, path in index.items() if path == exe_path]:
+                del index[other]
+            index[key] = exe_path
+            self._dump()
+
+    def invalidate(self, exe_path: str = None):
+        with self._lock:
+            index = self._load()
+            if exe_path is None:
+                index.clear()
+            else:
+                for other in [k for k, path in index.items() if path == exe_path]:
+                    del index[other]
+            self._dump()
@@ -1,13 +1,16 @@
+import hashlib
 import importlib
 import os
 from typing import Any, Type
 
 from sio3pack.exceptions import SIO3PackException
 from sio3pack.files import File, LocalFile
+from sio3pack.instrumentation import instrumented
 from sio3pack.packages.exceptions import ImproperlyConfigured, UnknownPackageType
 from sio3pack.packages.package.configuration import SIO3PackConfig
+from sio3pack.packages.package.executable_cache import LocalExecutableCache, get_executable_cache_key, get_file_hash
 from sio3pack.packages.package.handler import NoDjangoHandler
-from sio3pack.test import Test
+from sio3pack.test import RunOrdering, Test
 from sio3pack.utils.archive import Archive
 from sio3pack.utils.classinit import RegisteredSubclassesBase
 from sio3pack.workflow import WorkflowManager, WorkflowOperation
@@ -47,6 +50,7 @@ class Package(RegisteredSubclassesBase):
         the problem.
     :param list[File] attachments: A list of attachments related to the problem.
     :param WorkflowManager workflow_manager: A workflow manager for the problem.
+    :param ExecutableCache executable_cache: A store of compiled executables.
     """
 
     abstract = True
@@ -54,6 +58,7 @@ class Package(RegisteredSubclassesBase):
     def __init__(self):
         super().__init__()
         self.django = None
+        self._fingerprint = None
 
     @classmethod
     @wrap_exceptions
@@ -85,6 +90,7 @@ class Package(RegisteredSubclassesBase):
                 self.is_archive = True
             else:
                 self.is_archive = False
+        self.executable_cache = self.configuration.executable_cache or LocalExecutableCache(self._get_executables_dir())
 
     @classmethod
     @wrap_exceptions
@@ -128,6 +134,7 @@ class Package(RegisteredSubclassesBase):
             return self.configuration.django_settings.get(key, default)
         return getattr(self.configuration.django_settings, key, default)
 
+    @instrumented("package.setup_django_handler")
     def _setup_django_handler(self, problem_id: int):
         try:
             import django
@@ -141,6 +148,7 @@ class Package(RegisteredSubclassesBase):
             self.django_enabled = False
             self.django = NoDjangoHandler()
 
+    @instrumented("package.setup_workflows_from_db")
     def _setup_workflows_from_db(self):
         """
         Set up the workflows from the database. If sio3pack isn't installed with Django
@@ -150,6 +158,56 @@ class Package(RegisteredSubclassesBase):
             raise ImproperlyConfigured("Django is not enabled.")
         cls = self._workflow_manager_class()
         self.workflow_manager = cls(self, self.django.workflows)
+        self.executable_cache = self.configuration.executable_cache or self.django.executable_cache
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        SHA-256 hash of the contents of the package. For packages from the database,
+        it's the fingerprint of the package that was saved.
+
+        For local packages, it's computed on first use and kept for the lifetime of
+        the package object, since hashing all files is slow. Files changed afterwards,
+        for example tests generated into the package's directory, aren't reflected.
+        Load the package again to get the fingerprint of its current contents.
+        """
+        if self.is_from_db:
+            return self.django.fingerprint
+        if self._fingerprint is None:
+            self._fingerprint = self._compute_fingerprint()
+        return self._fingerprint
+
+    @property
+    def revision(self) -> str:
+        """
+        An opaque token, which changes whenever the contents of the package change.
+        It can be used as a key of caches built on top of the package. For local
+        packages, it's the fingerprint of the package, so it has the same limitations.
+        For packages from the database, it also includes the revision number, which the
+        Django handlers bump on every change.
+        """
+        if self.is_from_db:
+            return self.django.revision
+        return self.fingerprint
+
+    @instrumented("package.compute_fingerprint")
+    def _compute_fingerprint(self) -> str:
+        """
+        Compute the fingerprint of a local package. Archives are hashed as a whole,
+        directories are hashed file by file, skipping the cache of compiled executables.
+        """
+        if not os.path.isdir(self.file.path):
+            return get_file_hash(self.file.path)
+        sha = hashlib.sha256()
+        for dirpath, dirnames, filenames in os.walk(self.file.path):
+            if dirpath == self.file.path and ".cache" in dirnames:
+                dirnames.remove(".cache")
+            dirnames.sort()
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                relpath = os.path.relpath(path, self.file.path)
+                sha.update(f"{relpath}\0{get_file_hash(path)}\n".encode("utf-8"))
+        return sha.hexdigest()
 
     def _workflow_manager_class(self) -> Type[WorkflowManager]:
         return WorkflowManager
@@ -193,13 +251,36 @@ class Package(RegisteredSubclassesBase):
         return self.workflow_manager.get_unpack_operation(self.has_test_gen(), self.has_verify(), return_func)
 
     def get_run_operation(
-        self, program: File, tests: list[Test] | None = None, return_func: callable = None
+        self,
+        program: File,
+        tests: list[Test] | None = None,
+        return_func: callable = None,
+        chunk_size: int | None = None,
+        fail_fast: bool = False,
+        ordering: RunOrdering = RunOrdering.DEFAULT,
+        failure_counts: dict[str, int] | None = None,
     ) -> WorkflowOperation | None:
         """
         Get the run graph for the package. If the package doesn't have a
         run graph, it should return None.
-        """
-        return self.workflow_manager.get_run_operation(program, tests, return_func)
+
+        :param program: The program to run.
+        :param tests: The tests to run the program on. If None, all tests are used.
+        :param return_func: A function called with the results of each workflow.
+        :param chunk_size: If set, the run is split into workflows with at most this many tests each.
+        :param fail_fast: If True, the grade of a group is returned as soon as it's decided.
+        :param ordering: The order in which tests are executed.
+        :param failure_counts: A mapping of test IDs to the number of times the test failed in previous runs.
+        """
+        return self.workflow_manager.get_run_operation(
+            program,
+            tests,
+            return_func,
+            chunk_size=chunk_size,
+            fail_fast=fail_fast,
+            ordering=ordering,
+            failure_counts=failure_counts,
+        )
 
     def get_user_out_operation(
         self, program: File, test: Test, return_func: callable = None
@@ -219,6 +300,12 @@ class Package(RegisteredSubclassesBase):
         """
         return self.workflow_manager.get_test_run_operation(program, test, return_func)
 
+    def _get_executables_dir(self) -> str:
+        """
+        Get the directory with compiled executables of a local package.
+        """
+        return os.path.join(self.file.path, ".cache", "executables")
+
     def get_executable_path(self, program: File | str) -> str | None:
         """
         Get the executable path for a given program.
@@ -228,9 +315,53 @@ class Package(RegisteredSubclassesBase):
         else:
             if isinstance(program, File):
                 assert isinstance(program, LocalFile)
-                return os.path.join(self.file.path, ".cache", "executables", program.filename + ".e")
+                return os.path.join(self._get_executables_dir(), program.filename + ".e")
             else:
-                return os.path.join(self.file.path, ".cache", "executables", os.path.basename(program) + ".e")
+                return os.path.join(self._get_executables_dir(), os.path.basename(program) + ".e")
+
+    def get_executable_cache_key(self, program: File | str) -> str | None:
+        """
+        Get the key of the compiled executable of a given program. The key depends on the
+        contents of the program and of extra compilation files, the compiler and its flags.
+
+        :param program: The program (or the path to the program).
+        :return: The key or None, if it can't be computed.
+        """
+        try:
+            language = self.get_file_language(program)
+            compiler = self._get_compiler_full_name(language)
+            flags = self._get_compiler_flags(language)
+        except (KeyError, SIO3PackException):
+            return None
+        return get_executable_cache_key(program, self.get_extra_compilation_files(), compiler, flags)
+
+    def get_cached_executable_path(self, program: File | str) -> str | None:
+        """
+        Get the path to an up-to-date compiled executable of a given program.
+
+        :param program: The program (or the path to the program).
+        :return: The path to the executable or None, if the program has to be compiled.
+        """
+        key = self.get_executable_cache_key(program)
+        if key is None:
+            return None
+        return self.executable_cache.get(key)
+
+    def register_compiled_executable(self, program: File | str, exe_path: str = None):
+        """
+        Store the compiled executable of a given program in the executable cache.
+        Should be called after the compilation of the program finished successfully,
+        so that next workflows can skip compiling it.
+
+        :param program: The program (or the path to the program).
+        :param exe_path: The path to the compiled executable. Defaults to
+            :meth:`get_executable_path` of the program.
+        """
+        key = self.get_executable_cache_key(program)
+        exe_path = exe_path or self.get_executable_path(program)
+        if key is None or exe_path is None:
+            return
+        self.executable_cache.put(key, exe_path)
 
     def _get_compiler_full_name(self, lang: str) -> str:
         """
@@ -295,6 +426,12 @@ class Package(RegisteredSubclassesBase):
         """
         return self._get_compiler_flags("python")
 
+    def get_extra_compilation_files(self) -> list[File]:
+        """
+        Returns the list of files that are available during compilation of every program.
+        """
+        return []
+
     def get_file_language(self, file: File | str) -> str:
         """
         Returns the language of the given file.
@@ -18,3 +18,6 @@ DEFAULT_TIME_LIMIT = 30 * 1000  # 30 seconds
 
 # Default memory limit for programs
 DEFAULT_MEMORY_LIMIT = 100 * 1024 * 1024 * 1  # 100 MB
+
+# Number of run workflow skeletons (one per language and set of tests) cached by a package
+RUN_SKELETON_CACHE_SIZE = 8
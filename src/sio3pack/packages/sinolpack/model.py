@@ -7,6 +7,7 @@ from typing import Any, Type
 import yaml
 
 from sio3pack.files import File, LocalFile
+from sio3pack.instrumentation import instrumented, span
 from sio3pack.packages.exceptions import ImproperlyConfigured
 from sio3pack.packages.package import Package
 from sio3pack.packages.package.configuration import SIO3PackConfig
@@ -17,6 +18,7 @@ from sio3pack.test import Test
 from sio3pack.util import naturalsort_key
 from sio3pack.utils.archive import Archive, UnrecognizedArchiveFormat
 from sio3pack.workflow import Workflow, WorkflowManager, WorkflowOperation
+from sio3pack.workflow.validation import check_workflows
 
 
 class Sinolpack(Package):
@@ -119,9 +121,11 @@ class Sinolpack(Package):
 
         if os.path.exists(os.path.join(self.rootdir, "workflows.json")):
             try:
-                with open(os.path.join(self.rootdir, "workflows.json"), "r") as f:
-                    workflows = json.load(f)
-                self.workflow_manager = SinolpackWorkflowManager(self, workflows)
+                with span("sinolpack.load_workflows"):
+                    with open(os.path.join(self.rootdir, "workflows.json"), "r") as f:
+                        workflows = json.load(f)
+                    check_workflows(workflows)
+                    self.workflow_manager = SinolpackWorkflowManager(self, workflows)
             except json.JSONDecodeError as e:
                 raise ValueError(f"Invalid JSON in workflows.json: {e}")
         else:
@@ -176,6 +180,7 @@ class Sinolpack(Package):
         """
         return os.path.join(self.rootdir, "attachments")
 
+    @instrumented("sinolpack.process_package")
     def _process_package(self):
         self._process_config_yml()
         self._detect_full_name()
@@ -186,6 +191,7 @@ class Sinolpack(Package):
         self._process_attachments()
         self._process_existing_tests()
 
+    @instrumented("sinolpack.process_config_yml")
     def _process_config_yml(self):
         """
         Process the config.yml file. If it exists, it will be loaded into the config attribute.
@@ -196,6 +202,7 @@ class Sinolpack(Package):
         except FileNotFoundError:
             self.config = {}
 
+    @instrumented("sinolpack.detect_full_name")
     def _detect_full_name(self):
         """
         Sets the problem's full name from the ``config.yml`` (key ``title``)
@@ -226,6 +233,7 @@ class Sinolpack(Package):
             return self.full_name
         return self.lang_titles.get(lang, self.full_name)
 
+    @instrumented("sinolpack.detect_full_name_translations")
     def _detect_full_name_translations(self):
         """Creates problem's full name translations from the ``config.yml``
         (keys matching the pattern ``title_[a-z]{2}``, where ``[a-z]{2}`` represents
@@ -300,6 +308,7 @@ class Sinolpack(Package):
         """
         return ["ingen", "inwer", "soc", "chk"]
 
+    @instrumented("sinolpack.process_prog_files")
     def _process_prog_files(self):
         """
         Process all files in the problem's program directory that are used.
@@ -329,6 +338,7 @@ class Sinolpack(Package):
             except FileNotFoundError:
                 self.special_files[file] = None
 
+    @instrumented("sinolpack.process_extra_files")
     def _process_extra_files(self):
         """
         Process extra files from the config.yml file. The files are
@@ -363,6 +373,7 @@ class Sinolpack(Package):
         """
         return self.lang_statements.get(lang or "", None)
 
+    @instrumented("sinolpack.process_statements")
     def _process_statements(self):
         """
         Creates a problem statement from html or pdf source.
@@ -410,6 +421,7 @@ class Sinolpack(Package):
             except FileNotFoundError:
                 pass
 
+    @instrumented("sinolpack.process_attachments")
     def _process_attachments(self):
         """ """
         attachments_dir = self.get_attachments_dir()
@@ -449,6 +461,7 @@ class Sinolpack(Package):
             return match.group(2)
         raise ValueError(f"Invalid filename format: {filename}")
 
+    @instrumented("sinolpack.process_existing_tests")
     def _process_existing_tests(self):
         """
         Process pre-existing input and output tests.
@@ -521,9 +534,21 @@ class Sinolpack(Package):
     def get_ingen_path(self) -> str | None:
         return self._get_special_file_path("ingen")
 
+    def get_ingen_file(self) -> File | None:
+        """
+        Returns the ingen file.
+        """
+        return self.special_files["ingen"]
+
     def get_inwer_path(self) -> str | None:
         return self._get_special_file_path("inwer")
 
+    def get_inwer_file(self) -> File | None:
+        """
+        Returns the inwer file.
+        """
+        return self.special_files["inwer"]
+
     def get_checker_file(self) -> File | None:
         """
         Returns the checker file.
@@ -546,6 +571,7 @@ class Sinolpack(Package):
         # TODO: implement. The unpack will probably return tests, so we need to process them.
         pass
 
+    @instrumented("sinolpack.save_to_db")
     def save_to_db(self, problem_id: int):
         """
         Save the package to the database. If sio3pack isn't installed with Django
@@ -561,7 +587,7 @@ class Sinolpack(Package):
         Extends the compiler flags with the ones from the config.yml file.
         """
 
-        flags = super()._get_compiler_flags(lang)
+        flags = list(super()._get_compiler_flags(lang))
         if "extra_compilation_args" in self.config and lang in self.config["extra_compilation_args"]:
             config_flags = self.config["extra_compilation_args"][lang]
             if isinstance(config_flags, str):
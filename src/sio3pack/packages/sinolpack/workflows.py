@@ -1,16 +1,24 @@
+import functools
+import gc
+import io
 import os
+import pickle
+import threading
+from collections import OrderedDict
 from enum import Enum
 from typing import Any, Tuple
 
 from sio3pack import lua
 from sio3pack.exceptions import WorkflowCreationError
 from sio3pack.files import File
+from sio3pack.instrumentation import instrumented
 from sio3pack.packages.sinolpack import constants
-from sio3pack.test import Test
-from sio3pack.workflow import ExecutionTask, ScriptTask, Workflow, WorkflowManager, WorkflowOperation
+from sio3pack.test import RunOrdering, Test, order_tests
+from sio3pack.workflow import ExecutionTask, Object, ScriptTask, Workflow, WorkflowManager, WorkflowOperation
 from sio3pack.workflow.execution import MountNamespace, ObjectReadStream, ObjectWriteStream, Process, ResourceGroup
 from sio3pack.workflow.execution.filesystems import EmptyFilesystem, ImageFilesystem, ObjectFilesystem
 from sio3pack.workflow.execution.mount_namespace import Mountpoint
+from sio3pack.workflow.optimizations import eliminate_duplicate_tasks
 
 
 class UnpackStage(Enum):
@@ -21,21 +29,50 @@ class UnpackStage(Enum):
     FINISHED = 4
 
 
+# Handle of the solution's executable in skeletons of run workflows.
+_SKELETON_SOL_HANDLE = "<SOL_PATH>"
+
+
+class _SkeletonPickler(pickle.Pickler):
+    """
+    Pickles skeletons of run workflows, leaving out the solution's executable.
+    """
+
+    def persistent_id(self, obj):
+        if isinstance(obj, Object) and obj.handle == _SKELETON_SOL_HANDLE:
+            return _SKELETON_SOL_HANDLE
+        return None
+
+
+class _SkeletonUnpickler(pickle.Unpickler):
+    """
+    Unpickles skeletons of run workflows, putting the given object in place of the solution's executable.
+    """
+
+    def __init__(self, file, sol_obj: Object):
+        super().__init__(file)
+        self.sol_obj = sol_obj
+
+    def persistent_load(self, pid):
+        if pid == _SKELETON_SOL_HANDLE:
+            return self.sol_obj
+        raise pickle.UnpicklingError(f"Unknown persistent id {pid}")
+
+
 class SinolpackWorkflowManager(WorkflowManager):
     def __init__(self, package: "Sinolpack", workflows: dict[str, Any]):
         super().__init__(package, workflows)
-        self._has_ingen = False
-        self._has_outgen = False
-        self._has_inwer = False
-        self._sp_unpack_stage = UnpackStage.NONE
+        # Pickled run workflows without the solution, see :meth:`_get_run_skeleton`.
+        self._run_skeletons: OrderedDict[tuple, bytes] = OrderedDict()
+        self._run_skeletons_lock = threading.Lock()
 
-    def get_compile_file_workflow(self, file: File | str) -> tuple[Workflow, str]:
+    def get_compile_file_workflow(self, file: File | str, use_cache: bool = True) -> tuple[Workflow, str]:
         """
         Creates a workflow that compiles the given file and returns the path to the compiled file.
         The difference between this function and the base class is that this function
         adds the `extra_compilation_files` to the workflow.
         """
-        wf, exe_path = super().get_compile_file_workflow(file)
+        wf, exe_path = super().get_compile_file_workflow(file, use_cache)
         for task in wf.tasks:
             if isinstance(task, ExecutionTask):
                 for extra_file in self.package.get_extra_compilation_files():
@@ -55,15 +92,15 @@ class SinolpackWorkflowManager(WorkflowManager):
             "Run ingen",
             observable_registers=1,
         )
-        ingen_path = self.package.get_ingen_path()
-        if not ingen_path:
+        ingen_file = self.package.get_ingen_file()
+        if not ingen_file:
             raise WorkflowCreationError("Creating ingen workflow when no ingen present")
 
-        ingen = workflow.objects_manager.get_or_create_object(ingen_path)
+        ingen = workflow.objects_manager.get_or_create_object(ingen_file.path)
         workflow.add_external_object(ingen)
 
         # Compile ingen
-        compile_wf, ingen_exe_path = self.get_compile_file_workflow(ingen_path)
+        compile_wf, ingen_exe_path = self.get_compile_file_workflow(ingen_file)
         ingen_exe_obj = workflow.objects_manager.get_or_create_object(ingen_exe_path)
         workflow.union(compile_wf)
 
@@ -249,7 +286,8 @@ class SinolpackWorkflowManager(WorkflowManager):
         else:
             raise NotImplementedError(f"Default workflow for {name} not implemented.")
 
-    def _get_compile_files_workflows(self, data: dict) -> tuple[Workflow, bool]:
+    @instrumented("sinolpack.workflows.get_compile_files_workflows")
+    def _get_compile_files_workflows(self, data: dict, state: dict) -> tuple[Workflow, bool]:
         """
         Creates a workflow that compiles the checker, if it exists.
         """
@@ -257,7 +295,6 @@ class SinolpackWorkflowManager(WorkflowManager):
 
         # Get the workflow for compiling any extra files from package's workflow's config
         extra_wf = self.get("compile_extra")
-        print("xddd", extra_wf)
         if extra_wf is not None:
             to_replace = self._add_extra_files_to_replace(extra_wf, {})
             extra_wf.replace_templates(to_replace)
@@ -271,24 +308,29 @@ class SinolpackWorkflowManager(WorkflowManager):
         checker_obj = wf.objects_manager.get_or_create_object(checker.path)
         wf.add_external_object(checker_obj)
         compile_wf, exe_path = self.get_compile_file_workflow(checker)
-        exe_obj = wf.objects_manager.get_or_create_object(exe_path)
-        wf.add_observable_object(exe_obj)
+        if compile_wf.tasks:
+            # Only a freshly compiled checker has to be stored. A cached one is already there.
+            exe_obj = wf.objects_manager.get_or_create_object(exe_path)
+            wf.add_observable_object(exe_obj)
         wf.union(compile_wf)
+        # Extra files may include the checker, which shouldn't be compiled twice.
+        eliminate_duplicate_tasks(wf)
 
         return wf, True
 
-    def _get_generate_tests_workflows(self, data: dict) -> tuple[Workflow, bool]:
-        if self._sp_unpack_stage == UnpackStage.INGEN:
+    @instrumented("sinolpack.workflows.get_generate_tests_workflows")
+    def _get_generate_tests_workflows(self, data: dict, state: dict) -> tuple[Workflow, bool]:
+        if state["sinolpack_stage"] == UnpackStage.INGEN:
             workflow = self.get("ingen")
             last = False
-            if self._has_outgen:
-                self._sp_unpack_stage = UnpackStage.OUTGEN
-            elif self._has_inwer:
-                self._sp_unpack_stage = UnpackStage.INWER
+            if state["has_outgen"]:
+                state["sinolpack_stage"] = UnpackStage.OUTGEN
+            elif state["has_inwer"]:
+                state["sinolpack_stage"] = UnpackStage.INWER
             else:
                 last = True
             return workflow, last
-        elif self._sp_unpack_stage == UnpackStage.OUTGEN:
+        elif state["sinolpack_stage"] == UnpackStage.OUTGEN:
             data = data or {}
             tests_with_inputs = self.package.get_tests_with_inputs()
 
@@ -298,17 +340,18 @@ class SinolpackWorkflowManager(WorkflowManager):
             workflow = Workflow("Outgen tests", observable_registers=1)
 
             # Compile outgen
-            outgen_path = self.package.get_outgen_path()
-            if not outgen_path:
+            outgen_file = self.package.main_model_solution
+            if not outgen_file:
                 raise WorkflowCreationError("Creating outgen workflow when no model solution present")
-            outgen_obj = workflow.objects_manager.get_or_create_object(outgen_path)
+            outgen_obj = workflow.objects_manager.get_or_create_object(outgen_file.path)
             workflow.add_external_object(outgen_obj)
-            compile_wf, outgen_exe_path = self.get_compile_file_workflow(outgen_path)
+            compile_wf, outgen_exe_path = self.get_compile_file_workflow(outgen_file)
             workflow.objects_manager.get_or_create_object(outgen_exe_path)
             workflow.union(compile_wf)
 
             outgen_output_registers = {}
             script_input_regs = []
+            outgen_test_wfs = []
             for in_test in input_tests:
                 test_id = self.package.get_test_id_from_filename(os.path.basename(in_test))
                 out_test = self.package.get_corresponding_out_filename(os.path.basename(in_test))
@@ -331,7 +374,8 @@ class SinolpackWorkflowManager(WorkflowManager):
 
                 script_input_regs.append(f"r:outgen_res_{test_id}")
                 outgen_output_registers[test_id] = f"<r:outgen_res_{test_id}>"
-                workflow.union(outgen_test_wf)
+                outgen_test_wfs.append(outgen_test_wf)
+            workflow.union(*outgen_test_wfs)
 
             # Now, get a workflow that checks if all outgens successfully finished.
             verify_wf = self.get("verify_outgen")
@@ -431,7 +475,8 @@ class SinolpackWorkflowManager(WorkflowManager):
         workflow.add_task(script)
         return workflow
 
-    def _get_verify_workflows(self, data: dict) -> tuple[Workflow, bool]:
+    @instrumented("sinolpack.workflows.get_verify_workflows")
+    def _get_verify_workflows(self, data: dict, state: dict) -> tuple[Workflow, bool]:
         """
         Creates a workflow that runs inwer.
         """
@@ -439,17 +484,18 @@ class SinolpackWorkflowManager(WorkflowManager):
         workflow = Workflow("Inwer", observable_registers=1)
 
         # Compile inwer
-        inwer_path = self.package.get_inwer_path()
-        if not inwer_path:
+        inwer_file = self.package.get_inwer_file()
+        if not inwer_file:
             raise WorkflowCreationError("Creating inwer workflow when no inwer present")
-        inwer_obj = workflow.objects_manager.get_or_create_object(inwer_path)
+        inwer_obj = workflow.objects_manager.get_or_create_object(inwer_file.path)
         workflow.add_external_object(inwer_obj)
-        compile_wf, inwer_exe_path = self.get_compile_file_workflow(inwer_path)
+        compile_wf, inwer_exe_path = self.get_compile_file_workflow(inwer_file)
         workflow.objects_manager.get_or_create_object(inwer_exe_path)
         workflow.union(compile_wf)
 
         inwer_output_registers = {}
         script_input_regs = []
+        inwer_test_wfs = []
         for test in input_tests:
             test_id = test.test_id
             inwer_test_wf = self.get("inwer")
@@ -464,7 +510,8 @@ class SinolpackWorkflowManager(WorkflowManager):
             inwer_test_wf.replace_templates(to_replace)
             script_input_regs.append(f"r:inwer_res_{test_id}")
             inwer_output_registers[test_id] = f"<r:inwer_res_{test_id}>"
-            workflow.union(inwer_test_wf)
+            inwer_test_wfs.append(inwer_test_wf)
+        workflow.union(*inwer_test_wfs)
 
         # Now, get a workflow that checks if all inwer successfully finished.
         verify_wf = self.get("verify_inwer")
@@ -479,26 +526,53 @@ class SinolpackWorkflowManager(WorkflowManager):
         workflow.union(verify_wf)
         return workflow, True
 
+    def _get_unpack_state(self, state: dict) -> dict:
+        data = super()._get_unpack_state(state)
+        data.update(
+            {
+                "sinolpack_stage": state["sinolpack_stage"].name,
+                "has_ingen": state["has_ingen"],
+                "has_outgen": state["has_outgen"],
+                "has_inwer": state["has_inwer"],
+            }
+        )
+        return data
+
+    def _set_unpack_state(self, state: dict, data: dict):
+        super()._set_unpack_state(state, data)
+        state["sinolpack_stage"] = UnpackStage[data["sinolpack_stage"]]
+        state["has_ingen"] = data["has_ingen"]
+        state["has_outgen"] = data["has_outgen"]
+        state["has_inwer"] = data["has_inwer"]
+
+    def _get_unpack_programs(self) -> list[File]:
+        files = [
+            self.package.get_checker_file(),
+            self.package.get_ingen_file(),
+            self.package.main_model_solution,
+            self.package.get_inwer_file(),
+        ]
+        return [file for file in files if file is not None]
+
     def get_unpack_operation(
         self, has_ingen: bool, has_outgen: bool, has_inwer: bool, return_func: callable = None
     ) -> WorkflowOperation:
         """
         Get the unpack operation for the given data.
         """
-        self._has_ingen = has_ingen
-        self._has_outgen = has_outgen
-        self._has_inwer = has_inwer
-        if self._has_ingen:
-            self._sp_unpack_stage = UnpackStage.INGEN
-        elif self._has_outgen:
-            self._sp_unpack_stage = UnpackStage.OUTGEN
-        elif self._has_inwer:
-            self._sp_unpack_stage = UnpackStage.INWER
+        state = self._create_unpack_state(has_test_gen=(has_ingen or has_outgen), has_verify=has_inwer)
+        state.update({"has_ingen": has_ingen, "has_outgen": has_outgen, "has_inwer": has_inwer})
+        if has_ingen:
+            state["sinolpack_stage"] = UnpackStage.INGEN
+        elif has_outgen:
+            state["sinolpack_stage"] = UnpackStage.OUTGEN
+        elif has_inwer:
+            state["sinolpack_stage"] = UnpackStage.INWER
         else:
             # This will be handled by the base class, since there is no unpacking to do.
-            pass
+            state["sinolpack_stage"] = UnpackStage.NONE
         return super().get_unpack_operation(
-            has_test_gen=(has_ingen or has_outgen), has_verify=has_inwer, return_func=return_func
+            has_test_gen=(has_ingen or has_outgen), has_verify=has_inwer, return_func=return_func, state=state
         )
 
     def _add_extra_execution_files(self, workflow: Workflow, task: ExecutionTask) -> list[Mountpoint]:
@@ -681,6 +755,10 @@ class SinolpackWorkflowManager(WorkflowManager):
         - <INPUT_REGS> -- a list of input registers, that have grading
           results of the tests.
         - <GROUP_ID> -- a group ID of the tests.
+        - <LUA_LIST_TEST_IDS> -- a template for LUA scripts, that has a list
+          of test IDs in the order of <INPUT_REGS>.
+        - <FAIL_FAST> -- ``true`` if the script should return the group's grade
+          as soon as it's decided, ``false`` if it should wait for all tests.
         """
         workflow = Workflow(
             name="Grade group",
@@ -704,6 +782,11 @@ class SinolpackWorkflowManager(WorkflowManager):
         Used templates:
         - <LUA_MAP_TEST_ID_REG> -- a template for LUA scripts, that has
           a mapping of group IDs to registers.
+        - <LUA_MAP_GROUP_RESULTS> -- a template for LUA scripts, that has
+          a mapping of group IDs to grades of groups graded in other workflows
+          (used when the run is split into chunks).
+        - <LUA_LIST_GROUP_IDS> -- a template for LUA scripts, that has a list
+          of group IDs in the order of <INPUT_REGS>.
         - <INPUT_REGS> -- a list of input registers, that have grading
           results of the groups.
         """
@@ -721,110 +804,406 @@ class SinolpackWorkflowManager(WorkflowManager):
         workflow.add_task(script)
         return workflow
 
-    def _get_run_workflow(self, data: dict, program: File, tests: list[Test] | None = None) -> Tuple[Workflow, bool]:
-        if tests is None:
-            tests = self.package.tests
+    def _get_run_test_replacements(self, test: Test, exe_path: str) -> dict[str, str]:
+        to_replace = {
+            "<SOL_PATH>": exe_path,
+            "<TEST_ID>": test.test_id,
+        }
+        if test.in_file:
+            to_replace["<IN_TEST_PATH>"] = test.in_file.path
+        if test.out_file:
+            to_replace["<OUT_TEST_PATH>"] = test.out_file.path
+        return to_replace
 
-        workflow = Workflow(
-            name="Run solution",
+    def _get_run_test_limits(self, test: Test, language: str) -> tuple[int, int]:
+        return (
+            self.package.get_time_limit_for_test(test, language),
+            self.package.get_memory_limit_for_test(test, language),
         )
-        language = self.package.get_file_language(program)
 
-        # Compile the solution
-        program_obj = workflow.objects_manager.get_or_create_object(program.path)
-        workflow.add_external_object(program_obj)
-        compile_wf, exe_path = self.get_compile_file_workflow(program)
-        workflow.objects_manager.get_or_create_object(exe_path)
-        workflow.union(compile_wf)
+    def _get_run_test_instance(self, test: Test, exe_path: str, language: str) -> Workflow:
+        """
+        Get the ``run_test`` workflow with templates replaced for the given test
+        and with limits of the solution set for the test.
+        """
+        run_test_wf = self.get("run_test")
+        to_replace = self._add_extra_files_to_replace(run_test_wf, self._get_run_test_replacements(test, exe_path))
+        run_test_wf.replace_templates(to_replace)
+
+        # Find the task which executes the solution and fix the resource group
+        time_limit, memory_limit = self._get_run_test_limits(test, language)
+        for task in run_test_wf.tasks:
+            if isinstance(task, ExecutionTask) and task.name == f"Run solution for test {test.test_id}":
+                for process in task.processes:
+                    process.resource_group.set_limits(100, time_limit * 1e9, memory_limit, time_limit)
+        return run_test_wf
+
+    def _get_grade_group_instance(
+        self,
+        group: str,
+        tests: list[Test],
+        observable: bool = False,
+        fail_fast: bool = False,
+    ) -> tuple[Workflow, str]:
+        """
+        Get the ``grade_group`` workflow with templates replaced for the given group.
+        Returns a tuple of the workflow and the register with the group's grade.
+
+        :param group: The group ID.
+        :param tests: Tests in the group.
+        :param observable: Whether the group's grade should be in an observable register.
+        :param fail_fast: Whether the grading script should return the group's grade as soon
+            as it's decided, without waiting for the remaining tests of the group.
+        """
+        grade_group_wf = self.get("grade_group")
+        to_replace = self._add_extra_files_to_replace(
+            grade_group_wf,
+            {
+                "<LUA_MAP_TEST_ID_REG>": lua.to_lua_map(
+                    {test.test_id: f"<r:grade_res_{test.test_id}>" for test in tests}
+                ),
+                "<LUA_LIST_TEST_IDS>": lua.to_lua_value([test.test_id for test in tests]),
+                "<FAIL_FAST>": "true" if fail_fast else "false",
+                "<INPUT_REGS>": [f"r:grade_res_{test.test_id}" for test in tests],
+                "<GROUP_ID>": group,
+            },
+        )
+        grade_group_wf.replace_templates(to_replace)
+
+        register = f"r:group_grade_res_{group}"
+        if observable:
+            grade_group_wf.replace_templates({register: f"obsreg:group_grade_res_{group}"})
+            register = f"obsreg:group_grade_res_{group}"
+        return grade_group_wf, register
+
+    def _get_grade_run_instance(
+        self, group_registers: dict[str, str], group_results: dict[str, Any] | None = None
+    ) -> Workflow:
+        """
+        Get the ``grade_run`` workflow with templates replaced.
+
+        :param group_registers: A mapping of group IDs to registers with their grades.
+        :param group_results: A mapping of group IDs to grades of groups graded in
+            other workflows of the operation.
+        """
+        grade_run_wf = self.get("grade_run")
+        to_replace = self._add_extra_files_to_replace(
+            grade_run_wf,
+            {
+                "<LUA_MAP_TEST_ID_REG>": lua.to_lua_map(
+                    {group: f"<{register}>" for group, register in group_registers.items()}
+                ),
+                "<LUA_MAP_GROUP_RESULTS>": lua.to_lua_map(group_results or {}),
+                "<LUA_LIST_GROUP_IDS>": lua.to_lua_value(list(group_registers)),
+                "<INPUT_REGS>": list(group_registers.values()),
+            },
+        )
+        grade_run_wf.replace_templates(to_replace)
+        return grade_run_wf
 
+    def _get_run_groups(self, tests: list[Test]) -> dict[str, list[Test]]:
         groups = {}
         for test in tests:
             if test.group not in groups:
                 groups[test.group] = []
             groups[test.group].append(test)
+        return groups
 
+    def _add_checker_to_run_workflow(self, workflow: Workflow):
         checker_path = self.package.get_checker_path()
         if checker_path is not None:
             checker_exe_path = self.package.get_executable_path(checker_path)
             checker_obj = workflow.objects_manager.get_or_create_object(checker_exe_path)
             workflow.add_external_object(checker_obj)
 
-        output_registers = []
-        output_registers_map = {}
-        for group, tests in groups.items():
-            group_out_registers = []
-            group_out_registers_map = {}
-
-            # Run the solution for each test in the group and grade it.
-            for test in tests:
-                test_id = test.test_id
-                run_test_wf = self.get("run_test")
-                group_out_registers.append(f"r:grade_res_{test_id}")
-                group_out_registers_map[test_id] = f"<r:grade_res_{test_id}>"
-                to_replace = self._add_extra_files_to_replace(
-                    run_test_wf,
-                    {
-                        "<SOL_PATH>": exe_path,
-                        "<TEST_ID>": test_id,
-                    },
+    def _add_tests_to_run_workflow(
+        self,
+        workflow: Workflow,
+        tests: list[Test],
+        exe_path: str,
+        language: str,
+        observable: bool = False,
+        fail_fast: bool = False,
+    ) -> dict[str, str]:
+        """
+        Add running the solution on the tests and grading their groups to the workflow.
+        Tests are added in the given order and each group is graded right after
+        its last test. Returns a mapping of group IDs to registers with their grades.
+        """
+        groups = self._get_run_groups(tests)
+        remaining = {group: len(group_tests) for group, group_tests in groups.items()}
+        group_registers = {}
+        # All parts are merged at once, since merging them one by one is quadratic.
+        parts = []
+        for test in tests:
+            # Run the solution for the test and grade it.
+            parts.append(self._get_run_test_instance(test, exe_path, language))
+
+            # After the last test of the group, run the grading script for the group.
+            remaining[test.group] -= 1
+            if remaining[test.group] == 0:
+                grade_group_wf, group_registers[test.group] = self._get_grade_group_instance(
+                    test.group, groups[test.group], observable=observable, fail_fast=fail_fast
                 )
-                if test.in_file:
-                    to_replace["<IN_TEST_PATH>"] = test.in_file.path
-                if test.out_file:
-                    to_replace["<OUT_TEST_PATH>"] = test.out_file.path
-                run_test_wf.replace_templates(to_replace)
-
-                # Find the task which executes the solution and fix the resource group
-                time_limit = self.package.get_time_limit_for_test(test, language)
-                memory_limit = self.package.get_memory_limit_for_test(test, language)
-                for task in run_test_wf.tasks:
-                    if isinstance(task, ExecutionTask) and task.name == f"Run solution for test {test_id}":
-                        for process in task.processes:
-                            process.resource_group.set_limits(100, time_limit * 1e9, memory_limit, time_limit)
-
-                workflow.union(run_test_wf)
-
-            # Now, run the grading script for the group.
-            grade_group_wf = self.get("grade_group")
-            to_replace = self._add_extra_files_to_replace(
-                grade_group_wf,
-                {
-                    "<LUA_MAP_TEST_ID_REG>": lua.to_lua_map(group_out_registers_map),
-                    "<INPUT_REGS>": group_out_registers,
-                    "<GROUP_ID>": group,
-                },
-            )
-            grade_group_wf.replace_templates(to_replace)
+                parts.append(grade_group_wf)
+        workflow.union(*parts)
+        # Tests use mostly identical filesystems, mount namespaces and resource groups.
+        workflow.share_components()
+        return group_registers
+
+    def clear_run_skeletons(self):
+        """
+        Forget all cached skeletons of run workflows.
+        """
+        with self._run_skeletons_lock:
+            self._run_skeletons.clear()
 
-            workflow.union(grade_group_wf)
-            output_registers.append(f"r:group_grade_res_{group}")
-            output_registers_map[group] = f"<r:group_grade_res_{group}>"
+    @instrumented("sinolpack.workflows.get_run_skeleton")
+    def _get_run_skeleton(self, tests: list[Test], language: str, fail_fast: bool = False) -> bytes:
+        """
+        Get the part of the run workflow that doesn't depend on the solution: running
+        the tests, checking and grading them. The skeleton is pickled without the object
+        of the solution's executable, so that a copy for a submission can be made with
+        :meth:`_instantiate_run_skeleton` by unpickling it, which is much faster than
+        building the workflow again.
+
+        Skeletons are built once for each revision of the package, language and list of tests.
+        Tests are identified by their IDs, groups and paths of their files, so regrouped
+        or moved tests get their own skeletons.
+
+        :param tests: The tests, in the order of execution.
+        :param language: The language of the solution.
+        :param fail_fast: Whether group grading scripts return grades of groups as soon as they're decided.
+        """
+        # The revision of local packages is their fingerprint, so changed files on disk aren't reused.
+        tests_key = tuple(
+            (
+                test.test_id,
+                test.group,
+                test.in_file.path if test.in_file else None,
+                test.out_file.path if test.out_file else None,
+            )
+            for test in tests
+        )
+        key = (self.package.revision, language, tests_key, fail_fast)
+        with self._run_skeletons_lock:
+            if key in self._run_skeletons:
+                self._run_skeletons.move_to_end(key)
+                return self._run_skeletons[key]
 
+        skeleton = Workflow(
+            name="Run solution",
+        )
+        self._add_checker_to_run_workflow(skeleton)
+        group_registers = self._add_tests_to_run_workflow(
+            skeleton, tests, _SKELETON_SOL_HANDLE, language, fail_fast=fail_fast
+        )
         # Finally, add the script that grades the whole solution.
-        grade_run_wf = self.get("grade_run")
-        to_replace = self._add_extra_files_to_replace(
-            grade_run_wf,
-            {
-                "<LUA_MAP_TEST_ID_REG>": lua.to_lua_map(output_registers_map),
-                "<INPUT_REGS>": output_registers,
-            },
+        skeleton.union(self._get_grade_run_instance(group_registers))
+        buffer = io.BytesIO()
+        _SkeletonPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(skeleton)
+        pickled = buffer.getvalue()
+
+        with self._run_skeletons_lock:
+            self._run_skeletons[key] = pickled
+            while len(self._run_skeletons) > constants.RUN_SKELETON_CACHE_SIZE:
+                self._run_skeletons.popitem(last=False)
+        return pickled
+
+    @instrumented("sinolpack.workflows.instantiate_run_skeleton")
+    def _instantiate_run_skeleton(self, skeleton: bytes, exe_obj: Object) -> Workflow:
+        """
+        Make a copy of a skeleton returned by :meth:`_get_run_skeleton` with the given
+        object of the solution's executable.
+        """
+        # Unpickling creates a lot of objects, which would trigger many useless garbage collections.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return _SkeletonUnpickler(io.BytesIO(skeleton), exe_obj).load()
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    @instrumented("sinolpack.workflows.get_run_workflow")
+    def _get_run_workflow(
+        self,
+        data: dict,
+        program: File,
+        tests: list[Test] | None = None,
+        fail_fast: bool = False,
+        ordering: RunOrdering = RunOrdering.DEFAULT,
+        failure_counts: dict[str, int] | None = None,
+    ) -> Tuple[Workflow, bool]:
+        workflow = Workflow(
+            name="Run solution",
         )
-        grade_run_wf.replace_templates(to_replace)
-        workflow.union(grade_run_wf)
+        language = self.package.get_file_language(program)
+
+        # Compile the solution
+        program_obj = workflow.objects_manager.get_or_create_object(program.path)
+        workflow.add_external_object(program_obj)
+        compile_wf, exe_path = self.get_compile_file_workflow(program)
+        exe_obj = workflow.objects_manager.get_or_create_object(exe_path)
+
+        # Running and grading the tests doesn't depend on the solution, so it's
+        # copied from the cached skeleton.
+        tests = order_tests(self.package.tests if tests is None else tests, ordering, failure_counts)
+        skeleton = self._get_run_skeleton(tests, language, fail_fast=fail_fast)
+        workflow.union(compile_wf, self._instantiate_run_skeleton(skeleton, exe_obj))
+        return workflow, True
+
+    def _get_run_chunks(self, groups: dict[str, list[Test]], chunk_size: int) -> list[list[str]]:
+        """
+        Split groups into chunks of at most ``chunk_size`` tests. Groups are never
+        split, so a group bigger than ``chunk_size`` is a chunk on its own.
+        """
+        chunks = []
+        current = []
+        current_size = 0
+        for group, group_tests in groups.items():
+            if current and current_size + len(group_tests) > chunk_size:
+                chunks.append(current)
+                current = []
+                current_size = 0
+            current.append(group)
+            current_size += len(group_tests)
+        if current:
+            chunks.append(current)
+        return chunks
+
+    @instrumented("sinolpack.workflows.get_chunked_run_workflow")
+    def _get_chunked_run_workflow(
+        self,
+        data: dict,
+        program: File,
+        tests: list[Test] | None,
+        chunk_size: int,
+        state: dict,
+        fail_fast: bool = False,
+        ordering: RunOrdering = RunOrdering.DEFAULT,
+        failure_counts: dict[str, int] | None = None,
+    ) -> Tuple[Workflow, bool]:
+        """
+        Creates the next workflow of a chunked run. The first workflow compiles the
+        solution (it's skipped if the executable is cached), then there is one workflow
+        for each chunk of groups, which makes the grades of its groups observable.
+        The last workflow grades the whole run using the returned grades of all groups,
+        so results of all chunks must be returned before it is requested. Chunk
+        workflows don't depend on each other, so they can be run concurrently.
+        """
+        if "chunks" not in state:
+            # Groups are ordered by their first test, so that chunks with prioritized tests go first.
+            state["tests"] = order_tests(self.package.tests if tests is None else tests, ordering, failure_counts)
+            state["groups"] = self._get_run_groups(state["tests"])
+            state["chunks"] = self._get_run_chunks(state["groups"], chunk_size)
+            state["compiled"] = False
+            state["next_chunk"] = 0
+
+        if not state["compiled"]:
+            state["compiled"] = True
+            compile_wf, exe_path = self.get_compile_file_workflow(program)
+            state["exe_path"] = exe_path
+            if compile_wf.tasks:
+                workflow = Workflow(
+                    name="Compile solution",
+                )
+                program_obj = workflow.objects_manager.get_or_create_object(program.path)
+                workflow.add_external_object(program_obj)
+                workflow.add_observable_object(workflow.objects_manager.get_or_create_object(exe_path))
+                workflow.union(compile_wf)
+                return workflow, False
+
+        chunks = state["chunks"]
+        if state["next_chunk"] < len(chunks):
+            chunk_id = state["next_chunk"]
+            state["next_chunk"] += 1
+            workflow = Workflow(
+                name=f"Run solution (chunk {chunk_id + 1} of {len(chunks)})",
+            )
+            language = self.package.get_file_language(program)
+            exe_path = state["exe_path"]
+            workflow.add_external_object(workflow.objects_manager.get_or_create_object(exe_path))
+            self._add_checker_to_run_workflow(workflow)
+            chunk_groups = set(chunks[chunk_id])
+            chunk_tests = [test for test in state["tests"] if test.group in chunk_groups]
+            self._add_tests_to_run_workflow(
+                workflow, chunk_tests, exe_path, language, observable=True, fail_fast=fail_fast
+            )
+            return workflow, False
+
+        # All chunks were created, grade the run with the grades returned by the chunks.
+        data = data or {}
+        group_results = {}
+        missing = []
+        for group in state["groups"]:
+            register = f"obsreg:group_grade_res_{group}"
+            if register in data:
+                group_results[group] = data[register]
+            else:
+                missing.append(group)
+        if missing:
+            raise WorkflowCreationError(f"Results for groups {', '.join(missing)} were not returned.")
+
+        workflow = Workflow(
+            name="Grade run",
+        )
+        workflow.union(self._get_grade_run_instance({}, group_results))
         return workflow, True
 
     def get_run_operation(
-        self, program: File, tests: list[Test] | None = None, return_func: callable = None
+        self,
+        program: File,
+        tests: list[Test] | None = None,
+        return_func: callable = None,
+        chunk_size: int | None = None,
+        fail_fast: bool = False,
+        ordering: RunOrdering = RunOrdering.DEFAULT,
+        failure_counts: dict[str, int] | None = None,
     ) -> WorkflowOperation:
         """
         Get the run operation for the given data.
+
+        :param program: The program to run.
+        :param tests: The tests to run the program on. If None, all tests are used.
+        :param return_func: A function called with the results of each workflow.
+        :param chunk_size: If set, the run is split into workflows with at most this many
+            tests each (groups are never split), so that huge runs can be spread across workers.
+        :param fail_fast: If True, group grading scripts return the grade of a group as soon as
+            it's decided (after the first test which scores 0), without waiting for the remaining
+            tests of the group. The remaining tests aren't cancelled, but nothing waits for them.
+        :param ordering: The order in which tests are executed. Groups are graded as soon as
+            all their tests are executed.
+        :param failure_counts: A mapping of test IDs to the number of times the test failed
+            in previous runs. Used with :attr:`RunOrdering.FAILING_FIRST`.
         """
+        if chunk_size is None:
+            return WorkflowOperation(
+                self._get_run_workflow,
+                return_results=(return_func is not None),
+                return_results_func=return_func,
+                on_results=functools.partial(self.register_compiled_executables, programs=[program]),
+                program=program,
+                tests=tests,
+                fail_fast=fail_fast,
+                ordering=ordering,
+                failure_counts=failure_counts,
+            )
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be positive.")
         return WorkflowOperation(
-            self._get_run_workflow,
+            self._get_chunked_run_workflow,
             return_results=(return_func is not None),
             return_results_func=return_func,
+            on_results=functools.partial(self.register_compiled_executables, programs=[program]),
+            collect_results=True,
             program=program,
             tests=tests,
+            chunk_size=chunk_size,
+            state={},
+            fail_fast=fail_fast,
+            ordering=ordering,
+            failure_counts=failure_counts,
         )
 
     def _get_default_user_out_workflow(self) -> Workflow:
@@ -888,6 +1267,7 @@ class SinolpackWorkflowManager(WorkflowManager):
         wf.add_task(exec_run)
         return wf
 
+    @instrumented("sinolpack.workflows.get_user_out_workflow")
     def _get_user_out_workflow(self, data: dict, program: File, test: Test) -> Tuple[Workflow, bool]:
         workflow = Workflow(
             name="Generate user out for test",
@@ -926,6 +1306,7 @@ class SinolpackWorkflowManager(WorkflowManager):
             self._get_user_out_workflow,
             return_results=(return_func is not None),
             return_results_func=return_func,
+            on_results=functools.partial(self.register_compiled_executables, programs=[program]),
             program=program,
             test=test,
         )
@@ -991,6 +1372,7 @@ class SinolpackWorkflowManager(WorkflowManager):
         wf.add_task(exec_run)
         return wf
 
+    @instrumented("sinolpack.workflows.get_test_run_workflow")
     def _get_test_run_workflow(self, data: dict, program: File, test: File) -> Tuple[Workflow, bool]:
         workflow = Workflow(
             name="Test run",
@@ -1028,6 +1410,7 @@ class SinolpackWorkflowManager(WorkflowManager):
             self._get_test_run_workflow,
             return_results=(return_func is not None),
             return_results_func=return_func,
+            on_results=functools.partial(self.register_compiled_executables, programs=[program]),
             program=program,
             test=test,
         )
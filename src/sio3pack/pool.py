@@ -0,0 +1,202 @@
+"""
+A process-wide pool of packages loaded from the database.
+
+Loading a package from the database identifies its type, sets up the Django handler
+and parses all of its workflows, which is too slow to do on every request. The pool
+keeps recently used packages in memory, keyed by the problem ID, the revision of
+the package and the configuration it was loaded with. Entries are evicted when the pool
+is full (least recently used first), when they are older than the pool's TTL, or when
+the package is saved to the database again. Saving only evicts entries in the process
+which saved the package, so packages requested without a revision are also checked
+against the revision stored in the database, which is a single cheap query.
+
+Packages in the pool are shared between threads, so they should be treated as read-only.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from sio3pack.packages.package import Package
+from sio3pack.packages.package.configuration import SIO3PackConfig
+
+
+class PackagePool:
+    """
+    A bounded, thread-safe LRU cache of packages loaded from the database.
+
+    :param int max_size: The maximum number of packages in the pool.
+    :param float ttl: The number of seconds after which a package is loaded again. None means no expiry.
+    :param loader: A function loading the package, called with the problem ID and the configuration.
+        Defaults to :func:`sio3pack.from_db`.
+    :param revision_loader: A function returning the stored revision of a problem, called with the
+        problem ID when a package is requested without a revision. Pooled packages loaded at another
+        revision are loaded again. Defaults to reading the revision from the database if the default
+        loader is used, otherwise the revision isn't checked.
+    :param clock: A function returning the current time in seconds.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 128,
+        ttl: float | None = 300.0,
+        loader: Callable[[int, SIO3PackConfig | None], Package] = None,
+        revision_loader: Callable[[int], Hashable] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param max_size: The maximum number of packages in the pool.
+        :param ttl: The number of seconds after which a package is loaded again. None means no expiry.
+        :param loader: A function loading the package, called with the problem ID and the configuration.
+            Defaults to :func:`sio3pack.from_db`.
+        :param revision_loader: A function returning the stored revision of a problem. Defaults to
+            reading the revision from the database if the default loader is used.
+        :param clock: A function returning the current time in seconds.
+        """
+        if max_size < 1:
+            raise ValueError(f"Pool size must be positive, got {max_size}")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.loader = loader
+        self.revision_loader = revision_loader
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, tuple[float, Hashable, Package]] = OrderedDict()
+        self._loading: dict[tuple, threading.Lock] = {}
+
+    def _load(self, problem_id: int, configuration: SIO3PackConfig | None) -> Package:
+        if self.loader is not None:
+            return self.loader(problem_id, configuration)
+        import sio3pack
+
+        return sio3pack.from_db(problem_id, configuration)
+
+    def _load_revision(self, problem_id: int) -> Hashable:
+        if self.revision_loader is not None:
+            return self.revision_loader(problem_id)
+        if self.loader is not None:
+            return None
+        from sio3pack.django.common.models import SIO3Package
+
+        return SIO3Package.objects.filter(problem_id=problem_id).values_list("revision", flat=True).first()
+
+    def _lookup(self, key: tuple, stored_revision: Hashable = None) -> Package | None:
+        # Must be called with the lock held.
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        loaded_at, loaded_revision, package = entry
+        if self.ttl is not None and self.clock() - loaded_at >= self.ttl:
+            del self._entries[key]
+            return None
+        if stored_revision is not None and loaded_revision != stored_revision:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return package
+
+    def get(self, problem_id: int, revision: Hashable = None, configuration: SIO3PackConfig = None) -> Package:
+        """
+        Get the package for the given problem, loading it from the database if it's
+        not in the pool. Concurrent requests for the same missing package load it once.
+
+        :param problem_id: The problem ID.
+        :param revision: The revision of the package. Packages of different revisions are separate entries.
+            If not given, the pooled package is loaded again if the stored revision has changed.
+        :param configuration: Configuration used when the package is loaded. Packages loaded with
+            different configurations are separate entries.
+        :return: The package object.
+        """
+        key = (problem_id, revision, configuration)
+        stored_revision = self._load_revision(problem_id) if revision is None else None
+        with self._lock:
+            package = self._lookup(key, stored_revision)
+            if package is not None:
+                self.hits += 1
+                return package
+            loading = self._loading.setdefault(key, threading.Lock())
+
+        with loading:
+            with self._lock:
+                package = self._lookup(key, stored_revision)
+                if package is not None:
+                    self.hits += 1
+                    return package
+                self.misses += 1
+            try:
+                package = self._load(problem_id, configuration)
+            finally:
+                with self._lock:
+                    if self._loading.get(key) is loading:
+                        del self._loading[key]
+            with self._lock:
+                self._entries[key] = (self.clock(), stored_revision, package)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+            return package
+
+    def invalidate(self, problem_id: int, revision: Hashable = None):
+        """
+        Remove the package for the given problem from the pool, loaded with any
+        configuration. If no revision is given, all revisions of the problem are removed.
+
+        :param problem_id: The problem ID.
+        :param revision: The revision of the package.
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] == problem_id and (revision is None or key[1] == revision):
+                    del self._entries[key]
+
+    def clear(self):
+        """
+        Remove all packages from the pool.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key: int | tuple) -> bool:
+        # Keys are problem IDs or tuples of the problem ID, the revision and the configuration.
+        if not isinstance(key, tuple):
+            key = (key,)
+        key = key + (None,) * (3 - len(key))
+        with self._lock:
+            return self._lookup(key) is not None
+
+    def to_json(self) -> dict[str, Any]:
+        """
+        Get statistics of the pool.
+        """
+        with self._lock:
+            return {"size": len(self._entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+
+_pool = PackagePool()
+
+
+def get_package_pool() -> PackagePool:
+    """
+    Get the process-wide package pool.
+    """
+    return _pool
+
+
+def set_package_pool(pool: PackagePool) -> PackagePool:
+    """
+    Set the process-wide package pool.
+
+    :param pool: The new pool.
+    :return: The previous pool.
+    """
+    global _pool
+    previous = _pool
+    _pool = pool
+    return previous
@@ -1 +1,3 @@
+from sio3pack.test.ordering import RunOrdering, order_tests
+from sio3pack.test.results import GroupResult, RunResults, TestResult
 from sio3pack.test.test import Test
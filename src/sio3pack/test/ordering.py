@@ -0,0 +1,58 @@
+from enum import Enum
+
+from sio3pack.test.test import Test
+
+
+class RunOrdering(Enum):
+    """
+    Order in which tests are executed in run workflows.
+    """
+
+    # Tests in the order of the package.
+    DEFAULT = "default"
+    # Tests with smaller input files first.
+    SMALLEST_INPUT_FIRST = "smallest_input_first"
+    # Tests that failed most often in previous runs first.
+    FAILING_FIRST = "failing_first"
+    # The first test of each group first, then the remaining tests.
+    ONE_PER_GROUP_FIRST = "one_per_group_first"
+
+
+def _get_input_size(test: Test) -> float:
+    if test.in_file is None:
+        return float("inf")
+    try:
+        return test.in_file.size()
+    except (OSError, NotImplementedError):
+        return float("inf")
+
+
+def order_tests(
+    tests: list[Test], ordering: RunOrdering = RunOrdering.DEFAULT, failure_counts: dict[str, int] | None = None
+) -> list[Test]:
+    """
+    Order tests with the given heuristic. The ordering is stable, so tests that
+    the heuristic doesn't distinguish keep their order.
+
+    :param tests: The tests to order.
+    :param ordering: The heuristic to use.
+    :param failure_counts: A mapping of test IDs to the number of times the test
+        failed in previous runs. Used by :attr:`RunOrdering.FAILING_FIRST`.
+    :return: A new list with ordered tests.
+    """
+    if ordering == RunOrdering.SMALLEST_INPUT_FIRST:
+        return sorted(tests, key=_get_input_size)
+    elif ordering == RunOrdering.FAILING_FIRST:
+        failure_counts = failure_counts or {}
+        return sorted(tests, key=lambda test: -failure_counts.get(test.test_id, 0))
+    elif ordering == RunOrdering.ONE_PER_GROUP_FIRST:
+        first, rest = [], []
+        seen_groups = set()
+        for test in tests:
+            if test.group in seen_groups:
+                rest.append(test)
+            else:
+                seen_groups.add(test.group)
+                first.append(test)
+        return first + rest
+    return list(tests)
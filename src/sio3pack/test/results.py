@@ -0,0 +1,268 @@
+from typing import Any
+
+from sio3pack.test.test import Test
+from sio3pack.workflow.register_map import RegisterMap
+
+#: Prefix of registers with grades of tests.
+TEST_REGISTER_PREFIX = "r:grade_res_"
+#: Prefixes of registers with grades of groups. Grades of groups are observable in chunked runs.
+GROUP_REGISTER_PREFIXES = ("r:group_grade_res_", "obsreg:group_grade_res_")
+#: The register with the grade of the whole run.
+RUN_REGISTER = "obsreg:result"
+
+
+def _get_status(value: Any) -> str | None:
+    if isinstance(value, dict):
+        return value.get("status")
+    if isinstance(value, str):
+        return value
+    return None
+
+
+def _get_score(value: Any) -> float | None:
+    if isinstance(value, dict):
+        score = value.get("score")
+        if score is not None:
+            return score
+    status = _get_status(value)
+    if status is None:
+        return None
+    return 100 if status == "OK" else 0
+
+
+class TestResult:
+    """
+    The result of running a solution on a test.
+
+    :param str test_id: The ID of the test.
+    :param str group: The group of the test.
+    :param str status: The status of the test, for example ``OK`` or ``WA``.
+    :param float score: The score of the test, in percent of the group's score.
+    :param Any value: The value of the test's grade register, as returned by the worker.
+    """
+
+    __test__ = False
+
+    def __init__(self, test_id: str, group: str, value: Any):
+        self.test_id = test_id
+        self.group = group
+        self.value = value
+        self.status = _get_status(value)
+        self.score = _get_score(value)
+
+    def to_json(self) -> dict:
+        return {"test_id": self.test_id, "group": self.group, "status": self.status, "score": self.score}
+
+
+class GroupResult:
+    """
+    The running result of a group of tests. The score of a group is decided by its
+    worst test, so it's the minimum of the scores of tests received so far, until
+    the grade of the whole group is received.
+
+    :param str group: The ID of the group.
+    :param int num_tests: The number of tests in the group.
+    :param float max_score: The number of points for the whole group.
+    :param dict[str, TestResult] tests: Results of tests received so far.
+    :param str status: The status of the group: ``OK`` or the status of its worst test.
+    :param float score: The score of the group, in percent.
+    :param bool graded: Whether the grade of the whole group was received.
+    """
+
+    def __init__(self, group: str, num_tests: int, max_score: float):
+        self.group = group
+        self.num_tests = num_tests
+        self.max_score = max_score
+        self.tests: dict[str, TestResult] = {}
+        self.status = None
+        self.score = None
+        self.graded = False
+
+    @property
+    def finished(self) -> bool:
+        """
+        Whether the result of the group is final.
+        """
+        return self.graded or len(self.tests) == self.num_tests
+
+    @property
+    def points(self) -> float:
+        """
+        The number of points for the group so far.
+        """
+        return 0 if self.score is None else self.max_score * self.score / 100
+
+    def _add_test(self, result: TestResult):
+        self.tests[result.test_id] = result
+        if self.graded or result.score is None:
+            return
+        if self.score is None or result.score < self.score:
+            self.score = result.score
+            self.status = result.status
+        elif self.status is None:
+            self.status = result.status
+
+    def _set_grade(self, value: Any):
+        self.graded = True
+        self.status = _get_status(value)
+        self.score = _get_score(value)
+
+    def to_json(self) -> dict:
+        return {
+            "group": self.group,
+            "status": self.status,
+            "score": self.score,
+            "points": self.points,
+            "max_score": self.max_score,
+            "finished": self.finished,
+            "tests": {test_id: result.to_json() for test_id, result in self.tests.items()},
+        }
+
+
+class RunResults:
+    """
+    Incrementally collects results of a run operation. Values of registers can be added
+    one by one as workers report them, and the scores of groups and the total score
+    are updated as they arrive, so partial results can be shown before the run ends.
+
+    Registers can be given by name or by number. Numbers are mapped back to names with
+    the register map of the workflow (see :meth:`sio3pack.workflow.Workflow.get_register_map`).
+    Registers other than grades of tests, groups and the run are ignored.
+
+    :meth:`return_results` can be used as ``return_func`` of the run operation.
+
+    :param list[Test] tests: The tests of the run.
+    :param dict[str, float] max_scores: The number of points for each group. Groups which
+        aren't in the mapping are worth 100 points.
+    :param RegisterMap register_map: The register map of the workflow, if registers
+        are given by numbers.
+    """
+
+    def __init__(self, tests: list[Test], max_scores: dict[str, float] = None, register_map: RegisterMap = None):
+        """
+        :param tests: The tests of the run.
+        :param max_scores: The number of points for each group.
+        :param register_map: The register map of the workflow.
+        """
+        max_scores = max_scores or {}
+        self.groups: dict[str, GroupResult] = {}
+        self._test_groups: dict[str, str] = {}
+        for test in tests:
+            if test.group not in self.groups:
+                self.groups[test.group] = GroupResult(test.group, 0, max_scores.get(test.group, 100))
+            self.groups[test.group].num_tests += 1
+            self._test_groups[test.test_id] = test.group
+        self.points = 0
+        self.result = None
+        self.register_map = RegisterMap({})
+        if register_map is not None:
+            self.set_register_map(register_map)
+
+    def set_register_map(self, register_map: RegisterMap | dict[str, int]):
+        """
+        Set the register map used to map numbers of registers to names.
+
+        :param register_map: The register map of the workflow the results are for.
+        """
+        if not isinstance(register_map, RegisterMap):
+            register_map = RegisterMap(dict(register_map))
+        self.register_map = register_map
+
+    @property
+    def tests(self) -> dict[str, TestResult]:
+        """
+        Results of all tests received so far.
+        """
+        return {test_id: result for group in self.groups.values() for test_id, result in group.tests.items()}
+
+    @property
+    def max_points(self) -> float:
+        """
+        The number of points for the whole run.
+        """
+        return sum(group.max_score for group in self.groups.values())
+
+    @property
+    def finished(self) -> bool:
+        """
+        Whether results of all groups are final.
+        """
+        return all(group.finished for group in self.groups.values())
+
+    def _get_name(self, register: int | str) -> str | None:
+        if isinstance(register, str) and register.isdigit():
+            register = int(register)
+        if isinstance(register, int):
+            return self.register_map.get_name(register)
+        return register
+
+    def _update_group(self, group: GroupResult, update: callable, *args):
+        self.points -= group.points
+        update(*args)
+        self.points += group.points
+
+    def add(self, register: int | str, value: Any) -> TestResult | GroupResult | None:
+        """
+        Add the value of a register.
+
+        :param register: The name or the number of the register.
+        :param value: The value of the register.
+        :return: The result of the test, or of the group, that was updated. None if the
+            register isn't a grade of a test or a group.
+        """
+        name = self._get_name(register)
+        if name is None:
+            return None
+        if name.startswith(TEST_REGISTER_PREFIX):
+            test_id = name[len(TEST_REGISTER_PREFIX) :]
+            if test_id not in self._test_groups:
+                return None
+            group = self.groups[self._test_groups[test_id]]
+            result = TestResult(test_id, group.group, value)
+            self._update_group(group, group._add_test, result)
+            return result
+        for prefix in GROUP_REGISTER_PREFIXES:
+            if name.startswith(prefix):
+                group = self.groups.get(name[len(prefix) :])
+                if group is None:
+                    return None
+                self._update_group(group, group._set_grade, value)
+                return group
+        if name == RUN_REGISTER:
+            self.result = value
+        return None
+
+    def add_many(self, data: dict[int | str, Any]) -> list[TestResult | GroupResult]:
+        """
+        Add values of many registers.
+
+        :param data: A mapping of names or numbers of registers to their values.
+        :return: The results of tests and groups that were updated.
+        """
+        updated = []
+        for register, value in data.items():
+            result = self.add(register, value)
+            if result is not None:
+                updated.append(result)
+        return updated
+
+    def return_results(self, workflow: "Workflow", data: dict[int | str, Any]) -> list[TestResult | GroupResult]:
+        """
+        Add the results of a workflow. Can be used as ``return_func`` of the run operation.
+        If registers are given by numbers, the register map of the workflow is used.
+
+        :param workflow: The workflow the results are for.
+        :param data: A mapping of names or numbers of registers to their values.
+        :return: The results of tests and groups that were updated.
+        """
+        if any(isinstance(register, int) or register.isdigit() for register in data):
+            self.set_register_map(workflow.get_register_map())
+        return self.add_many(data)
+
+    def to_json(self) -> dict:
+        return {
+            "points": self.points,
+            "max_points": self.max_points,
+            "finished": self.finished,
+            "groups": {group_id: group.to_json() for group_id, group in self.groups.items()},
+        }
@@ -25,6 +25,8 @@ import os
 import tarfile
 import zipfile
 
+from sio3pack.instrumentation import instrumented
+
 
 class ArchiveException(RuntimeError):
     """Base exception class for all archive errors."""
@@ -103,6 +105,7 @@ class Archive(object):
         except UnrecognizedArchiveFormat:
             return False
 
+    @instrumented("archive.extract")
     def extract(self, *args, **kwargs):
         self._archive.extract(*args, **kwargs)
 
@@ -1,4 +1,7 @@
+from sio3pack.workflow.dag import WorkflowDAG
+from sio3pack.workflow.metrics import WorkflowMetrics
 from sio3pack.workflow.object import Object
+from sio3pack.workflow.register_map import RegisterMap
 from sio3pack.workflow.tasks import ExecutionTask, ScriptTask, Task
 from sio3pack.workflow.workflow import Workflow
 from sio3pack.workflow.workflow_manager import WorkflowManager
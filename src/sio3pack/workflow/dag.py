@@ -0,0 +1,226 @@
+from sio3pack.workflow.execution.filesystems import ObjectFilesystem
+from sio3pack.workflow.execution.stream import ObjectReadStream, ObjectWriteStream
+from sio3pack.workflow.tasks import ExecutionTask, ScriptTask, Task
+
+
+class TaskNode:
+    """
+    A task in the dependency graph of a workflow.
+
+    :param int index: The index of the task in the workflow.
+    :param Task task: The task.
+    :param set[str] input_objects: Handles of objects the task reads.
+    :param set[str] output_objects: Handles of objects the task writes.
+    :param set[int | str] input_registers: Registers the task reads.
+    :param set[int | str] output_registers: Registers the task writes.
+    :param list[int] dependencies: Indexes of tasks this task depends on.
+    :param list[int] dependents: Indexes of tasks which depend on this task.
+    :param int level: The topological level of the task. Tasks without dependencies
+        are on level 0, other tasks are one level above their highest dependency.
+        None if the task is on a cycle or depends on one.
+    :param int duration: The worst-case running time of the task in milliseconds.
+    """
+
+    def __init__(self, index: int, task: Task):
+        self.index = index
+        self.task = task
+        self.input_objects: set[str] = set()
+        self.output_objects: set[str] = set()
+        self.input_registers: set[int | str] = set()
+        self.output_registers: set[int | str] = set()
+        self.dependencies: list[int] = []
+        self.dependents: list[int] = []
+        self.level: int | None = None
+        self.duration = 0
+
+        if isinstance(task, ExecutionTask):
+            self.duration = task.get_worst_case_time()
+            if task.output_register is not None:
+                self.output_registers.add(task.output_register)
+            writable = set()
+            for ms in task.mountnamespace_manager.mount_namespaces:
+                for mountpoint in ms.mountpoints:
+                    if mountpoint.writable:
+                        writable.add(id(mountpoint.source))
+            for fs in task.filesystem_manager.filesystems:
+                if isinstance(fs, ObjectFilesystem):
+                    if id(fs) in writable:
+                        self.output_objects.add(fs.object.handle)
+                    else:
+                        self.input_objects.add(fs.object.handle)
+            for process in task.processes:
+                for stream in process.descriptor_manager.all().values():
+                    if isinstance(stream, ObjectReadStream):
+                        self.input_objects.add(stream.object.handle)
+                    elif isinstance(stream, ObjectWriteStream):
+                        self.output_objects.add(stream.object.handle)
+        elif isinstance(task, ScriptTask):
+            self.input_registers.update(task.input_registers)
+            self.output_registers.update(task.output_registers)
+            for obj in task.objects:
+                self.input_objects.add(obj.handle)
+
+
+class WorkflowDAG:
+    """
+    Explicit dependencies between tasks of a workflow. A task depends on the tasks
+    which write the objects and registers it reads. Objects are matched by their
+    handles, external objects are available from the start.
+
+    :param list[TaskNode] nodes: Nodes of the tasks, in the order of tasks in the workflow.
+    :param dict[int, set[str]] dangling_objects: Objects read by tasks (by the index of the task)
+        which are neither external nor written by any task.
+    :param dict[int, set[int | str]] dangling_registers: Registers read by tasks (by the index
+        of the task) which aren't written by any task.
+    :param dict[str, list[int]] conflicting_objects: Objects written by more than one task.
+    :param dict[int | str, list[int]] conflicting_registers: Registers written by more than one task.
+    :param list[int] cycle: Indexes of tasks which are on a cycle or depend on one.
+    """
+
+    def __init__(self, workflow: "Workflow"):
+        """
+        Build the dependency graph of the workflow.
+
+        :param Workflow workflow: The workflow to analyze.
+        """
+        self.workflow = workflow
+        self.nodes = [TaskNode(i, task) for i, task in enumerate(workflow.tasks)]
+        self.dangling_objects: dict[int, set[str]] = {}
+        self.dangling_registers: dict[int, set[int | str]] = {}
+        self.conflicting_objects: dict[str, list[int]] = {}
+        self.conflicting_registers: dict[int | str, list[int]] = {}
+        self.cycle: list[int] = []
+        self._build_edges()
+        self._compute_levels()
+
+    def _build_edges(self):
+        object_producers = {}
+        register_producers = {}
+        for node in self.nodes:
+            for handle in node.output_objects:
+                object_producers.setdefault(handle, []).append(node.index)
+            for register in node.output_registers:
+                register_producers.setdefault(register, []).append(node.index)
+        self.conflicting_objects = {handle: tasks for handle, tasks in object_producers.items() if len(tasks) > 1}
+        self.conflicting_registers = {reg: tasks for reg, tasks in register_producers.items() if len(tasks) > 1}
+
+        external = {obj.handle for obj in self.workflow.external_objects}
+        for node in self.nodes:
+            dependencies = set()
+            for handle in node.input_objects:
+                if handle in object_producers:
+                    dependencies.update(object_producers[handle])
+                elif handle not in external:
+                    self.dangling_objects.setdefault(node.index, set()).add(handle)
+            for register in node.input_registers:
+                if register in register_producers:
+                    dependencies.update(register_producers[register])
+                else:
+                    self.dangling_registers.setdefault(node.index, set()).add(register)
+            dependencies.discard(node.index)
+            node.dependencies = sorted(dependencies)
+            for dependency in node.dependencies:
+                self.nodes[dependency].dependents.append(node.index)
+
+    def _compute_levels(self):
+        # Kahn's algorithm. Tasks left without a level are on a cycle or depend on one.
+        remaining = [len(node.dependencies) for node in self.nodes]
+        queue = [node.index for node in self.nodes if not node.dependencies]
+        for index in queue:
+            self.nodes[index].level = 0
+        i = 0
+        while i < len(queue):
+            node = self.nodes[queue[i]]
+            i += 1
+            for dependent in node.dependents:
+                dependent_node = self.nodes[dependent]
+                dependent_node.level = max(dependent_node.level or 0, node.level + 1)
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    queue.append(dependent)
+        self._order = queue
+        self.cycle = [node.index for node in self.nodes if remaining[node.index] > 0]
+        for index in self.cycle:
+            self.nodes[index].level = None
+
+    def has_cycle(self) -> bool:
+        """
+        Check if dependencies of tasks form a cycle.
+        """
+        return len(self.cycle) > 0
+
+    def is_valid(self) -> bool:
+        """
+        Check if the workflow can be run: there are no cycles, every input
+        is available and every object and register is written by at most one task.
+        """
+        return not (
+            self.cycle
+            or self.dangling_objects
+            or self.dangling_registers
+            or self.conflicting_objects
+            or self.conflicting_registers
+        )
+
+    def topological_order(self) -> list[Task]:
+        """
+        Get tasks in an order in which every task is after its dependencies.
+        Tasks on cycles are omitted.
+        """
+        return [self.nodes[index].task for index in self._order]
+
+    def get_levels(self) -> list[list[Task]]:
+        """
+        Get tasks grouped by their topological levels. Tasks on one level don't
+        depend on each other, so they can be run in parallel.
+        """
+        levels = []
+        for index in self._order:
+            node = self.nodes[index]
+            while len(levels) <= node.level:
+                levels.append([])
+            levels[node.level].append(node.task)
+        return levels
+
+    def get_critical_path(self) -> tuple[int, list[Task]]:
+        """
+        Get the longest chain of dependent tasks, weighted by worst-case running times
+        of tasks. No schedule can finish the workflow faster than this chain.
+
+        :return: A tuple of the length of the path in milliseconds and its tasks.
+        """
+        finish = {}
+        previous = {}
+        for index in self._order:
+            node = self.nodes[index]
+            start = 0
+            for dependency in node.dependencies:
+                if index not in previous or finish[dependency] > start:
+                    start = finish[dependency]
+                    previous[index] = dependency
+            finish[index] = start + node.duration
+        if not finish:
+            return 0, []
+
+        last = max(finish, key=lambda index: finish[index])
+        path = [last]
+        while path[-1] in previous:
+            path.append(previous[path[-1]])
+        return finish[last], [self.nodes[index].task for index in reversed(path)]
+
+    def get_parallelism(self) -> float:
+        """
+        Get the average parallelism of the workflow: the total worst-case running time
+        of all tasks divided by the length of the critical path. It's the number of workers
+        above which running the workflow doesn't get faster.
+        """
+        length, _ = self.get_critical_path()
+        if length == 0:
+            return 0.0
+        return sum(self.nodes[index].duration for index in self._order) / length
+
+    def get_max_width(self) -> int:
+        """
+        Get the largest number of tasks on a single topological level.
+        """
+        return max((len(level) for level in self.get_levels()), default=0)
@@ -11,6 +11,8 @@ class Channel:
     :param int limit: Limits the maximum amount of data sent through the channel.
     """
 
+    __slots__ = ("buffer_size", "source_pipe", "target_pipe", "file_buffer_size", "limit")
+
     def __init__(
         self, buffer_size: int, source_pipe: int, target_pipe: int, file_buffer_size: int = None, limit: int = None
     ):
@@ -11,6 +11,8 @@ class DescriptorManager:
     :param FilesystemManager filesystem_manager: The filesystem manager.
     """
 
+    __slots__ = ("objects_manager", "filesystem_manager", "descriptors")
+
     def __init__(self, objects_manager: "ObjectsManager", filesystem_manager: "FilesystemManager"):
         """
         Initialize the descriptor manager.
@@ -8,6 +8,8 @@ class Filesystem:
     :param int id: The id of the filesystem in the task.
     """
 
+    __slots__ = ("id",)
+
     def __init__(self, id: int = None):
         """
         Represent a filesystem.
@@ -61,6 +63,8 @@ class ImageFilesystem(Filesystem):
     :param str path: The path to the image. If None, the path is "".
     """
 
+    __slots__ = ("image", "path")
+
     def __init__(self, image: str, path: str = None, id: int = None):
         """
         Represent an image filesystem.
@@ -96,6 +100,8 @@ class ImageFilesystem(Filesystem):
 
 
 class EmptyFilesystem(Filesystem):
+    __slots__ = ()
+
     def __init__(self, id: int = None):
         """
         Represent an empty filesystem. Can be used as tmpfs.
@@ -124,6 +130,8 @@ class EmptyFilesystem(Filesystem):
 
 
 class ObjectFilesystem(Filesystem):
+    __slots__ = ("object",)
+
     def __init__(self, object: Object, id: int = None):
         """
         Represent an object filesystem.
@@ -172,6 +180,8 @@ class FilesystemManager:
     :param list[Filesystem] filesystems: The list of filesystems.
     """
 
+    __slots__ = ("filesystems", "id", "task")
+
     def __init__(self, task: "Task"):
         """
         Create a new filesystem manager.
@@ -198,11 +208,21 @@ class FilesystemManager:
                 self.filesystems.append(ObjectFilesystem.from_json(fs, self.id, workflow))
             self.id += 1
 
-    def to_json(self) -> list[dict]:
+    def to_json(self, memo: dict[int, dict] = None) -> list[dict]:
         """
         Convert the filesystems to a list of dictionaries.
+
+        :param memo: A mapping of ids of already converted filesystems to their dictionaries.
+            Shared filesystems are converted only once.
         """
-        return [fs.to_json() for fs in self.filesystems]
+        if memo is None:
+            return [fs.to_json() for fs in self.filesystems]
+        res = []
+        for fs in self.filesystems:
+            if id(fs) not in memo:
+                memo[id(fs)] = fs.to_json()
+            res.append(memo[id(fs)])
+        return res
 
     def get_by_id(self, id: int) -> Filesystem:
         """
@@ -11,6 +11,8 @@ class Mountpoint:
     :param int capacity: The capacity of the mountpoint. If None, the capacity is unlimited.
     """
 
+    __slots__ = ("source", "target", "writable", "capacity")
+
     def __init__(self, source: Filesystem, target: str, writable: bool = False, capacity: int | None = None):
         """
         Represent a mountpoint.
@@ -56,6 +58,8 @@ class MountNamespace:
     :param list[Mountpoint] mountpoints: The mountpoints in the mount namespace.
     """
 
+    __slots__ = ("mountpoints", "root", "id")
+
     def __init__(self, mountpoints: list[Mountpoint] = None, root: int = 0, id: int = None):
         self.mountpoints = mountpoints or []
         self.root = root
@@ -99,6 +103,8 @@ class MountNamespace:
 
 
 class MountNamespaceManager:
+    __slots__ = ("mount_namespaces", "id", "task", "filesystem_manager")
+
     def __init__(self, task: "Task", filesystem_manager: FilesystemManager):
         """
         Create a new mount namespace manager.
@@ -134,11 +140,21 @@ class MountNamespaceManager:
         """
         return self.mount_namespaces[id]
 
-    def to_json(self) -> list[dict]:
+    def to_json(self, memo: dict[int, dict] = None) -> list[dict]:
         """
         Convert the mount namespace manager to a dictionary.
+
+        :param memo: A mapping of ids of already converted mount namespaces to their dictionaries.
+            Shared mount namespaces are converted only once.
         """
-        return [mount_namespace.to_json() for mount_namespace in self.mount_namespaces]
+        if memo is None:
+            return [mount_namespace.to_json() for mount_namespace in self.mount_namespaces]
+        res = []
+        for mount_namespace in self.mount_namespaces:
+            if id(mount_namespace) not in memo:
+                memo[id(mount_namespace)] = mount_namespace.to_json()
+            res.append(memo[id(mount_namespace)])
+        return res
 
     def len(self) -> int:
         """
@@ -4,6 +4,20 @@ from sio3pack.workflow.execution.resource_group import ResourceGroup
 
 
 class Process:
+    __slots__ = (
+        "arguments",
+        "environment",
+        "image",
+        "mount_namespace",
+        "resource_group",
+        "pid_namespace",
+        "working_directory",
+        "task",
+        "workflow",
+        "descriptor_manager",
+        "start_after",
+    )
+
     def __init__(
         self,
         workflow: "Workflow",
@@ -1,4 +1,15 @@
 class ResourceGroup:
+    __slots__ = (
+        "id",
+        "cpu_usage_limit",
+        "instruction_limit",
+        "memory_limit",
+        "oom_terminate_all_tasks",
+        "pid_limit",
+        "swap_limit",
+        "time_limit",
+    )
+
     def __init__(
         self,
         cpu_usage_limit: int = 100.0,
@@ -85,6 +96,8 @@ class ResourceGroup:
 
 
 class ResourceGroupManager:
+    __slots__ = ("resource_groups", "id")
+
     def __init__(self, task: "Task"):
         """
         Create a new resource group manager.
@@ -109,11 +122,21 @@ class ResourceGroupManager:
         """
         return self.resource_groups[id]
 
-    def to_json(self) -> list[dict]:
+    def to_json(self, memo: dict[int, dict] = None) -> list[dict]:
         """
         Convert the resource group manager to a dictionary.
-        """
-        return [resource_group.to_json() for resource_group in self.resource_groups]
+
+        :param memo: A mapping of ids of already converted resource groups to their dictionaries.
+            Shared resource groups are converted only once.
+        """
+        if memo is None:
+            return [resource_group.to_json() for resource_group in self.resource_groups]
+        res = []
+        for resource_group in self.resource_groups:
+            if id(resource_group) not in memo:
+                memo[id(resource_group)] = resource_group.to_json()
+            res.append(memo[id(resource_group)])
+        return res
 
     def from_json(self, data: list[dict]):
         """
@@ -1,8 +1,7 @@
 from enum import Enum
 
-from sio3pack.workflow import Object
 from sio3pack.workflow.execution.filesystems import Filesystem, FilesystemManager
-from sio3pack.workflow.object import ObjectsManager
+from sio3pack.workflow.object import Object, ObjectsManager
 
 
 class StreamType(Enum):
@@ -39,6 +38,8 @@ class Stream:
     :param StreamType type: The type of the stream.
     """
 
+    __slots__ = ("type",)
+
     def __init__(self, type: StreamType):
         """
         Initialize the stream.
@@ -90,6 +91,8 @@ class FileStream(Stream):
     :param FileMode mode: The mode to open the file in.
     """
 
+    __slots__ = ("filesystem", "path", "mode")
+
     def __init__(self, filesystem: Filesystem, path: str, mode: FileMode):
         super().__init__(StreamType.FILE)
         self.filesystem = filesystem
@@ -130,6 +133,8 @@ class NullStream(Stream):
     Class representing a null stream.
     """
 
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(StreamType.NULL)
 
@@ -162,6 +167,8 @@ class ObjectStream(Stream):
     :param Object object: The object to use.
     """
 
+    __slots__ = ("object",)
+
     def __init__(self, type: StreamType, object: Object):
         if type not in (StreamType.OBJECT_READ, StreamType.OBJECT_WRITE):
             raise ValueError("Invalid stream type for ObjectStream")
@@ -205,6 +212,8 @@ class ObjectReadStream(ObjectStream):
     :param Object object: The object to read from.
     """
 
+    __slots__ = ()
+
     def __init__(self, object: Object):
         """
         Initialize the object read stream.
@@ -222,6 +231,8 @@ class ObjectWriteStream(ObjectStream):
     :param Object object: The object to write to.
     """
 
+    __slots__ = ()
+
     def __init__(self, object: Object):
         """
         Initialize the object write stream.
@@ -240,6 +251,8 @@ class PipeStream(Stream):
     :param int pipe_index: The index of the pipe.
     """
 
+    __slots__ = ("pipe_index",)
+
     def __init__(self, type: StreamType, pipe_index: int):
         """
         Initialize the pipe stream.
@@ -280,6 +293,8 @@ class PipeReadStream(PipeStream):
     :param int pipe_index: The index of the pipe.
     """
 
+    __slots__ = ()
+
     def __init__(self, pipe_index: int):
         """
         Initialize the pipe read stream.
@@ -297,6 +312,8 @@ class PipeWriteStream(PipeStream):
     :param int pipe_index: The index of the pipe.
     """
 
+    __slots__ = ()
+
     def __init__(self, pipe_index: int):
         """
         Initialize the pipe write stream.
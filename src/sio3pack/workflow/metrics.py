@@ -0,0 +1,134 @@
+from sio3pack.workflow.execution.filesystems import ObjectFilesystem
+from sio3pack.workflow.execution.stream import ObjectStream
+from sio3pack.workflow.tasks import ExecutionTask, ScriptTask
+
+
+class WorkflowMetrics:
+    """
+    Size and complexity of a workflow, used for example for admission control
+    and for packing workflows onto workers. Time limits are in milliseconds.
+
+    :param int tasks: The number of tasks.
+    :param int execution_tasks: The number of execution tasks.
+    :param int script_tasks: The number of script tasks.
+    :param int exclusive_tasks: The number of execution tasks that need a whole worker.
+    :param int processes: The number of processes in all execution tasks.
+    :param int objects: The number of distinct objects used in the workflow.
+    :param int external_objects: The number of external objects.
+    :param int observable_objects: The number of observable objects.
+    :param int registers: The number of distinct registers used by tasks.
+    :param int observable_registers: The number of distinct observable registers used by tasks.
+    :param int filesystems: The number of filesystems in all execution tasks.
+    :param int script_bytes: The total size of scripts of script tasks, in bytes.
+    :param int hard_time_limit: The sum of hard time limits of execution tasks.
+    :param int worst_case_time: The sum of the longest possible running times of execution tasks.
+        For tasks without a hard time limit, the maximum time limit of their resource groups is used.
+    :param int max_memory_limit: The largest memory needed by a single execution task, as the sum
+        of memory limits of its resource groups.
+    """
+
+    def __init__(self):
+        self.tasks = 0
+        self.execution_tasks = 0
+        self.script_tasks = 0
+        self.exclusive_tasks = 0
+        self.processes = 0
+        self.objects = 0
+        self.external_objects = 0
+        self.observable_objects = 0
+        self.registers = 0
+        self.observable_registers = 0
+        self.filesystems = 0
+        self.script_bytes = 0
+        self.hard_time_limit = 0
+        self.worst_case_time = 0
+        self.max_memory_limit = 0
+
+    @classmethod
+    def from_workflow(cls, workflow: "Workflow") -> "WorkflowMetrics":
+        """
+        Compute metrics of the workflow in a single pass over its tasks.
+
+        :param Workflow workflow: The workflow to compute metrics of.
+        """
+        metrics = cls()
+        objects = set()
+        registers = set()
+        for obj in workflow.external_objects:
+            objects.add(obj.handle)
+        for obj in workflow.observable_objects:
+            objects.add(obj.handle)
+
+        for task in workflow.tasks:
+            metrics.tasks += 1
+            if isinstance(task, ExecutionTask):
+                metrics.execution_tasks += 1
+                if task.exclusive:
+                    metrics.exclusive_tasks += 1
+                if task.output_register is not None:
+                    registers.add(task.output_register)
+
+                resource_groups = task.resource_group_manager.all()
+                metrics.hard_time_limit += task.get_hard_time_limit() or 0
+                metrics.worst_case_time += task.get_worst_case_time()
+                metrics.max_memory_limit = max(metrics.max_memory_limit, sum(rg.memory_limit for rg in resource_groups))
+
+                metrics.filesystems += task.filesystem_manager.len()
+                for fs in task.filesystem_manager.filesystems:
+                    if isinstance(fs, ObjectFilesystem):
+                        objects.add(fs.object.handle)
+                for process in task.processes:
+                    metrics.processes += 1
+                    for stream in process.descriptor_manager.all().values():
+                        if isinstance(stream, ObjectStream):
+                            objects.add(stream.object.handle)
+            elif isinstance(task, ScriptTask):
+                metrics.script_tasks += 1
+                registers.update(task.input_registers)
+                registers.update(task.output_registers)
+                for obj in task.objects:
+                    objects.add(obj.handle)
+                if task.script:
+                    metrics.script_bytes += len(task.script.encode())
+
+        metrics.objects = len(objects)
+        metrics.external_objects = len(workflow.external_objects)
+        metrics.observable_objects = len(workflow.observable_objects)
+        metrics.registers = len(registers)
+        if all(isinstance(reg, str) for reg in registers):
+            metrics.observable_registers = sum(1 for reg in registers if reg.startswith("obsreg:"))
+        else:
+            # Integer registers don't say whether they are observable.
+            metrics.observable_registers = workflow.observable_registers
+        return metrics
+
+    @property
+    def worst_case_worker_seconds(self) -> float:
+        """
+        Worst-case time in seconds the workflow occupies workers for, if every
+        execution task runs until its time limit.
+        """
+        return self.worst_case_time / 1000
+
+    def to_json(self) -> dict:
+        """
+        Convert the metrics to a dictionary.
+        """
+        return {
+            "tasks": self.tasks,
+            "execution_tasks": self.execution_tasks,
+            "script_tasks": self.script_tasks,
+            "exclusive_tasks": self.exclusive_tasks,
+            "processes": self.processes,
+            "objects": self.objects,
+            "external_objects": self.external_objects,
+            "observable_objects": self.observable_objects,
+            "registers": self.registers,
+            "observable_registers": self.observable_registers,
+            "filesystems": self.filesystems,
+            "script_bytes": self.script_bytes,
+            "hard_time_limit": self.hard_time_limit,
+            "worst_case_time": self.worst_case_time,
+            "worst_case_worker_seconds": self.worst_case_worker_seconds,
+            "max_memory_limit": self.max_memory_limit,
+        }
@@ -9,6 +9,8 @@ class Object:
     :param str handle: The handle of the object.
     """
 
+    __slots__ = ("handle",)
+
     def __init__(self, handle: str):
         """
         Create a new object.
@@ -35,6 +37,8 @@ class Object:
 
 
 class ObjectsManager:
+    __slots__ = ("objects",)
+
     def __init__(self):
         self.objects = {}
 
@@ -92,6 +96,8 @@ class ObjectList:
     A class to represent a list of objects in a workflow.
     """
 
+    __slots__ = ("objects",)
+
     def __init__(self):
         self.objects = []
 
@@ -136,16 +142,17 @@ class ObjectList:
         """
         return f"<ObjectList {self.objects}>"
 
-    def union(self, other: "ObjectList"):
+    def union(self, *others: "ObjectList"):
         """
-        Union the list with another list of objects.
+        Union the list with other lists of objects.
 
-        :param ObjectList other: The other list to union with.
+        :param ObjectList others: The other lists to union with.
         """
         objects = {}
         for obj in self.objects:
             objects[obj.handle] = obj
-        for obj in other.objects:
-            if obj.handle not in objects:
-                objects[obj.handle] = obj
+        for other in others:
+            for obj in other.objects:
+                if obj.handle not in objects:
+                    objects[obj.handle] = obj
         self.objects = list(objects.values())
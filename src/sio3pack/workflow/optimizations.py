@@ -0,0 +1,188 @@
+import json
+
+from sio3pack.workflow.dag import TaskNode, WorkflowDAG
+from sio3pack.workflow.execution.filesystems import ObjectFilesystem
+from sio3pack.workflow.execution.stream import ObjectWriteStream
+from sio3pack.workflow.tasks import ExecutionTask, ScriptTask
+
+
+def _is_observable_register(workflow: "Workflow", register: int | str) -> bool:
+    if isinstance(register, str):
+        return register.startswith("obsreg:")
+    # Integer registers below the number of observable registers are observable.
+    return register < workflow.observable_registers
+
+
+def _has_untracked_outputs(node: TaskNode) -> bool:
+    """
+    Check if the task can have effects which aren't visible as objects or registers,
+    for example it writes to a writable filesystem which isn't an object.
+    """
+    if not node.output_objects and not node.output_registers:
+        return True
+    if isinstance(node.task, ExecutionTask):
+        for ms in node.task.mountnamespace_manager.mount_namespaces:
+            for mountpoint in ms.mountpoints:
+                if mountpoint.writable and not isinstance(mountpoint.source, ObjectFilesystem):
+                    return True
+    return False
+
+
+def eliminate_dead_tasks(workflow: "Workflow", dag: WorkflowDAG = None) -> int:
+    """
+    Remove tasks whose outputs are neither observable nor needed by other needed tasks.
+    Tasks with outputs that can't be tracked, like writable filesystems which aren't
+    objects, are always kept.
+
+    :param Workflow workflow: The workflow to optimize.
+    :param WorkflowDAG dag: The dependency graph of the workflow, if it's already built.
+    :return: The number of removed tasks.
+    """
+    dag = dag or WorkflowDAG(workflow)
+    observable_objects = {obj.handle for obj in workflow.observable_objects}
+    stack = []
+    for node in dag.nodes:
+        if (
+            _has_untracked_outputs(node)
+            or not node.output_objects.isdisjoint(observable_objects)
+            or any(_is_observable_register(workflow, reg) for reg in node.output_registers)
+        ):
+            stack.append(node.index)
+
+    live = set(stack)
+    while stack:
+        node = dag.nodes[stack.pop()]
+        for dependency in node.dependencies:
+            if dependency not in live:
+                live.add(dependency)
+                stack.append(dependency)
+
+    removed = len(workflow.tasks) - len(live)
+    if removed:
+        workflow.tasks = [node.task for node in dag.nodes if node.index in live]
+    return removed
+
+
+def eliminate_unused_objects(workflow: "Workflow", dag: WorkflowDAG = None) -> int:
+    """
+    Remove external objects which no task reads or writes and forget objects
+    which aren't used anywhere in the workflow. Observable objects are always kept.
+
+    :param Workflow workflow: The workflow to optimize.
+    :param WorkflowDAG dag: The dependency graph of the workflow, if it's already built.
+    :return: The number of removed external objects.
+    """
+    dag = dag or WorkflowDAG(workflow)
+    # The graph may have been built before removing dead tasks.
+    tasks = {id(task) for task in workflow.tasks}
+    used = set()
+    for node in dag.nodes:
+        if id(node.task) not in tasks:
+            continue
+        used.update(node.input_objects)
+        used.update(node.output_objects)
+
+    external_objects = [obj for obj in workflow.external_objects if obj.handle in used]
+    removed = len(workflow.external_objects) - len(external_objects)
+    workflow.external_objects.objects = external_objects
+
+    used.update(obj.handle for obj in workflow.observable_objects)
+    used.update(obj.handle for obj in external_objects)
+    workflow.objects_manager.objects = {
+        handle: obj for handle, obj in workflow.objects_manager.objects.items() if obj.handle in used
+    }
+    return removed
+
+
+def _get_written_objects(task: ExecutionTask) -> frozenset[str]:
+    written = set()
+    for ms in task.mountnamespace_manager.mount_namespaces:
+        for mountpoint in ms.mountpoints:
+            if mountpoint.writable and isinstance(mountpoint.source, ObjectFilesystem):
+                written.add(mountpoint.source.object.handle)
+    for process in task.processes:
+        for stream in process.descriptor_manager.all().values():
+            if isinstance(stream, ObjectWriteStream):
+                written.add(stream.object.handle)
+    return frozenset(written)
+
+
+def _get_task_key(task: ExecutionTask) -> str:
+    """
+    Get a key of the task which is the same for tasks doing the same work.
+    The name and the output register of the task don't matter.
+    """
+    data = task.to_json()
+    del data["name"]
+    del data["output_register"]
+    return json.dumps(data, sort_keys=True)
+
+
+def eliminate_duplicate_tasks(workflow: "Workflow") -> int:
+    """
+    Merge execution tasks which do the same work, for example compile the same file
+    with the same flags into the same object. Only the first of such tasks is kept.
+    Tasks which read the output register of a removed task read the output register
+    of the kept task instead. Duplicates whose output register is observable and
+    different from the kept task's register are not merged, since their result
+    has to be reported.
+
+    :param Workflow workflow: The workflow to optimize.
+    :return: The number of removed tasks.
+    """
+    # Only tasks which write the same objects can be duplicates, so keys are computed only for them.
+    by_outputs = {}
+    for task in workflow.tasks:
+        if isinstance(task, ExecutionTask):
+            written = _get_written_objects(task)
+            if written:
+                by_outputs.setdefault(written, []).append(task)
+
+    removed = set()
+    renamed_registers = {}
+    for tasks in by_outputs.values():
+        if len(tasks) < 2:
+            continue
+        kept = {}
+        for task in tasks:
+            key = _get_task_key(task)
+            if key not in kept:
+                kept[key] = task
+                continue
+            original = kept[key]
+            if task.output_register != original.output_register:
+                if (
+                    not isinstance(task.output_register, str)
+                    or not isinstance(original.output_register, str)
+                    or _is_observable_register(workflow, task.output_register)
+                ):
+                    continue
+                renamed_registers[task.output_register] = original.output_register
+            removed.add(id(task))
+
+    if not removed:
+        return 0
+    workflow.tasks = [task for task in workflow.tasks if id(task) not in removed]
+    if renamed_registers:
+        for task in workflow.tasks:
+            if isinstance(task, ScriptTask):
+                task.input_registers = [renamed_registers.get(reg, reg) for reg in task.input_registers]
+                if not task.script:
+                    continue
+                for old, new in renamed_registers.items():
+                    task.script = task.script.replace(f"<{old}>", f"<{new}>")
+    return len(removed)
+
+
+def optimize(workflow: "Workflow") -> "Workflow":
+    """
+    Run all optimization passes on the workflow. The workflow is modified in place.
+
+    :param Workflow workflow: The workflow to optimize.
+    :return: The optimized workflow.
+    """
+    eliminate_duplicate_tasks(workflow)
+    dag = WorkflowDAG(workflow)
+    eliminate_dead_tasks(workflow, dag)
+    eliminate_unused_objects(workflow, dag)
+    return workflow
@@ -0,0 +1,194 @@
+"""
+Parametric encoding of workflow dictionaries.
+
+Workflows of run operations consist mostly of near-identical tasks, for example
+running the solution on every test differs only in the test ID, paths and limits.
+In the parametric encoding, tasks with the same structure are stored once, as a
+template, and every task is a list of its template's index and its arguments:
+
+.. code-block:: json
+
+    {
+        "name": "Run solution",
+        "external_objects": ["..."],
+        "observable_objects": [],
+        "registers": 6,
+        "observable_registers": 0,
+        "templates": [
+            {
+                "task": {"name": null, "type": "execution", "...": "..."},
+                "parameters": [
+                    {"path": ["name"], "argument": 0, "prefix": "Run solution for test ", "suffix": ""},
+                    {"path": ["output_register"], "argument": 0, "prefix": "r:run_test_res_", "suffix": ""}
+                ]
+            }
+        ],
+        "tasks": [[0, "1a"], [0, "1b"]]
+    }
+
+Values in the template which differ between tasks are ``null`` and each of them is
+described by a parameter: the path to the value in the task, and the index of the
+argument of the task it comes from. For strings, the common prefix and suffix of
+all values are kept in the parameter, so the argument is only the part that differs.
+Parameters with the same arguments in all tasks share them, so tasks of a test
+usually have the test ID as their only argument.
+
+Expanding the encoded workflow gives back exactly the same dictionary.
+"""
+
+import os
+from typing import Any
+
+#: The key which marks workflows in the parametric encoding.
+TEMPLATES_KEY = "templates"
+
+
+def is_parametric(data: dict) -> bool:
+    """
+    Check if the workflow dictionary is in the parametric encoding.
+
+    :param data: The workflow dictionary.
+    """
+    return TEMPLATES_KEY in data
+
+
+def _flatten(node: Any, leaves: list) -> tuple | type:
+    # Returns the structure of the node and appends its scalar values to `leaves`.
+    # Types of values are a part of the structure, so that values which are equal
+    # but of different types (like 1, 1.0 and True) are never mixed up.
+    if isinstance(node, dict):
+        return (dict,) + tuple((key, _flatten(value, leaves)) for key, value in node.items())
+    if isinstance(node, list):
+        return (list,) + tuple(_flatten(value, leaves) for value in node)
+    leaves.append(node)
+    return type(node)
+
+
+def _paths(node: Any, path: list, paths: list):
+    # Appends paths to scalar values of the node, in the same order as `_flatten`.
+    if isinstance(node, dict):
+        for key, value in node.items():
+            _paths(value, path + [key], paths)
+    elif isinstance(node, list):
+        for i, value in enumerate(node):
+            _paths(value, path + [i], paths)
+    else:
+        paths.append(path)
+
+
+def _rebuild(node: Any, leaves) -> Any:
+    # Builds a copy of the node with scalar values taken from the `leaves` iterator.
+    if isinstance(node, dict):
+        return {key: _rebuild(value, leaves) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_rebuild(value, leaves) for value in node]
+    return next(leaves)
+
+
+def _split(values: tuple) -> tuple[str, str, tuple[str, ...]]:
+    prefix = os.path.commonprefix(values)
+    rests = [value[len(prefix) :] for value in values]
+    suffix = os.path.commonprefix([rest[::-1] for rest in rests])[::-1]
+    return prefix, suffix, tuple(rest[: len(rest) - len(suffix)] for rest in rests)
+
+
+def _compact_group(first: dict, instances: list[list]) -> tuple[dict, list[list]]:
+    paths = []
+    _paths(first, [], paths)
+    template_leaves = []
+    parameters = []
+    arguments = {}
+    for path, values in zip(paths, zip(*instances)):
+        value = values[0]
+        if all(other == value for other in values):
+            template_leaves.append(value)
+            continue
+        template_leaves.append(None)
+        affixes = {}
+        if isinstance(value, str):
+            affixes["prefix"], affixes["suffix"], values = _split(values)
+        argument = arguments.setdefault((type(value), values), len(arguments))
+        parameters.append({"path": path, "argument": argument, **affixes})
+
+    template = {"task": _rebuild(first, iter(template_leaves)), "parameters": parameters}
+    columns = [values for _, values in arguments]
+    return template, [list(args) for args in zip(*columns)] if columns else [[] for _ in instances]
+
+
+def compact_workflow(data: dict) -> dict:
+    """
+    Convert a workflow dictionary to the parametric encoding.
+
+    :param data: The workflow dictionary, as returned by :meth:`sio3pack.workflow.Workflow.to_json`.
+    :return: The workflow dictionary in the parametric encoding.
+    """
+    groups: dict[tuple | type, int] = {}
+    firsts = []
+    instances = []
+    order = []
+    for task in data["tasks"]:
+        leaves = []
+        shape = _flatten(task, leaves)
+        index = groups.get(shape)
+        if index is None:
+            index = groups[shape] = len(firsts)
+            firsts.append(task)
+            instances.append([])
+        order.append((index, len(instances[index])))
+        instances[index].append(leaves)
+
+    templates = []
+    arguments = []
+    for first, group in zip(firsts, instances):
+        template, args = _compact_group(first, group)
+        templates.append(template)
+        arguments.append(args)
+
+    # Keys are kept in their order, with templates just before tasks.
+    compacted = {}
+    for key, value in data.items():
+        if key == "tasks":
+            compacted[TEMPLATES_KEY] = templates
+            value = [[index] + arguments[index][i] for index, i in order]
+        compacted[key] = value
+    return compacted
+
+
+def expand_workflow(data: dict) -> dict:
+    """
+    Convert a workflow dictionary in the parametric encoding to the usual one.
+
+    :param data: The workflow dictionary in the parametric encoding.
+    :return: The workflow dictionary, as returned by :meth:`sio3pack.workflow.Workflow.to_json`.
+    """
+    templates = []
+    for template in data[TEMPLATES_KEY]:
+        leaves = []
+        _flatten(template["task"], leaves)
+        paths = []
+        _paths(template["task"], [], paths)
+        positions = {tuple(path): i for i, path in enumerate(paths)}
+        parameters = []
+        for parameter in template["parameters"]:
+            path = tuple(parameter["path"])
+            if path not in positions:
+                raise ValueError(f"Parameter path {list(path)} doesn't exist in the task template")
+            parameters.append(
+                (positions[path], parameter["argument"], parameter.get("prefix"), parameter.get("suffix", ""))
+            )
+        templates.append((template["task"], leaves, parameters))
+
+    tasks = []
+    for i, (index, *args) in enumerate(data["tasks"]):
+        if not 0 <= index < len(templates):
+            raise ValueError(f"Task {i} uses template {index}, but there are {len(templates)}")
+        task, template_leaves, parameters = templates[index]
+        leaves = list(template_leaves)
+        for position, argument, prefix, suffix in parameters:
+            if argument >= len(args):
+                raise ValueError(f"Task {i} has {len(args)} arguments, but its template needs argument {argument}")
+            value = args[argument]
+            leaves[position] = value if prefix is None else prefix + value + suffix
+        tasks.append(_rebuild(task, iter(leaves)))
+
+    return {key: tasks if key == "tasks" else value for key, value in data.items() if key != TEMPLATES_KEY}
@@ -0,0 +1,98 @@
+from collections.abc import Mapping
+from typing import Any, Iterator
+
+
+class RegisterMap(Mapping):
+    """
+    The mapping of register names to the numbers used in a workflow serialized with
+    integer registers, with the reverse mapping and indices of observable objects.
+    Both directions are dictionary lookups, so results returned by workers can be
+    decoded without scanning the workflow again. It behaves like a read-only
+    dictionary of register names to numbers.
+
+    :param dict[str, int] registers: A mapping of register names to numbers.
+    :param int observable_registers: The number of observable registers. They get
+        the lowest numbers.
+    :param list[str] observable_objects: Handles of observable objects, in the order
+        of the serialized workflow.
+    """
+
+    __slots__ = ("registers", "names", "observable_registers", "observable_objects", "object_indices")
+
+    def __init__(self, registers: dict[str, int], observable_registers: int = 0, observable_objects: list[str] = None):
+        """
+        :param registers: A mapping of register names to numbers.
+        :param observable_registers: The number of observable registers.
+        :param observable_objects: Handles of observable objects, in the order of the serialized workflow.
+        """
+        self.registers = registers
+        self.names = {number: name for name, number in registers.items()}
+        self.observable_registers = observable_registers
+        self.observable_objects = list(observable_objects or [])
+        self.object_indices = {handle: i for i, handle in enumerate(self.observable_objects)}
+
+    def __getitem__(self, name: str) -> int:
+        return self.registers[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.registers)
+
+    def __len__(self) -> int:
+        return len(self.registers)
+
+    def get_name(self, number: int) -> str | None:
+        """
+        Get the name of the register with the given number.
+
+        :param number: The number of the register.
+        :return: The name of the register, or None if there is no such register.
+        """
+        return self.names.get(number)
+
+    def get_object_index(self, handle: str) -> int | None:
+        """
+        Get the index of the observable object with the given handle.
+
+        :param handle: The handle of the object.
+        :return: The index of the object, or None if it's not observable.
+        """
+        return self.object_indices.get(handle)
+
+    def get_object_handle(self, index: int) -> str | None:
+        """
+        Get the handle of the observable object with the given index.
+
+        :param index: The index of the object.
+        :return: The handle of the object, or None if there is no such object.
+        """
+        if 0 <= index < len(self.observable_objects):
+            return self.observable_objects[index]
+        return None
+
+    def decode(self, data: dict[int | str, Any]) -> dict[str, Any]:
+        """
+        Replace numbers of registers with their names. Keys which are strings of digits
+        (as in JSON) are treated as numbers, other keys are kept.
+
+        :param data: A mapping of numbers of registers to their values.
+        :return: A mapping of names of registers to their values.
+        """
+        decoded = {}
+        for register, value in data.items():
+            if isinstance(register, str) and register.isdigit():
+                register = int(register)
+            if isinstance(register, int):
+                register = self.names.get(register, register)
+            decoded[register] = value
+        return decoded
+
+    def to_json(self) -> dict:
+        return {
+            "registers": self.registers,
+            "observable_registers": self.observable_registers,
+            "observable_objects": self.observable_objects,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "RegisterMap":
+        return cls(data["registers"], data.get("observable_registers", 0), data.get("observable_objects", []))
@@ -0,0 +1,335 @@
+import json
+import os
+import re
+from typing import Callable
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "workflow.schema.json")
+
+# A compiled schema. It appends errors about the value at the given path to the list.
+Validator = Callable[[object, str, list[str]], None]
+
+_JSON_TYPES = {
+    "null": lambda value: value is None,
+    "boolean": lambda value: isinstance(value, bool),
+    # As in JSON Schema, numbers with a zero fractional part, like 1.0, are integers.
+    "integer": lambda value: (isinstance(value, int) or (isinstance(value, float) and value.is_integer()))
+    and not isinstance(value, bool),
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "string": lambda value: isinstance(value, str),
+    "array": lambda value: isinstance(value, list),
+    "object": lambda value: isinstance(value, dict),
+}
+
+# Keywords which don't affect validation.
+_ANNOTATIONS = {"$schema", "$id", "$defs", "title", "description"}
+
+_validator: Validator = None
+
+
+def _json_type(value) -> str:
+    for name in ("null", "boolean", "integer", "number", "string", "array", "object"):
+        if _JSON_TYPES[name](value):
+            return name
+    return type(value).__name__
+
+
+def _is_number(value) -> bool:
+    return _JSON_TYPES["number"](value)
+
+
+def _json_equal(a, b) -> bool:
+    # Values are compared as JSON values, so for example `true` isn't equal to 1.
+    if _is_number(a) and _is_number(b):
+        return a == b
+    if _json_type(a) != _json_type(b):
+        return False
+    if isinstance(a, list):
+        return len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_json_equal(a[key], b[key]) for key in a)
+    return a == b
+
+
+class SchemaCompiler:
+    """
+    Compiles a JSON Schema into a tree of Python functions, so that validating a document
+    is a single pass over it, without interpreting the schema again. Only the subset of
+    JSON Schema used by the workflow schema is supported: ``$ref`` to ``#/$defs``,
+    ``type``, ``const``, ``enum``, ``required``, ``properties``, ``additionalProperties``,
+    ``propertyNames``, ``items``, ``minimum``, ``exclusiveMinimum``, ``pattern`` and ``oneOf``.
+    Other keywords, except for annotations like ``description``, are rejected when compiling,
+    so that a schema can't be silently validated only in part. All definitions in ``$defs``
+    are compiled, also those which aren't referenced.
+
+    ``oneOf`` whose alternatives are objects with a required, constant ``type`` property is
+    compiled into a dispatch on the value of ``type``, so only the matching alternative is
+    checked and its errors are reported.
+
+    :param dict schema: The root schema.
+    """
+
+    def __init__(self, schema: dict):
+        self.schema = schema
+        self._refs: dict[str, Validator] = {}
+
+    def compile(self, schema: dict = None) -> Validator:
+        """
+        Compile the schema.
+
+        :param dict schema: The (sub)schema to compile. If not given, the root schema is compiled.
+        :return: The validator.
+        """
+        root = schema is None
+        schema = self.schema if root else schema
+        if not isinstance(schema, dict):
+            raise ValueError(f"Only object schemas are supported, got {schema!r}")
+        unknown = set(schema) - _ANNOTATIONS - set(self.KEYWORDS)
+        if unknown:
+            raise ValueError(f"Unsupported JSON Schema keywords: {', '.join(sorted(unknown))}")
+        if root:
+            for name in schema.get("$defs", {}):
+                self._compile_ref({"$ref": f"#/$defs/{name}"})
+
+        # Type mismatches stop checking the value, since other keywords would only add noise.
+        checks = [getattr(self, method)(schema) for keyword, method in self.KEYWORDS.items() if keyword in schema]
+
+        def validate(value, path: str, errors: list[str]):
+            for check in checks:
+                if check(value, path, errors) is False:
+                    return
+
+        return validate
+
+    def _resolve(self, ref: str) -> dict:
+        if not ref.startswith("#/"):
+            raise ValueError(f"Only local references are supported, got {ref}")
+        schema = self.schema
+        for part in ref[2:].split("/"):
+            schema = schema[part]
+        return schema
+
+    def _compile_ref(self, schema: dict) -> Validator:
+        ref = schema["$ref"]
+        if ref not in self._refs:
+            # Placeholder for recursive references, replaced once the target is compiled.
+            self._refs[ref] = lambda value, path, errors: self._refs[ref](value, path, errors)
+            self._refs[ref] = self.compile(self._resolve(ref))
+        return self._refs[ref]
+
+    def _compile_type(self, schema: dict) -> Validator:
+        names = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+        unknown = [name for name in names if name not in _JSON_TYPES]
+        if unknown:
+            raise ValueError(f"Unknown JSON types: {', '.join(map(str, unknown))}")
+        predicates = [_JSON_TYPES[name] for name in names]
+        expected = " or ".join(names)
+
+        def check(value, path: str, errors: list[str]):
+            if not any(predicate(value) for predicate in predicates):
+                errors.append(f"{path}: expected {expected}, got {_json_type(value)}")
+                return False
+
+        return check
+
+    def _compile_const(self, schema: dict) -> Validator:
+        const = schema["const"]
+
+        def check(value, path: str, errors: list[str]):
+            if not _json_equal(value, const):
+                errors.append(f"{path}: expected {const!r}, got {value!r}")
+                return False
+
+        return check
+
+    def _compile_enum(self, schema: dict) -> Validator:
+        allowed = schema["enum"]
+
+        def check(value, path: str, errors: list[str]):
+            if not any(_json_equal(value, item) for item in allowed):
+                errors.append(f"{path}: expected one of {', '.join(map(repr, allowed))}, got {value!r}")
+                return False
+
+        return check
+
+    def _compile_required(self, schema: dict) -> Validator:
+        required = schema["required"]
+
+        def check(value, path: str, errors: list[str]):
+            if isinstance(value, dict):
+                for key in required:
+                    if key not in value:
+                        errors.append(f"{path}: missing `{key}`")
+
+        return check
+
+    def _compile_properties(self, schema: dict) -> Validator:
+        properties = {key: self.compile(subschema) for key, subschema in schema["properties"].items()}
+
+        def check(value, path: str, errors: list[str]):
+            if isinstance(value, dict):
+                for key, validate in properties.items():
+                    if key in value:
+                        validate(value[key], f"{path}.{key}", errors)
+
+        return check
+
+    def _compile_additional_properties(self, schema: dict) -> Validator:
+        known = set(schema.get("properties", {}))
+        additional = schema["additionalProperties"]
+        if additional is True:
+            return lambda value, path, errors: None
+        validate = None if additional is False else self.compile(additional)
+
+        def check(value, path: str, errors: list[str]):
+            if isinstance(value, dict):
+                for key, item in value.items():
+                    if key in known:
+                        continue
+                    if validate is None:
+                        errors.append(f"{path}: unexpected `{key}`")
+                    else:
+                        validate(item, f"{path}[{key}]", errors)
+
+        return check
+
+    def _compile_property_names(self, schema: dict) -> Validator:
+        validate = self.compile(schema["propertyNames"])
+
+        def check(value, path: str, errors: list[str]):
+            if isinstance(value, dict):
+                for key in value:
+                    validate(key, f"{path}[{key}]", errors)
+
+        return check
+
+    def _compile_items(self, schema: dict) -> Validator:
+        validate = self.compile(schema["items"])
+
+        def check(value, path: str, errors: list[str]):
+            if isinstance(value, list):
+                for i, item in enumerate(value):
+                    validate(item, f"{path}[{i}]", errors)
+
+        return check
+
+    def _compile_minimum(self, schema: dict) -> Validator:
+        minimum = schema["minimum"]
+
+        def check(value, path: str, errors: list[str]):
+            if _is_number(value) and value < minimum:
+                errors.append(f"{path}: must be at least {minimum}, got {value}")
+
+        return check
+
+    def _compile_exclusive_minimum(self, schema: dict) -> Validator:
+        minimum = schema["exclusiveMinimum"]
+
+        def check(value, path: str, errors: list[str]):
+            if _is_number(value) and value <= minimum:
+                errors.append(f"{path}: must be greater than {minimum}, got {value}")
+
+        return check
+
+    def _compile_pattern(self, schema: dict) -> Validator:
+        pattern = re.compile(schema["pattern"])
+
+        def check(value, path: str, errors: list[str]):
+            if isinstance(value, str) and not pattern.search(value):
+                errors.append(f"{path}: {value!r} doesn't match {pattern.pattern!r}")
+
+        return check
+
+    def _get_discriminator(self, alternatives: list[dict]) -> dict[str, dict] | None:
+        # Alternatives can be told apart by the `type` property only if all of them require
+        # an object with it. Otherwise, they're checked one by one.
+        by_type = {}
+        for alternative in alternatives:
+            if set(alternative) == {"$ref"}:
+                alternative = self._resolve(alternative["$ref"])
+            if alternative.get("type") != "object" or "type" not in alternative.get("required", []):
+                return None
+            type_schema = alternative.get("properties", {}).get("type", {})
+            if "const" in type_schema:
+                values = [type_schema["const"]]
+            elif "enum" in type_schema:
+                values = type_schema["enum"]
+            else:
+                return None
+            for value in values:
+                if not isinstance(value, str) or value in by_type:
+                    return None
+                by_type[value] = alternative
+        return by_type
+
+    def _compile_one_of(self, schema: dict) -> Validator:
+        alternatives = schema["oneOf"]
+        by_type = self._get_discriminator(alternatives)
+        if by_type is not None:
+            compiled = {}
+            for value, alternative in by_type.items():
+                # Alternatives with an enum of types are compiled once.
+                compiled.setdefault(id(alternative), self.compile(alternative))
+            dispatch = {value: compiled[id(alternative)] for value, alternative in by_type.items()}
+            expected = ", ".join(map(repr, dispatch))
+
+            def check(value, path: str, errors: list[str]):
+                if not isinstance(value, dict):
+                    errors.append(f"{path}: expected object, got {_json_type(value)}")
+                elif "type" not in value:
+                    errors.append(f"{path}: missing `type`")
+                elif not isinstance(value["type"], str) or value["type"] not in dispatch:
+                    errors.append(f"{path}.type: expected one of {expected}, got {value['type']!r}")
+                else:
+                    dispatch[value["type"]](value, path, errors)
+
+            return check
+
+        validators = [self.compile(alternative) for alternative in alternatives]
+
+        def check(value, path: str, errors: list[str]):
+            matching = sum(1 for validate in validators if not _collect(validate, value, path))
+            if matching != 1:
+                errors.append(f"{path}: must match exactly one of {len(validators)} alternatives, matches {matching}")
+
+        return check
+
+    #: Supported keywords and methods compiling them.
+    KEYWORDS = {
+        "$ref": "_compile_ref",
+        "type": "_compile_type",
+        "const": "_compile_const",
+        "enum": "_compile_enum",
+        "oneOf": "_compile_one_of",
+        "required": "_compile_required",
+        "properties": "_compile_properties",
+        "additionalProperties": "_compile_additional_properties",
+        "propertyNames": "_compile_property_names",
+        "items": "_compile_items",
+        "minimum": "_compile_minimum",
+        "exclusiveMinimum": "_compile_exclusive_minimum",
+        "pattern": "_compile_pattern",
+    }
+
+
+def _collect(validate: Validator, value, path: str) -> list[str]:
+    errors = []
+    validate(value, path, errors)
+    return errors
+
+
+def get_schema() -> dict:
+    """
+    Get the JSON Schema of workflows.
+    """
+    with open(SCHEMA_PATH, "r") as f:
+        return json.load(f)
+
+
+def get_validator() -> Validator:
+    """
+    Get the validator compiled from the workflow schema. It's compiled once, on first use.
+    """
+    global _validator
+    if _validator is None:
+        _validator = SchemaCompiler(get_schema()).compile()
+    return _validator
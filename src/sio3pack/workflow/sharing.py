@@ -0,0 +1,110 @@
+from sio3pack.workflow.execution.filesystems import EmptyFilesystem, Filesystem, ImageFilesystem, ObjectFilesystem
+from sio3pack.workflow.execution.mount_namespace import MountNamespace, Mountpoint
+from sio3pack.workflow.execution.resource_group import ResourceGroup
+from sio3pack.workflow.execution.stream import FileStream, ObjectStream
+from sio3pack.workflow.object import Object
+from sio3pack.workflow.tasks import ExecutionTask, ScriptTask
+
+
+class ComponentPool:
+    """
+    Hash-consing of components of execution tasks. Components with equal
+    contents are replaced by a single shared instance. Components are compared
+    by what ends up in their JSON representation, so sharing them doesn't
+    change the workflow's JSON.
+
+    Shared components are referenced by many tasks, so they must not be
+    modified after sharing. For example, setting limits of a shared resource
+    group changes limits of all tasks which use it.
+    """
+
+    def __init__(self):
+        self.objects: dict[str, Object] = {}
+        self.filesystems: dict[tuple, Filesystem] = {}
+        self.mountpoints: dict[tuple, Mountpoint] = {}
+        self.mount_namespaces: dict[tuple, MountNamespace] = {}
+        self.resource_groups: dict[tuple, ResourceGroup] = {}
+
+    def get_object(self, obj: Object) -> Object:
+        return self.objects.setdefault(obj.handle, obj)
+
+    def get_filesystem(self, fs: Filesystem) -> Filesystem:
+        if isinstance(fs, ImageFilesystem):
+            key = ("image", fs.id, fs.image, fs.path)
+        elif isinstance(fs, EmptyFilesystem):
+            key = ("empty", fs.id)
+        elif isinstance(fs, ObjectFilesystem):
+            fs.object = self.get_object(fs.object)
+            key = ("object", fs.id, fs.object.handle)
+        else:
+            return fs
+        return self.filesystems.setdefault(key, fs)
+
+    def get_mountpoint(self, mountpoint: Mountpoint, filesystems: dict[int, Filesystem]) -> Mountpoint:
+        source = filesystems.get(id(mountpoint.source), mountpoint.source)
+        key = (id(source), mountpoint.target, mountpoint.writable, mountpoint.capacity)
+        if key not in self.mountpoints:
+            mountpoint.source = source
+            self.mountpoints[key] = mountpoint
+        return self.mountpoints[key]
+
+    def get_mount_namespace(self, ms: MountNamespace, filesystems: dict[int, Filesystem]) -> MountNamespace:
+        mountpoints = [self.get_mountpoint(mountpoint, filesystems) for mountpoint in ms.mountpoints]
+        key = (ms.id, ms.root) + tuple(id(mountpoint) for mountpoint in mountpoints)
+        if key not in self.mount_namespaces:
+            ms.mountpoints = mountpoints
+            self.mount_namespaces[key] = ms
+        return self.mount_namespaces[key]
+
+    def get_resource_group(self, rg: ResourceGroup) -> ResourceGroup:
+        key = (
+            rg.id,
+            rg.cpu_usage_limit,
+            rg.instruction_limit,
+            rg.memory_limit,
+            rg.oom_terminate_all_tasks,
+            rg.pid_limit,
+            rg.swap_limit,
+            rg.time_limit,
+        )
+        return self.resource_groups.setdefault(key, rg)
+
+    def share_task(self, task: ExecutionTask | ScriptTask):
+        """
+        Replace components of the task with shared ones.
+
+        :param task: The task to share components of.
+        """
+        if isinstance(task, ScriptTask):
+            task.objects = [self.get_object(obj) for obj in task.objects]
+            return
+
+        # Shared components are found by identity of the replaced ones.
+        filesystems = {}
+        for i, fs in enumerate(task.filesystem_manager.filesystems):
+            shared_fs = self.get_filesystem(fs)
+            filesystems[id(fs)] = shared_fs
+            task.filesystem_manager.filesystems[i] = shared_fs
+
+        namespaces = {}
+        for i, ms in enumerate(task.mountnamespace_manager.mount_namespaces):
+            shared_ms = self.get_mount_namespace(ms, filesystems)
+            namespaces[id(ms)] = shared_ms
+            task.mountnamespace_manager.mount_namespaces[i] = shared_ms
+
+        resource_groups = {}
+        for i, rg in enumerate(task.resource_group_manager.resource_groups):
+            shared_rg = self.get_resource_group(rg)
+            resource_groups[id(rg)] = shared_rg
+            task.resource_group_manager.resource_groups[i] = shared_rg
+
+        for process in task.processes:
+            if process.mount_namespace is not None:
+                process.mount_namespace = namespaces.get(id(process.mount_namespace), process.mount_namespace)
+            if process.resource_group is not None:
+                process.resource_group = resource_groups.get(id(process.resource_group), process.resource_group)
+            for stream in process.descriptor_manager.all().values():
+                if isinstance(stream, ObjectStream):
+                    stream.object = self.get_object(stream.object)
+                elif isinstance(stream, FileStream):
+                    stream.filesystem = filesystems.get(id(stream.filesystem), stream.filesystem)
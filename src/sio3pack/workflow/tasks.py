@@ -1,11 +1,11 @@
 import re
 
-from sio3pack.workflow import Object
 from sio3pack.workflow.execution.channels import Channel
 from sio3pack.workflow.execution.filesystems import Filesystem, FilesystemManager
 from sio3pack.workflow.execution.mount_namespace import MountNamespace, MountNamespaceManager
 from sio3pack.workflow.execution.process import Process
 from sio3pack.workflow.execution.resource_group import ResourceGroup, ResourceGroupManager
+from sio3pack.workflow.object import Object
 
 
 class Task:
@@ -13,6 +13,8 @@ class Task:
     Base class for a task.
     """
 
+    __slots__ = ()
+
     @classmethod
     def from_json(cls, data: dict, workflow: "Workflow"):
         """
@@ -28,11 +30,13 @@ class Task:
         else:
             raise ValueError(f"Unknown task type: {data['type']}")
 
-    def to_json(self, reg_map: dict[str, int] = None) -> dict:
+    def to_json(self, reg_map: dict[str, int] = None, memo: dict[int, dict] = None) -> dict:
         """
         Convert the task to a dictionary.
 
         :param reg_map: A mapping of register names to register numbers.
+        :param memo: A mapping of ids of already converted components to their dictionaries.
+            Components shared between tasks are converted only once.
         :return dict: The dictionary representation of the task.
         """
         raise NotImplementedError("Subclasses must implement this method.")
@@ -62,6 +66,22 @@ class ExecutionTask(Task):
     :param list[Channel] channels: Configuration of the channels for the task.
     """
 
+    __slots__ = (
+        "name",
+        "workflow",
+        "exclusive",
+        "output_register",
+        "pid_namespaces",
+        "processes",
+        "pipes",
+        "extra_limit",
+        "channels",
+        "filesystem_manager",
+        "mountnamespace_manager",
+        "resource_group_manager",
+        "hard_time_limit",
+    )
+
     def __init__(
         self,
         name: str,
@@ -133,22 +153,20 @@ class ExecutionTask(Task):
         task.processes = [Process.from_json(process, workflow, task) for process in data["processes"]]
         return task
 
-    def to_json(self, reg_map: dict[str, int] = None) -> dict:
+    def to_json(self, reg_map: dict[str, int] = None, memo: dict[int, dict] = None) -> dict:
         """
         Convert the task to a dictionary.
 
         :param reg_map: A mapping of register names to register numbers.
+        :param memo: A mapping of ids of already converted components to their dictionaries.
+            Components shared between tasks are converted only once.
         :return dict: The dictionary representation of the task.
         """
-        hard_time_limit = getattr(self, "hard_time_limit", 0)
-        if self.extra_limit is not None:
-            hard_time_limit = 0
-            for rg in self.resource_group_manager.all():
-                hard_time_limit = max(hard_time_limit, rg.time_limit)
-            hard_time_limit += self.extra_limit
+        hard_time_limit = self.get_hard_time_limit()
 
+        output_register = self.output_register
         if reg_map:
-            self.output_register = reg_map.get(self.output_register, self.output_register)
+            output_register = reg_map.get(output_register, output_register)
 
         res = {
             "name": self.name,
@@ -156,16 +174,42 @@ class ExecutionTask(Task):
             "channels": [channel.to_json() for channel in self.channels],
             "exclusive": self.exclusive,
             "hard_time_limit": hard_time_limit,
-            "output_register": self.output_register,
+            "output_register": output_register,
             "pid_namespaces": self.pid_namespaces,
-            "filesystems": self.filesystem_manager.to_json(),
-            "mount_namespaces": self.mountnamespace_manager.to_json(),
+            "filesystems": self.filesystem_manager.to_json(memo),
+            "mount_namespaces": self.mountnamespace_manager.to_json(memo),
             "pipes": self.pipes,
-            "resource_groups": self.resource_group_manager.to_json(),
+            "resource_groups": self.resource_group_manager.to_json(memo),
             "processes": [process.to_json() for process in self.processes],
         }
         return res
 
+    def get_hard_time_limit(self) -> int:
+        """
+        Get the hard time limit of the task. If ``extra_limit`` is set, it's the maximum
+        time limit of all resource groups plus ``extra_limit``.
+
+        :return: The hard time limit, or 0 if the task has none.
+        """
+        if self.extra_limit is not None:
+            hard_time_limit = 0
+            for rg in self.resource_group_manager.all():
+                hard_time_limit = max(hard_time_limit, rg.time_limit)
+            return hard_time_limit + self.extra_limit
+        return getattr(self, "hard_time_limit", 0)
+
+    def get_worst_case_time(self) -> int:
+        """
+        Get the longest time the task can run for. It's the hard time limit of the task,
+        or the maximum time limit of its resource groups if the task has no hard time limit.
+
+        :return: The time in the same unit as time limits.
+        """
+        hard_time_limit = self.get_hard_time_limit()
+        if hard_time_limit:
+            return hard_time_limit
+        return max((rg.time_limit for rg in self.resource_group_manager.all()), default=0)
+
     def add_filesystem(self, filesystem: Filesystem):
         """
         Add a filesystem to the task.
@@ -228,6 +272,8 @@ class ScriptTask(Task):
     :param str script: The script to run.
     """
 
+    __slots__ = ("name", "workflow", "reactive", "input_registers", "output_registers", "objects", "script")
+
     def __init__(
         self,
         name: str,
@@ -277,31 +323,35 @@ class ScriptTask(Task):
             data["script"],
         )
 
-    def to_json(self, reg_map: dict[str, int] = None) -> dict:
+    def to_json(self, reg_map: dict[str, int] = None, memo: dict[int, dict] = None) -> dict:
         """
         Convert the task to a dictionary.
 
         :param reg_map: A mapping of register names to register numbers.
+        :param memo: Unused, script tasks have no shared components.
         :return: The dictionary representation of the task.
         """
+        input_registers = self.input_registers
+        output_registers = self.output_registers
+        script = self.script
         if reg_map:
-            self.input_registers = [reg_map.get(reg, reg) for reg in self.input_registers]
-            self.output_registers = [reg_map.get(reg, reg) for reg in self.output_registers]
+            input_registers = [reg_map.get(reg, reg) for reg in input_registers]
+            output_registers = [reg_map.get(reg, reg) for reg in output_registers]
 
             # Now, replace the register names in the script. Since we want this to not be slow
             # let's use regex.
             reg_pattern = r"<(r:[a-zA-Z0-9_]+)>"
             obs_pattern = r"<(obsreg:[a-zA-Z0-9_]+)>"
-            self.script = re.sub(reg_pattern, lambda m: f"{reg_map.get(m.group(1), m.group(1))}", self.script)
-            self.script = re.sub(obs_pattern, lambda m: f"{reg_map.get(m.group(1), m.group(1))}", self.script)
+            script = re.sub(reg_pattern, lambda m: f"{reg_map.get(m.group(1), m.group(1))}", script)
+            script = re.sub(obs_pattern, lambda m: f"{reg_map.get(m.group(1), m.group(1))}", script)
 
         res = {
             "name": self.name,
             "type": "script",
             "reactive": self.reactive,
-            "input_registers": self.input_registers,
-            "output_registers": self.output_registers,
-            "script": self.script,
+            "input_registers": input_registers,
+            "output_registers": output_registers,
+            "script": script,
         }
         if self.objects:
             res["objects"] = [obj.handle for obj in self.objects]
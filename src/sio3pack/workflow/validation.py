@@ -0,0 +1,141 @@
+from sio3pack.exceptions import WorkflowValidationError
+from sio3pack.workflow.schema import get_validator
+
+
+def _is_template(value) -> bool:
+    # Registers and handles with templates get their final form only when the workflow is used.
+    return isinstance(value, str) and "<" in value
+
+
+def _is_index(value) -> bool:
+    return (isinstance(value, int) and not isinstance(value, bool) and value >= 0) or (
+        isinstance(value, str) and value.isdigit()
+    )
+
+
+def _list(data: dict, key: str) -> list:
+    value = data.get(key)
+    return value if isinstance(value, list) else []
+
+
+def _dicts(data: dict, key: str) -> list[tuple[int, dict]]:
+    return [(i, item) for i, item in enumerate(_list(data, key)) if isinstance(item, dict)]
+
+
+class _ReferenceChecker:
+    """
+    Checks references which the schema can't express: indices of components of
+    execution tasks and registers read by script tasks. Values of wrong types are
+    skipped, since the schema already reports them.
+    """
+
+    def __init__(self, errors: list[str]):
+        self.errors = errors
+
+    def check_index(self, data: dict, key: str, size: int, what: str, path: str):
+        value = data.get(key)
+        if _is_index(value) and int(value) >= size:
+            self.errors.append(f"{path}.{key}: {what} {value} doesn't exist, there are {size}")
+
+    def check_workflow(self, data: dict, path: str):
+        tasks = _dicts(data, "tasks")
+        # Tasks are scheduled by their dependencies, not by their order, so a register
+        # read by a task can be written by any task in the workflow.
+        written = set()
+        for _, task in tasks:
+            if task.get("type") == "execution" and isinstance(task.get("output_register"), (int, str)):
+                written.add(task["output_register"])
+            elif task.get("type") == "script":
+                written.update(reg for reg in _list(task, "output_registers") if isinstance(reg, (int, str)))
+
+        for i, task in tasks:
+            task_path = f"{path}.tasks[{i}]"
+            if task.get("type") == "execution":
+                self.check_execution_task(task, task_path)
+            elif task.get("type") == "script":
+                for j, register in enumerate(_list(task, "input_registers")):
+                    if isinstance(register, (int, str)) and not _is_template(register) and register not in written:
+                        self.errors.append(
+                            f"{task_path}.input_registers[{j}]: register {register!r} is read but never written"
+                        )
+
+    def check_execution_task(self, task: dict, path: str):
+        pipes = int(task["pipes"]) if _is_index(task.get("pipes")) else 0
+        pid_namespaces = int(task["pid_namespaces"]) if _is_index(task.get("pid_namespaces")) else 0
+        filesystems = len(_list(task, "filesystems"))
+        namespaces = len(_list(task, "mount_namespaces"))
+        resource_groups = len(_list(task, "resource_groups"))
+        processes = len(_list(task, "processes"))
+
+        for i, channel in _dicts(task, "channels"):
+            self.check_index(channel, "source_pipe", pipes, "pipe", f"{path}.channels[{i}]")
+            self.check_index(channel, "target_pipe", pipes, "pipe", f"{path}.channels[{i}]")
+        for i, ms in _dicts(task, "mount_namespaces"):
+            for j, mountpoint in _dicts(ms, "mountpoints"):
+                mp_path = f"{path}.mount_namespaces[{i}].mountpoints[{j}]"
+                self.check_index(mountpoint, "source", filesystems, "filesystem", mp_path)
+
+        for i, process in _dicts(task, "processes"):
+            process_path = f"{path}.processes[{i}]"
+            self.check_index(process, "mount_namespace", namespaces, "mount namespace", process_path)
+            self.check_index(process, "resource_group", resource_groups, "resource group", process_path)
+            self.check_index(process, "pid_namespace", pid_namespaces, "PID namespace", process_path)
+            for j, other in enumerate(_list(process, "start_after")):
+                if not isinstance(other, int) or isinstance(other, bool) or other < 0:
+                    continue
+                if other >= processes:
+                    self.errors.append(
+                        f"{process_path}.start_after[{j}]: process {other} doesn't exist, there are {processes}"
+                    )
+                elif other == i:
+                    self.errors.append(f"{process_path}.start_after[{j}]: a process can't start after itself")
+
+            descriptors = process.get("descriptors")
+            if not isinstance(descriptors, dict):
+                continue
+            for fd, stream in descriptors.items():
+                stream_path = f"{process_path}.descriptors[{fd}]"
+                if not isinstance(stream, dict):
+                    continue
+                if stream.get("type") == "file":
+                    self.check_index(stream, "filesystem", filesystems, "filesystem", stream_path)
+                elif stream.get("type") in ("pipe_read", "pipe_write"):
+                    self.check_index(stream, "pipe", pipes, "pipe", stream_path)
+
+
+def validate_workflow(data: dict, path: str = "workflow") -> list[str]:
+    """
+    Find structural errors in a workflow in its JSON form, before any part of it is built.
+    The workflow is checked against the workflow schema (``workflow.schema.json``) with
+    a precompiled validator, then references between its components are checked. Both
+    are linear in the size of the workflow. Every error is reported with the path to
+    the faulty element, for example
+    ``workflow.tasks[2].mount_namespaces[0].mountpoints[1].source: filesystem 3 doesn't exist, there are 2``.
+    Registers with templates (like ``<TEST_ID>``) aren't checked, since they get
+    their final form only when the workflow is used.
+
+    :param dict data: The workflow as a dictionary.
+    :param str path: The path to the workflow, used as the prefix of paths in errors.
+    :return: A list of errors, empty if the workflow is valid.
+    """
+    errors = []
+    get_validator()(data, path, errors)
+    if isinstance(data, dict):
+        _ReferenceChecker(errors).check_workflow(data, path)
+    return errors
+
+
+def check_workflows(workflows: dict[str, dict]):
+    """
+    Validate workflows by their names and raise an error listing all problems in them.
+
+    :param dict[str, dict] workflows: Workflows as dictionaries, by their names.
+    :raises WorkflowValidationError: If any of the workflows is invalid.
+    """
+    if not isinstance(workflows, dict):
+        raise WorkflowValidationError([f"workflows: expected object, got {type(workflows).__name__}"])
+    errors = []
+    for name, data in workflows.items():
+        errors.extend(validate_workflow(data, name))
+    if errors:
+        raise WorkflowValidationError(errors)
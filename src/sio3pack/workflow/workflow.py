@@ -1,6 +1,12 @@
-from sio3pack.workflow import ExecutionTask, Object, ScriptTask
-from sio3pack.workflow.object import ObjectList, ObjectsManager
-from sio3pack.workflow.tasks import Task
+from sio3pack.instrumentation import instrumented
+from sio3pack.workflow.dag import WorkflowDAG
+from sio3pack.workflow.metrics import WorkflowMetrics
+from sio3pack.workflow.object import Object, ObjectList, ObjectsManager
+from sio3pack.workflow.optimizations import optimize
+from sio3pack.workflow.parametric import compact_workflow, expand_workflow, is_parametric
+from sio3pack.workflow.register_map import RegisterMap
+from sio3pack.workflow.sharing import ComponentPool
+from sio3pack.workflow.tasks import ExecutionTask, ScriptTask, Task
 
 
 class Workflow:
@@ -15,13 +21,18 @@ class Workflow:
     :param list[Task] tasks: The tasks in the workflow.
     """
 
+    __slots__ = ("name", "observable_registers", "tasks", "objects_manager", "external_objects", "observable_objects")
+
     @classmethod
     def from_json(cls, data: dict):
         """
-        Create a new workflow from a dictionary.
+        Create a new workflow from a dictionary. Dictionaries in the parametric
+        encoding (see :meth:`to_json`) are expanded first.
 
         :param data: The dictionary to create the workflow from.
         """
+        if is_parametric(data):
+            data = expand_workflow(data)
         workflow = cls(data["name"], data["external_objects"], data["observable_objects"], data["observable_registers"])
         for task in data["tasks"]:
             workflow.add_task(Task.from_json(task, workflow))
@@ -81,6 +92,33 @@ class Workflow:
                 num_registers = max([num_registers, max(task.input_registers), max(task.output_registers)])
         return num_registers + 1 if len(self.tasks) > 0 else 0
 
+    def get_dag(self) -> WorkflowDAG:
+        """
+        Get explicit dependencies between tasks of the workflow, derived from
+        objects and registers they read and write.
+
+        :return WorkflowDAG: The dependency graph of the workflow.
+        """
+        return WorkflowDAG(self)
+
+    def optimize(self):
+        """
+        Merge execution tasks which do the same work, remove tasks whose outputs are
+        neither observable nor used by other tasks, and objects which no task uses.
+        The workflow's results don't change, so it's safe to optimize every workflow
+        before running it.
+        """
+        optimize(self)
+
+    def get_metrics(self) -> WorkflowMetrics:
+        """
+        Get size and complexity metrics of the workflow, like numbers of tasks,
+        processes and objects and the worst-case running time.
+
+        :return WorkflowMetrics: The metrics of the workflow.
+        """
+        return WorkflowMetrics.from_workflow(self)
+
     def only_string_registers(self) -> bool:
         """
         Check if all registers in the workflow are strings.
@@ -100,58 +138,95 @@ class Workflow:
                         return False
         return True
 
-    def to_json(self, to_int_regs: bool = False) -> dict:
+    def get_register_map(self) -> RegisterMap:
+        """
+        Get the mapping of register names to the numbers used by :meth:`to_json` with
+        ``to_int_regs=True``. Observable registers get the lowest numbers. It can be
+        used to map results returned by workers back to register names.
+
+        :return RegisterMap: The mapping of register names to numbers.
+        """
+        if not self.only_string_registers():
+            raise TypeError("Not all registers are strings")
+
+        observable_regs = set()
+        regs = set()
+        for task in self.tasks:
+            if isinstance(task, ExecutionTask):
+                if task.output_register.startswith("obsreg"):
+                    observable_regs.add(task.output_register)
+                else:
+                    regs.add(task.output_register)
+            elif isinstance(task, ScriptTask):
+                for reg in task.input_registers:
+                    if reg.startswith("obsreg"):
+                        observable_regs.add(reg)
+                    else:
+                        regs.add(reg)
+                for reg in task.output_registers:
+                    if reg.startswith("obsreg"):
+                        observable_regs.add(reg)
+                    else:
+                        regs.add(reg)
+
+        observable_regs = {name: i for i, name in enumerate(sorted(observable_regs))}
+        regs = {name: i + len(observable_regs) for i, name in enumerate(sorted(regs))}
+        return RegisterMap(
+            {**observable_regs, **regs},
+            observable_registers=len(observable_regs),
+            observable_objects=[obj.handle for obj in self.observable_objects],
+        )
+
+    @instrumented("workflow.to_json")
+    def to_json(
+        self, to_int_regs: bool = False, with_register_map: bool = False, parametric: bool = False
+    ) -> dict | tuple[dict, RegisterMap]:
         """
-        Convert the workflow to a dictionary.
+        Convert the workflow to a dictionary. The workflow isn't modified.
 
         :param bool to_int_regs: Whether to convert registers to integers.
+        :param bool with_register_map: If True, return a tuple of the dictionary and the
+            :class:`RegisterMap` used to convert registers, which can be used to decode
+            results of the workflow. Requires ``to_int_regs``.
+        :param bool parametric: Whether to use the parametric encoding, where tasks with
+            the same structure are stored once, as a template, and every task is a list
+            of its template's index and the values which differ between the tasks (see
+            :mod:`sio3pack.workflow.parametric`). It's much smaller for workflows with
+            many tests. :meth:`from_json` and :func:`~sio3pack.workflow.parametric.expand_workflow`
+            convert it back.
         :return dict: The dictionary representation of the workflow.
         """
+        if with_register_map and not to_int_regs:
+            raise ValueError("Register map is only available with integer registers")
+        # Components shared between tasks are converted only once.
+        memo = {}
         if to_int_regs:
-            if not self.only_string_registers():
-                raise TypeError("Not all registers are strings")
-
-            observable_regs = set()
-            regs = set()
-            for task in self.tasks:
-                if isinstance(task, ExecutionTask):
-                    if task.output_register.startswith("obsreg"):
-                        observable_regs.add(task.output_register)
-                    else:
-                        regs.add(task.output_register)
-                elif isinstance(task, ScriptTask):
-                    for reg in task.input_registers:
-                        if reg.startswith("obsreg"):
-                            observable_regs.add(reg)
-                        else:
-                            regs.add(reg)
-                    for reg in task.output_registers:
-                        if reg.startswith("obsreg"):
-                            observable_regs.add(reg)
-                        else:
-                            regs.add(reg)
-
-            num_observable_regs = len(observable_regs)
-            observable_regs = {name: i for i, name in enumerate(sorted(observable_regs))}
-            regs = {name: i + len(observable_regs) for i, name in enumerate(sorted(regs))}
-            reg_map = {**observable_regs, **regs}
-            return {
+            reg_map = self.get_register_map()
+            data = {
                 "name": self.name,
                 "external_objects": [obj.handle for obj in self.external_objects],
-                "observable_objects": [obj.handle for obj in self.observable_objects],
-                "observable_registers": num_observable_regs,
-                "tasks": [task.to_json(reg_map) for task in self.tasks],
+                "observable_objects": reg_map.observable_objects,
+                "observable_registers": reg_map.observable_registers,
+                "tasks": [task.to_json(reg_map, memo) for task in self.tasks],
                 "registers": self.get_num_registers(),
             }
+            if parametric:
+                data = compact_workflow(data)
+            if with_register_map:
+                return data, reg_map
+            return data
 
-        return {
+        data = {
             "name": self.name,
             "external_objects": [obj.handle for obj in self.external_objects],
             "observable_objects": [obj.handle for obj in self.observable_objects],
             "registers": self.get_num_registers(),
             "observable_registers": self.observable_registers,
-            "tasks": [task.to_json() for task in self.tasks],
+            "tasks": [task.to_json(memo=memo) for task in self.tasks],
         }
+        if parametric:
+            data = compact_workflow(data)
+        return data
 
     def add_task(self, task: Task):
         """
@@ -185,6 +260,7 @@ class Workflow:
         """
         self.observable_objects.append(obj)
 
+    @instrumented("workflow.replace_templates")
     def replace_templates(self, replacements: dict[str, str]):
         """
         Replace strings in the workflow with the given replacements.
@@ -211,22 +287,48 @@ class Workflow:
         res = self.objects_manager.find_by_regex_in_objects(regex, return_group)
         return res
 
-    def union(self, other: "Workflow"):
+    @instrumented("workflow.share_components")
+    def share_components(self):
+        """
+        Store identical components of tasks once. Objects with the same handle,
+        and filesystems, mount namespaces and resource groups with the same
+        contents are replaced by a single shared instance. The JSON representation
+        of the workflow doesn't change, but the workflow takes less memory and
+        is converted to JSON faster.
+
+        Shared components are used by many tasks, so the workflow shouldn't be
+        modified after calling this method.
+        """
+        pool = ComponentPool()
+        for obj in self.objects_manager.objects.values():
+            pool.get_object(obj)
+        self.external_objects.objects = [pool.get_object(obj) for obj in self.external_objects]
+        self.observable_objects.objects = [pool.get_object(obj) for obj in self.observable_objects]
+        for task in self.tasks:
+            pool.share_task(task)
+
+    @instrumented("workflow.union")
+    def union(self, *others: "Workflow"):
         """
-        Add another workflow to this workflow. Merge all objects and tasks.
+        Add other workflows to this workflow. Merge all objects and tasks.
+        Merging many workflows with one call takes time linear in their size,
+        while merging them one by one takes time quadratic in their number.
 
-        :param Workflow other: Other workflow to merge into this.
+        :param Workflow others: Other workflows to merge into this, in order.
         """
         # TODO: maybe add validating that two tasks dont create
         #   objects with the same name?
 
         # Merge objects.
-        self.observable_objects.union(other.observable_objects)
-        self.external_objects.union(other.external_objects)
-
-        # Merge tasks.
-        self.tasks += other.tasks
-
-        # If registers are not strings, we need to increase `self.observable_registers`
-        if not self.only_string_registers():
-            self.observable_registers += other.observable_registers
+        self.observable_objects.union(*[other.observable_objects for other in others])
+        self.external_objects.union(*[other.external_objects for other in others])
+
+        string_registers = self.only_string_registers()
+        for other in others:
+            # Merge tasks.
+            self.tasks += other.tasks
+
+            # If registers are not strings, we need to increase `self.observable_registers`
+            string_registers = string_registers and other.only_string_registers()
+            if not string_registers:
+                self.observable_registers += other.observable_registers
@@ -1,13 +1,16 @@
 import copy
+import functools
 from enum import Enum
 from typing import Any
 
 from sio3pack.files import File
-from sio3pack.test import Test
-from sio3pack.workflow import ExecutionTask, constants
+from sio3pack.test.ordering import RunOrdering
+from sio3pack.test.test import Test
+from sio3pack.workflow import constants
 from sio3pack.workflow.execution import MountNamespace, ObjectWriteStream, Process, ResourceGroup
 from sio3pack.workflow.execution.filesystems import ObjectFilesystem
 from sio3pack.workflow.execution.mount_namespace import Mountpoint
+from sio3pack.workflow.tasks import ExecutionTask
 from sio3pack.workflow.workflow import Workflow
 from sio3pack.workflow.workflow_op import WorkflowOperation
 
@@ -33,9 +36,6 @@ class WorkflowManager:
 
         self.package = package
         self.workflows = workflows
-        self._has_test_gen = False
-        self._has_verify = False
-        self._unpack_stage = UnpackStage.NONE
 
     def get(self, name: str) -> Workflow:
         """
@@ -81,7 +81,7 @@ class WorkflowManager:
         # TODO: implement this
         raise NotImplementedError
 
-    def get_compile_file_workflow(self, file: File | str) -> tuple[Workflow, str]:
+    def get_compile_file_workflow(self, file: File | str, use_cache: bool = True) -> tuple[Workflow, str]:
         """
         A helper function to get a workflow for compiling the given file.
         The file should be a program file, not a test file.
@@ -89,9 +89,22 @@ class WorkflowManager:
         The files are not added as external or observable objects,
         since they don't have to be.
 
+        If the package's executable cache has an up-to-date executable for the file,
+        the returned workflow has no tasks and the cached executable is added
+        as its external object. Otherwise, the executable is stored in the cache
+        by :meth:`register_compiled_executables` once the compilation succeeds.
+
         :param file: The file (or the path to the file) to compile.
+        :param use_cache: Whether to use the package's executable cache.
         :return: A tuple of the workflow and the path to the compiled file.
         """
+        if use_cache:
+            cached_path = self.package.get_cached_executable_path(file)
+            if cached_path is not None:
+                wf = Workflow(f"Use cached executable for {file.path if isinstance(file, File) else file}")
+                wf.add_external_object(wf.objects_manager.get_or_create_object(cached_path))
+                return wf, cached_path
+
         if isinstance(file, File):
             file = file.path
         exe_path = self.package.get_executable_path(file)
@@ -107,6 +120,44 @@ class WorkflowManager:
         )
         return wf, exe_path
 
+    def register_compiled_executables(self, workflow: Workflow, data: dict, programs: list[File | str]):
+        """
+        Store executables of the given programs compiled by the workflow in the package's
+        executable cache, if the worker reported that the compilation succeeded, that is
+        the status ``OK`` in the ``obsreg:compilation_result`` register. Operations created
+        by the manager call it with the programs they compile when results of their workflows
+        are returned. Operations built by hand should call it too, or register executables
+        with :meth:`sio3pack.Package.register_compiled_executable`.
+
+        :param workflow: The workflow the results are for.
+        :param data: The results of the workflow, by names or numbers of registers.
+        :param programs: The programs (or paths to the programs) the workflow may compile.
+        """
+        compile_tasks = [
+            task
+            for task in workflow.tasks
+            if isinstance(task, ExecutionTask) and task.output_register == "obsreg:compilation_result"
+        ]
+        if not compile_tasks:
+            return
+        if any(isinstance(register, int) or register.isdigit() for register in data):
+            data = workflow.get_register_map().decode(data)
+        result = data.get("obsreg:compilation_result")
+        status = result.get("status") if isinstance(result, dict) else result
+        if status != "OK":
+            return
+        programs_by_exe = {self.package.get_executable_path(program): program for program in programs}
+        for task in compile_tasks:
+            # Compilers write executables to object streams.
+            for process in task.processes:
+                for stream in process.descriptor_manager.all().values():
+                    if not isinstance(stream, ObjectWriteStream):
+                        continue
+                    exe_path = stream.object.handle
+                    program = programs_by_exe.get(exe_path)
+                    if program is not None:
+                        self.package.register_compiled_executable(program, exe_path)
+
     def _get_compile_cpp_workflow(self) -> Workflow:
         """
         Creates a workflow that compiles a cpp file.
@@ -224,62 +275,113 @@ class WorkflowManager:
 
         return wf
 
-    def _get_compile_files_workflows(self, data: dict) -> tuple[Workflow, bool]:
+    def _get_compile_files_workflows(self, data: dict, state: dict) -> tuple[Workflow, bool]:
         """
         Creates workflows for compiling required files, like checkers.
         """
         raise NotImplementedError
 
-    def _get_generate_tests_workflows(self, data: dict) -> tuple[Workflow, bool]:
+    def _get_generate_tests_workflows(self, data: dict, state: dict) -> tuple[Workflow, bool]:
         """
         Creates workflows for generating tests.
         """
         raise NotImplementedError
 
-    def _get_verify_workflows(self, data: dict) -> tuple[Workflow, bool]:
+    def _get_verify_workflows(self, data: dict, state: dict) -> tuple[Workflow, bool]:
         raise NotImplementedError
 
-    def _get_unpack_workflows(self, data: dict) -> tuple[Workflow, bool]:
+    def _get_unpack_workflows(self, data: dict, state: dict) -> tuple[Workflow, bool]:
         """
         Get all workflows that are used to unpack the given data.
+
+        :param data: The results of the previous workflow.
+        :param state: The state of the unpack operation, created by :meth:`_create_unpack_state`.
         """
-        if self._unpack_stage == UnpackStage.COMPILE_FILES:
-            workflow, last = self._get_compile_files_workflows(data)
+        if state["stage"] == UnpackStage.COMPILE_FILES:
+            workflow, last = self._get_compile_files_workflows(data, state)
             if last:
-                if self._has_test_gen:
-                    self._unpack_stage = UnpackStage.GEN_TESTS
-                elif self._has_verify:
-                    self._unpack_stage = UnpackStage.VERIFY
+                if state["has_test_gen"]:
+                    state["stage"] = UnpackStage.GEN_TESTS
+                elif state["has_verify"]:
+                    state["stage"] = UnpackStage.VERIFY
                 else:
-                    self._unpack_stage = UnpackStage.FINISHED
-        elif self._unpack_stage == UnpackStage.GEN_TESTS:
-            workflow, last = self._get_generate_tests_workflows(data)
+                    state["stage"] = UnpackStage.FINISHED
+        elif state["stage"] == UnpackStage.GEN_TESTS:
+            workflow, last = self._get_generate_tests_workflows(data, state)
             if last:
-                if self._has_verify:
-                    self._unpack_stage = UnpackStage.VERIFY
+                if state["has_verify"]:
+                    state["stage"] = UnpackStage.VERIFY
                 else:
-                    self._unpack_stage = UnpackStage.FINISHED
-        elif self._unpack_stage == UnpackStage.VERIFY:
-            workflow, last = self._get_verify_workflows(data)
+                    state["stage"] = UnpackStage.FINISHED
+        elif state["stage"] == UnpackStage.VERIFY:
+            workflow, last = self._get_verify_workflows(data, state)
             if last:
-                self._unpack_stage = UnpackStage.FINISHED
+                state["stage"] = UnpackStage.FINISHED
         else:
-            raise ValueError(f"Invalid unpack stage: {self._unpack_stage}")
-        return workflow, self._unpack_stage == UnpackStage.FINISHED
+            raise ValueError(f"Invalid unpack stage: {state['stage']}")
+        return workflow, state["stage"] == UnpackStage.FINISHED
+
+    def _create_unpack_state(self, has_test_gen: bool, has_verify: bool) -> dict:
+        """
+        Create the state of a new unpack operation. The state is kept by the operation,
+        so that the manager can serve many operations at once.
+        """
+        # At first, compile all required files
+        return {"stage": UnpackStage.COMPILE_FILES, "has_test_gen": has_test_gen, "has_verify": has_verify}
+
+    def _get_unpack_state(self, state: dict) -> dict:
+        """
+        Get the state of an unpack operation as a JSON-serializable dictionary.
+        """
+        return {"stage": state["stage"].name, "has_test_gen": state["has_test_gen"], "has_verify": state["has_verify"]}
+
+    def _set_unpack_state(self, state: dict, data: dict):
+        """
+        Restore the state of an unpack operation returned by :meth:`_get_unpack_state`.
+        """
+        state["stage"] = UnpackStage[data["stage"]]
+        state["has_test_gen"] = data["has_test_gen"]
+        state["has_verify"] = data["has_verify"]
+
+    def _get_unpack_programs(self) -> list[File]:
+        """
+        Get the programs which are compiled when unpacking the package.
+        """
+        return []
 
     def get_unpack_operation(
-        self, has_test_gen: bool, has_verify: bool, return_func: callable = None
+        self, has_test_gen: bool, has_verify: bool, return_func: callable = None, state: dict = None
     ) -> WorkflowOperation:
-        self._has_test_gen = has_test_gen
-        self._has_verify = has_verify
-        # At first, compile all required files
-        self._unpack_stage = UnpackStage.COMPILE_FILES
+        """
+        Get the operation unpacking the package.
+
+        :param has_test_gen: Whether the package generates tests.
+        :param has_verify: Whether the package verifies tests.
+        :param return_func: A function called with results of workflows.
+        :param state: The state of the operation, if a subclass created it. By default,
+            it's created with :meth:`_create_unpack_state`.
+        """
+        if state is None:
+            state = self._create_unpack_state(has_test_gen, has_verify)
         return WorkflowOperation(
-            self._get_unpack_workflows, return_results=(return_func is not None), return_results_func=return_func
+            self._get_unpack_workflows,
+            return_results=(return_func is not None),
+            return_results_func=return_func,
+            get_state_func=functools.partial(self._get_unpack_state, state),
+            set_state_func=functools.partial(self._set_unpack_state, state),
+            on_results=functools.partial(self.register_compiled_executables, programs=self._get_unpack_programs()),
+            state=state,
         )
 
     def get_run_operation(
-        self, program: File, tests: list[Test] | None = None, return_func: callable = None
+        self,
+        program: File,
+        tests: list[Test] | None = None,
+        return_func: callable = None,
+        chunk_size: int | None = None,
+        fail_fast: bool = False,
+        ordering: RunOrdering = RunOrdering.DEFAULT,
+        failure_counts: dict[str, int] | None = None,
     ) -> WorkflowOperation:
         raise NotImplementedError
 
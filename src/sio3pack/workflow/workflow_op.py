@@ -1,29 +1,201 @@
+import asyncio
+import copy
+import inspect
+from concurrent.futures import Executor
+from typing import Awaitable, Callable
+
+from sio3pack.instrumentation import span
+from sio3pack.workflow.workflow import Workflow
+
+
+def _decode_results(workflow: Workflow | None, data: dict) -> dict:
+    """
+    Replace numbers of registers in results of the workflow with their names,
+    if the workflow was serialized with integer registers.
+    """
+    if workflow is None or not any(isinstance(key, int) or key.isdigit() for key in data):
+        return data
+    if not workflow.only_string_registers():
+        return data
+    return workflow.get_register_map().decode(data)
+
+
 class WorkflowOperation:
+    """
+    An operation that consists of a sequence of workflows. Each workflow is created
+    by ``get_workflow_func`` with the results of the previous workflows.
+
+    :param callable get_workflow_func: A function that gets the results and returns
+        a tuple of the next workflow and whether it's the last one.
+    :param bool return_results: Whether the results should be passed to ``return_results_func``.
+    :param callable return_results_func: A function called with the workflow and its results.
+    :param bool collect_results: If True, results returned for different workflows are merged
+        instead of replaced, so that workflows can be run concurrently. Numbers of registers
+        are replaced with their names before merging.
+    :param callable get_state_func: A function returning the state kept by ``get_workflow_func``
+        between workflows, for example the stage of unpacking. Required for :meth:`checkpoint`.
+    :param callable set_state_func: A function restoring the state returned by ``get_state_func``.
+    :param callable on_results: A function called with the workflow and its results every time
+        results are returned, also when they aren't passed to ``return_results_func``. Workflow
+        managers use it to keep the package up to date, for example its executable cache.
+
+    Operations can also be driven from an asyncio event loop, with ``async for`` over
+    :meth:`get_workflow_async` (or the operation itself) and :meth:`return_results_async`,
+    or with :meth:`run_async`, which runs the whole operation. Many operations can be
+    driven concurrently in a single thread, for example with ``asyncio.gather``.
+    """
+
     def __init__(
         self,
         get_workflow_func: callable,
         return_results=False,
         return_results_func: callable = None,
         *wf_args,
-        **wf_kwargs
+        collect_results: bool = False,
+        get_state_func: callable = None,
+        set_state_func: callable = None,
+        on_results: callable = None,
+        **wf_kwargs,
     ):
         self.get_workflow_func = get_workflow_func
-        self.return_results = return_results
+        self.should_return_results = return_results
         self.return_results_func = return_results_func
+        self.collect_results = collect_results
+        self.get_state_func = get_state_func
+        self.set_state_func = set_state_func
+        self.on_results = on_results
         self._last = False
         self._data = None
         self._workflow = None
+        # Workflows whose results weren't returned yet, by their IDs.
+        self._pending: dict[int, Workflow] = {}
         self._workflow_args = wf_args
         self._workflow_kwargs = wf_kwargs
+        # The state before creating the last workflow, kept until its results are returned.
+        # Results aren't copied until the checkpoint is requested, since they're replaced,
+        # not modified, when results are returned.
+        self._checkpoint = None
 
-    def get_workflow(self):
-        while not self._last:
+    def _get_state(self) -> dict:
+        return {"last": self._last, "data": self._data, "state": self.get_state_func()}
+
+    def _next_workflow(self) -> Workflow:
+        if self.get_state_func is not None:
+            self._checkpoint = self._get_state()
+        with span("workflow_operation.get_workflow", function=self.get_workflow_func.__name__):
             self._workflow, self._last = self.get_workflow_func(
                 self._data, *self._workflow_args, **self._workflow_kwargs
             )
-            yield self._workflow
+        self._pending[id(self._workflow)] = self._workflow
+        return self._workflow
+
+    def get_workflow(self):
+        while not self._last:
+            yield self._next_workflow()
+
+    async def get_workflow_async(self, executor: Executor = None):
+        """
+        Asynchronously iterate over workflows of the operation. As with :meth:`get_workflow`,
+        results of a workflow should be returned before the next one is requested.
+
+        :param Executor executor: If given, workflows are created in this executor, so that
+            creating large workflows doesn't block the event loop. By default, they are
+            created in the event loop's thread.
+        """
+        loop = asyncio.get_running_loop()
+        while not self._last:
+            if executor is None:
+                yield self._next_workflow()
+            else:
+                yield await loop.run_in_executor(executor, self._next_workflow)
+
+    def __aiter__(self):
+        return self.get_workflow_async()
+
+    def return_results(self, data: dict, workflow: Workflow = None):
+        """
+        Return the results of a workflow. They are passed to the function creating
+        the next workflow.
+
+        :param data: The results.
+        :param workflow: The workflow the results are for. Required if results of more than
+            one workflow are awaited, for example when chunks of a run are run concurrently.
+            Defaults to the only workflow whose results weren't returned yet.
+        """
+        if workflow is None:
+            if len(self._pending) > 1:
+                raise ValueError(f"Results of {len(self._pending)} workflows are awaited, the workflow has to be given")
+            workflow = next(iter(self._pending.values()), self._workflow)
+        self._pending.pop(id(workflow), None)
+        if self.collect_results:
+            # Numbers of registers differ between workflows, so they can't be merged.
+            merged = _decode_results(workflow, data)
+            self._data = merged if self._data is None else {**self._data, **merged}
+        else:
+            self._data = data
+        self._checkpoint = None
+        if self.on_results:
+            self.on_results(workflow, data)
+        if self.should_return_results and self.return_results_func:
+            return self.return_results_func(workflow, data)
+
+    def checkpoint(self) -> dict:
+        """
+        Get the state of the operation, from which it can be resumed with :meth:`restore`,
+        also by another process. Only completed workflows are included: if results of
+        the last created workflow weren't returned yet, it's created again after resuming.
+        Results returned so far are kept, so a resumed operation uses objects produced
+        by completed workflows instead of producing them again. The state is JSON-serializable
+        if the results are.
+
+        :return: The state of the operation.
+        """
+        if self.get_state_func is None:
+            raise ValueError(f"Operation using {self.get_workflow_func.__name__} can't be checkpointed")
+        return copy.deepcopy(self._checkpoint if self._checkpoint is not None else self._get_state())
+
+    def restore(self, checkpoint: dict):
+        """
+        Resume the operation from a state returned by :meth:`checkpoint`. The operation
+        should be created the same way as the checkpointed one, for example with
+        :meth:`sio3pack.Package.get_unpack_operation` of the same package.
+
+        :param dict checkpoint: The state of the operation.
+        """
+        if self.set_state_func is None:
+            raise ValueError(f"Operation using {self.get_workflow_func.__name__} can't be restored")
+        self._last = checkpoint["last"]
+        self._data = copy.deepcopy(checkpoint["data"])
+        self.set_state_func(checkpoint["state"])
+        self._checkpoint = None
+        self._pending = {}
+
+    async def return_results_async(self, data: dict, workflow: Workflow = None):
+        """
+        Return the results of a workflow, like :meth:`return_results`. ``return_results_func``
+        can be a coroutine function, in which case it's awaited.
+
+        :param data: The results.
+        :param workflow: The workflow the results are for, as in :meth:`return_results`.
+        """
+        result = self.return_results(data, workflow)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def run_async(
+        self, run_workflow: Callable[[Workflow], Awaitable[dict]], executor: Executor = None
+    ) -> dict | None:
+        """
+        Run the whole operation: every workflow is run with ``run_workflow`` and its results
+        are returned before the next workflow is created.
 
-    def return_results(self, data: dict):
-        if self.return_results_func:
-            return self.return_results_func(self._workflow, data)
-        self._data = data
+        :param run_workflow: A coroutine function which runs a workflow and returns its results.
+        :param Executor executor: If given, workflows are created in this executor.
+        :return: The results of the last workflow, or None if there were no workflows.
+        """
+        data = None
+        async for workflow in self.get_workflow_async(executor):
+            data = await run_workflow(workflow)
+            await self.return_results_async(data, workflow)
+        return data
@@ -1,3 +1,5 @@
+import os
+
 import pytest
 
 import sio3pack
@@ -16,6 +18,25 @@ def test_from_file(get_archived_package):
         assert package.rootdir == package_info.path
 
 
+@pytest.mark.parametrize("get_package", ["simple"], indirect=True)
+def test_revision(get_package):
+    package_info: PackageInfo = get_package()
+    package = sio3pack.from_file(package_info.path)
+    assert len(package.fingerprint) == 64
+    assert package.revision == package.fingerprint
+    assert sio3pack.from_file(package_info.path).revision == package.revision
+
+    # Compiled executables don't change the contents of the package.
+    os.makedirs(os.path.join(package_info.path, ".cache", "executables"))
+    with open(os.path.join(package_info.path, ".cache", "executables", "abc.e"), "w") as f:
+        f.write("compiled")
+    assert sio3pack.from_file(package_info.path).revision == package.revision
+
+    with open(os.path.join(package_info.path, "prog", "abc.cpp"), "a") as f:
+        f.write("// changed\n")
+    assert sio3pack.from_file(package_info.path).revision != package.revision
+
+
 @pytest.mark.no_django
 @pytest.mark.parametrize("get_package", ["simple"], indirect=True)
 def test_no_django(get_package):
@@ -1,16 +1,22 @@
+import asyncio
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
 
 import pytest
 import yaml
 
 import sio3pack
-from sio3pack.exceptions import WorkflowCreationError
+from sio3pack.exceptions import WorkflowCreationError, WorkflowValidationError
 from sio3pack.packages import Sinolpack
 from sio3pack.packages.package.configuration import SIO3PackConfig
+from sio3pack.test import GroupResult, RunOrdering, RunResults, Test, TestResult, order_tests
 from sio3pack.workflow import ExecutionTask, ScriptTask, Workflow
 from sio3pack.workflow.execution import ObjectReadStream, ObjectWriteStream
 from sio3pack.workflow.execution.filesystems import ObjectFilesystem
+from sio3pack.workflow.optimizations import eliminate_duplicate_tasks
 from tests.fixtures import PackageInfo, get_package
 from tests.packages.sinolpack.utils import common_checks
 
@@ -469,3 +475,635 @@ def test_extra_files_in_workflow(get_package):
         op = package.get_run_operation(program)
         with pytest.raises(WorkflowCreationError):
             _ = [wf for wf in op.get_workflow()]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("get_package", ["run"], indirect=True)
+def test_executable_cache(get_package):
+    def get_compile_tasks(workflow: Workflow) -> list[ExecutionTask]:
+        return [task for task in workflow.tasks if task.name.startswith("Compile ")]
+
+    for type in _get_run_types():
+        print(f"From {type}")
+        package_info: PackageInfo = get_package()
+        package: Sinolpack = _get_package(package_info, type)
+        program = package.main_model_solution
+
+        workflows = [wf for wf in package.get_run_operation(program).get_workflow()]
+        assert len(get_compile_tasks(workflows[0])) == 1, "Solution should be compiled when the cache is empty"
+
+        exe_path = package.get_executable_path(program)
+        if type == "file":
+            # Local cache entries are valid only while the executable exists.
+            package.register_compiled_executable(program, exe_path)
+            assert package.get_cached_executable_path(program) is None
+            os.makedirs(os.path.dirname(exe_path), exist_ok=True)
+            open(exe_path, "w").close()
+        package.register_compiled_executable(program, exe_path)
+        assert package.get_cached_executable_path(program) == exe_path
+
+        workflows = [wf for wf in package.get_run_operation(program).get_workflow()]
+        assert len(get_compile_tasks(workflows[0])) == 0, "Cached solution should not be compiled"
+        assert exe_path in [obj.handle for obj in workflows[0].external_objects]
+        for task in workflows[0].tasks:
+            if task.name.startswith("Run solution for test"):
+                assert task.filesystem_manager.get_by_id(0).object.handle == exe_path
+
+        # Changing the compiler flags changes the key, so the solution has to be compiled again.
+        package.configuration.compilers_config["cpp"].flags.append("-DCHANGED")
+        assert package.get_cached_executable_path(program) is None
+        workflows = [wf for wf in package.get_run_operation(program).get_workflow()]
+        assert len(get_compile_tasks(workflows[0])) == 1
+
+        # Executables are cached when the operation gets results of a successful compilation.
+        op = package.get_run_operation(program)
+        next(op.get_workflow())
+        op.return_results({"obsreg:compilation_result": {"status": "CE"}})
+        assert package.get_cached_executable_path(program) is None
+        op = package.get_run_operation(program)
+        workflow = next(op.get_workflow())
+        _, register_map = workflow.to_json(to_int_regs=True, with_register_map=True)
+        op.return_results({register_map["obsreg:compilation_result"]: "OK"})
+        assert package.get_cached_executable_path(program) == exe_path
+        workflows = [wf for wf in package.get_run_operation(program).get_workflow()]
+        assert len(get_compile_tasks(workflows[0])) == 0
+
+        # Programs compiled when unpacking the package are cached too.
+        checker = package.get_checker_file()
+        checker_exe_path = package.get_executable_path(checker)
+        if type == "file":
+            open(checker_exe_path, "w").close()
+        op = package.get_unpack_operation()
+        assert next(op.get_workflow()).name == "Compile files"
+        assert package.get_cached_executable_path(checker) is None
+        op.return_results({"obsreg:compilation_result": "OK"})
+        assert package.get_cached_executable_path(checker) == checker_exe_path
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("get_package", ["run"], indirect=True)
+def test_chunked_run_workflow(get_package):
+    def get_names(workflow: Workflow, prefix: str) -> list[str]:
+        return [task.name for task in workflow.tasks if task.name.startswith(prefix)]
+
+    for type in _get_run_types():
+        print(f"From {type}")
+        package_info: PackageInfo = get_package()
+        package: Sinolpack = _get_package(package_info, type)
+        program = package.main_model_solution
+        exe_path = package.get_executable_path(program)
+
+        op = package.get_run_operation(program, chunk_size=2)
+        workflows = []
+        for wf in op.get_workflow():
+            workflows.append(wf)
+            if wf.name.startswith("Run solution (chunk"):
+                groups = [name.split()[-1] for name in get_names(wf, "Grade group ")]
+                op.return_results({f"obsreg:group_grade_res_{group}": "OK" for group in groups}, wf)
+
+        # Compilation, two chunks (groups 0 and 1, then group 2) and the final grading.
+        assert [wf.name for wf in workflows] == [
+            "Compile solution",
+            "Run solution (chunk 1 of 2)",
+            "Run solution (chunk 2 of 2)",
+            "Grade run",
+        ]
+        assert exe_path in [obj.handle for obj in workflows[0].observable_objects]
+        assert get_names(workflows[1], "Run solution for test") == [
+            "Run solution for test 0",
+            "Run solution for test 1a",
+        ]
+        assert get_names(workflows[2], "Run solution for test") == ["Run solution for test 2a"]
+        for wf in workflows[1:3]:
+            assert exe_path in [obj.handle for obj in wf.external_objects]
+            assert get_names(wf, "Compile ") == []
+            assert get_names(wf, "Grade run") == []
+            for task in wf.tasks:
+                if isinstance(task, ScriptTask) and task.name.startswith("Grade group"):
+                    assert task.output_registers[0].startswith("obsreg:group_grade_res_")
+            wf.to_json(to_int_regs=True)
+
+        grade_run = workflows[3].tasks[0]
+        assert grade_run.input_registers == []
+        for group in ["0", "1", "2"]:
+            assert f'["{group}"] = "OK"' in grade_run.script
+
+        # Grading the run is not possible without results of all chunks.
+        op = package.get_run_operation(program, chunk_size=2)
+        with pytest.raises(WorkflowCreationError):
+            _ = [wf for wf in op.get_workflow()]
+
+        # Results of chunks serialized with integer registers are decoded before they are merged.
+        op = package.get_run_operation(program, chunk_size=2)
+        names = []
+        for wf in op.get_workflow():
+            names.append(wf.name)
+            if wf.name.startswith("Run solution (chunk"):
+                _, register_map = wf.to_json(to_int_regs=True, with_register_map=True)
+                groups = [name.split()[-1] for name in get_names(wf, "Grade group ")]
+                op.return_results(
+                    {register_map[f"obsreg:group_grade_res_{group}"]: {"status": "OK"} for group in groups}, wf
+                )
+        assert names[-1] == "Grade run"
+        for group in ["0", "1", "2"]:
+            assert f'["{group}"] = {{["status"] = "OK"}}' in wf.tasks[0].script
+
+        # The compilation is skipped if the executable is cached.
+        package.register_compiled_executable(program, exe_path)
+        if type == "file":
+            os.makedirs(os.path.dirname(exe_path), exist_ok=True)
+            open(exe_path, "w").close()
+        op = package.get_run_operation(program, chunk_size=100)
+        gen = op.get_workflow()
+        assert next(gen).name == "Run solution (chunk 1 of 1)"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("get_package", ["run"], indirect=True)
+def test_fail_fast_run_workflow(get_package):
+    def get_grade_group_scripts(workflow: Workflow) -> dict[str, str]:
+        return {
+            task.name: task.script
+            for task in workflow.tasks
+            if isinstance(task, ScriptTask) and task.name.startswith("Grade group")
+        }
+
+    for type in _get_run_types():
+        print(f"From {type}")
+        package_info: PackageInfo = get_package()
+        package: Sinolpack = _get_package(package_info, type)
+        program = package.main_model_solution
+
+        workflows = [wf for wf in package.get_run_operation(program).get_workflow()]
+        for script in get_grade_group_scripts(workflows[0]).values():
+            assert "local fail_fast = false" in script
+
+        workflows = [wf for wf in package.get_run_operation(program, fail_fast=True).get_workflow()]
+        scripts = get_grade_group_scripts(workflows[0])
+        assert len(scripts) == 3
+        for script in scripts.values():
+            assert "local fail_fast = true" in script
+        assert 'local test_ids = {"1a"}' in scripts["Grade group 1"]
+        workflows[0].to_json(to_int_regs=True)
+
+        op = package.get_run_operation(program, chunk_size=1, fail_fast=True)
+        for wf in op.get_workflow():
+            if wf.name.startswith("Run solution (chunk"):
+                for script in get_grade_group_scripts(wf).values():
+                    assert "local fail_fast = true" in script
+                op.return_results({f"obsreg:group_grade_res_{group}": "OK" for group in ["0", "1", "2"]}, wf)
+
+
+@pytest.mark.parametrize("get_package", ["run"], indirect=True)
+def test_grading_scripts(get_package):
+    lupa = pytest.importorskip("lupa")
+    package_info: PackageInfo = get_package()
+    package: Sinolpack = _get_package(package_info, "file")
+    program = package.main_model_solution
+
+    def to_python(value):
+        if lupa.lua_type(value) == "table":
+            return {key: to_python(item) for key, item in value.items()}
+        return value
+
+    def run_script(task: ScriptTask, registers: dict) -> Any:
+        # Scripts read input registers by their index and return the value of their output register.
+        values = [registers.get(register) for register in task.input_registers]
+        runtime = lupa.LuaRuntime()
+        runtime.globals().get_register = lambda i: (
+            runtime.table_from(values[i], recursive=True) if isinstance(values[i], dict) else values[i]
+        )
+        return to_python(runtime.execute(task.script))
+
+    def get_task(workflow: Workflow, name: str) -> ScriptTask:
+        return next(task for task in workflow.tasks if task.name == name)
+
+    # All tests in one group.
+    tests = [Test(test.test_name, test.test_id, test.in_file, test.out_file, "1") for test in package.tests]
+    failed = {"r:grade_res_0": {"status": "TLE"}, "r:grade_res_1a": {"status": "OK"}}
+    for fail_fast in [False, True]:
+        workflow = next(package.get_run_operation(program, tests=tests, fail_fast=fail_fast).get_workflow())
+        grade_group = get_task(workflow, "Grade group 1")
+        # The grade of the group is returned when all its tests are graded.
+        assert run_script(grade_group, {"r:grade_res_0": {"status": "OK"}}) is None
+        grades = {register: {"status": "OK"} for register in grade_group.input_registers}
+        assert run_script(grade_group, grades) == {"status": "OK", "score": 100}
+        grades["r:grade_res_2a"] = {"status": "WA", "score": 50}
+        assert run_script(grade_group, grades) == {"status": "WA", "score": 50}
+        # In the fail-fast mode, it's returned as soon as a test scores 0.
+        expected = {"status": "TLE", "score": 0} if fail_fast else None
+        assert run_script(grade_group, failed) == expected
+
+        grade_run = get_task(workflow, "Grade run")
+        assert run_script(grade_run, {}) is None
+        assert run_script(grade_run, {"r:group_grade_res_1": {"status": "TLE", "score": 0}}) == {
+            "status": "TLE",
+            "groups": {"1": {"status": "TLE", "score": 0}},
+        }
+
+    # Grades of groups graded in chunks are a part of the script.
+    op = package.get_run_operation(program, chunk_size=1)
+    for workflow in op.get_workflow():
+        if workflow.name.startswith("Run solution (chunk"):
+            grade_groups = [task for task in workflow.tasks if task.name.startswith("Grade group ")]
+            results = {}
+            for task in grade_groups:
+                grades = {register: {"status": "OK"} for register in task.input_registers}
+                if task.name == "Grade group 2":
+                    grades = {register: {"status": "WA"} for register in task.input_registers}
+                results[task.output_registers[0]] = run_script(task, grades)
+            op.return_results(results, workflow)
+    assert run_script(get_task(workflow, "Grade run"), {}) == {
+        "status": "WA",
+        "groups": {
+            "0": {"status": "OK", "score": 100},
+            "1": {"status": "OK", "score": 100},
+            "2": {"status": "WA", "score": 0},
+        },
+    }
+
+
+@pytest.mark.parametrize("get_package", ["run"], indirect=True)
+def test_run_results(get_package):
+    package_info: PackageInfo = get_package()
+    package: Sinolpack = _get_package(package_info, "file")
+    program = package.main_model_solution
+
+    # Results of a single workflow, reported one by one with numbers of registers.
+    workflow = next(package.get_run_operation(program).get_workflow())
+    register_map = workflow.get_register_map()
+    # Observable registers get the lowest numbers.
+    assert register_map["obsreg:result"] < sum(1 for name in register_map if name.startswith("obsreg:"))
+    results = RunResults(package.tests, max_scores={"0": 0, "1": 40, "2": 60}, register_map=register_map)
+    assert results.max_points == 100
+    assert results.add(register_map["r:run_test_res_1a"], {"status": "OK"}) is None
+
+    result = results.add(register_map["r:grade_res_1a"], {"status": "OK"})
+    assert isinstance(result, TestResult) and result.test_id == "1a" and result.group == "1"
+    assert results.points == 40
+    assert results.groups["1"].finished and not results.finished
+    results.add(str(register_map["r:grade_res_2a"]), {"status": "WA", "score": 50})
+    assert results.points == 70
+    results.add(register_map["r:grade_res_0"], {"status": "OK"})
+    assert results.finished
+    results.add(register_map["obsreg:result"], {"status": "WA"})
+    assert results.result == {"status": "WA"}
+    assert results.to_json()["groups"]["2"]["tests"]["2a"] == {
+        "test_id": "2a",
+        "group": "2",
+        "status": "WA",
+        "score": 50,
+    }
+
+    # The group's score is decided by its worst test, until the group's grade is received.
+    tests = [Test(f"t{i}", f"1{c}", None, None, "1") for i, c in enumerate("abc")]
+    results = RunResults(tests)
+    results.add("r:grade_res_1a", {"status": "OK"})
+    assert results.groups["1"].score == 100 and results.groups["1"].status == "OK"
+    results.add("r:grade_res_1b", {"status": "TLE"})
+    results.add("r:grade_res_1c", {"status": "OK"})
+    assert results.groups["1"].score == 0 and results.groups["1"].status == "TLE"
+    updated = results.add("r:group_grade_res_1", {"status": "OK", "score": 80})
+    assert isinstance(updated, GroupResult) and updated.graded
+    assert results.points == 80
+
+    # Results of chunks are collected with ``return_func`` of the operation.
+    results = RunResults(package.tests)
+    op = package.get_run_operation(program, chunk_size=1, return_func=results.return_results)
+    for wf in op.get_workflow():
+        if wf.name.startswith("Run solution (chunk"):
+            registers = [name for name in wf.get_register_map() if name.startswith(("r:grade_res_", "obsreg:group"))]
+            op.return_results({name: "OK" for name in registers}, wf)
+    assert results.finished
+    assert results.points == 300
+
+    # Numbers of registers are mapped with the register map of the workflow.
+    results = RunResults(package.tests)
+    updated = results.return_results(
+        workflow, {register_map["r:grade_res_0"]: "OK", register_map["obsreg:result"]: "OK"}
+    )
+    assert [result.test_id for result in updated] == ["0"]
+    assert results.result == "OK"
+
+
+def test_order_tests():
+    tests = [Test(f"test{id}", id, None, None, id[0]) for id in ["1a", "1b", "1c", "2a", "2b", "3a"]]
+
+    def ids(ordered: list[Test]) -> list[str]:
+        return [test.test_id for test in ordered]
+
+    assert ids(order_tests(tests)) == ["1a", "1b", "1c", "2a", "2b", "3a"]
+    assert ids(order_tests(tests, RunOrdering.ONE_PER_GROUP_FIRST)) == ["1a", "2a", "3a", "1b", "1c", "2b"]
+    assert ids(order_tests(tests, RunOrdering.FAILING_FIRST, {"2b": 5, "1c": 1})) == [
+        "2b",
+        "1c",
+        "1a",
+        "1b",
+        "2a",
+        "3a",
+    ]
+    # Tests without inputs can't be compared, so they keep their order.
+    assert ids(order_tests(tests, RunOrdering.SMALLEST_INPUT_FIRST)) == ids(tests)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("get_package", ["run"], indirect=True)
+def test_run_workflow_ordering(get_package):
+    def get_order(workflow: Workflow) -> list[str]:
+        return [
+            task.name
+            for task in workflow.tasks
+            if task.name.startswith("Run solution for test") or task.name.startswith("Grade group")
+        ]
+
+    for type in _get_run_types():
+        print(f"From {type}")
+        package_info: PackageInfo = get_package()
+        for name, size in [("run0", 30), ("run1a", 10), ("run2a", 20)]:
+            with open(os.path.join(package_info.path, "in", f"{name}.in"), "w") as f:
+                f.write("1" * size)
+        package: Sinolpack = _get_package(package_info, type)
+        program = package.main_model_solution
+
+        workflows = [wf for wf in package.get_run_operation(program).get_workflow()]
+        assert get_order(workflows[0]) == [
+            "Run solution for test 0",
+            "Grade group 0",
+            "Run solution for test 1a",
+            "Grade group 1",
+            "Run solution for test 2a",
+            "Grade group 2",
+        ]
+
+        op = package.get_run_operation(program, ordering=RunOrdering.FAILING_FIRST, failure_counts={"2a": 3, "1a": 1})
+        workflows = [wf for wf in op.get_workflow()]
+        assert get_order(workflows[0]) == [
+            "Run solution for test 2a",
+            "Grade group 2",
+            "Run solution for test 1a",
+            "Grade group 1",
+            "Run solution for test 0",
+            "Grade group 0",
+        ]
+
+        op = package.get_run_operation(program, ordering=RunOrdering.SMALLEST_INPUT_FIRST)
+        workflows = [wf for wf in op.get_workflow()]
+        run_order = [name.split()[-1] for name in get_order(workflows[0]) if name.startswith("Run solution")]
+        assert run_order == ["1a", "2a", "0"]
+
+        # In chunked runs, chunks with prioritized tests go first.
+        op = package.get_run_operation(
+            program, chunk_size=1, ordering=RunOrdering.FAILING_FIRST, failure_counts={"2a": 3}
+        )
+        workflows = []
+        for wf in op.get_workflow():
+            workflows.append(wf)
+            op.return_results({f"obsreg:group_grade_res_{group}": "OK" for group in ["0", "1", "2"]})
+        assert get_order(workflows[1]) == ["Run solution for test 2a", "Grade group 2"]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("get_package", ["simple"], indirect=True)
+def test_run_skeleton_cache(get_package):
+    for type in _get_run_types():
+        print(f"From {type}")
+        package_info: PackageInfo = get_package()
+        package: Sinolpack = _get_package(package_info, type)
+        manager = package.workflow_manager
+        program = package.main_model_solution
+        exe_path = package.get_executable_path(program)
+
+        # The workflow is the same as one built without the skeleton.
+        workflow = next(package.get_run_operation(program).get_workflow())
+        expected = Workflow("Run solution")
+        expected.add_external_object(expected.objects_manager.get_or_create_object(program.path))
+        expected.union(manager.get_compile_file_workflow(program)[0])
+        manager._add_checker_to_run_workflow(expected)
+        language = package.get_file_language(program)
+        group_registers = manager._add_tests_to_run_workflow(expected, package.tests, exe_path, language)
+        expected.union(manager._get_grade_run_instance(group_registers))
+        assert workflow.to_json() == expected.to_json()
+        assert "<SOL_PATH>" not in json.dumps(workflow.to_json())
+
+        # Next submissions reuse the skeleton, and changing their workflows doesn't change it.
+        assert len(manager._run_skeletons) == 1
+        workflow.replace_templates({exe_path: "changed"})
+        assert next(package.get_run_operation(program).get_workflow()).to_json() == expected.to_json()
+        assert len(manager._run_skeletons) == 1
+
+        # Solutions with other names use the same skeleton with their executables.
+        other = [ms["file"] for ms in package.model_solutions if ms["file"].path != program.path][0]
+        other_json = json.dumps(next(package.get_run_operation(other).get_workflow()).to_json())
+        assert package.get_executable_path(other) in other_json
+        assert exe_path not in other_json
+        assert len(manager._run_skeletons) == 1
+
+        # Other tests and other revisions of the package have their own skeletons.
+        next(package.get_run_operation(program, tests=package.tests[:1]).get_workflow())
+        assert len(manager._run_skeletons) == 2
+        if type == "db":
+            package.django.bump_revision()
+            next(package.get_run_operation(program).get_workflow())
+            assert len(manager._run_skeletons) == 3
+        manager.clear_run_skeletons()
+
+        # The same tests in other groups have their own skeletons.
+        groups = {test.group for test in package.tests}
+        assert len(groups) > 1
+        regrouped = [Test(test.test_name, test.test_id, test.in_file, test.out_file, "1") for test in package.tests]
+        next(package.get_run_operation(program).get_workflow())
+        workflow = next(package.get_run_operation(program, tests=regrouped).get_workflow())
+        assert len(manager._run_skeletons) == 2
+        names = [task.name for task in workflow.tasks if task.name.startswith("Grade group")]
+        assert names == ["Grade group 1"]
+
+
+@pytest.mark.parametrize("get_package", ["run", "inwer"], indirect=True)
+def test_optimize_workflows(get_package):
+    package_info: PackageInfo = get_package()
+    package: Sinolpack = _get_package(package_info, "file")
+
+    # Workflows created by the package don't have anything to remove.
+    for op in [package.get_unpack_operation(), package.get_run_operation(package.main_model_solution)]:
+        for wf in op.get_workflow():
+            data = wf.to_json()
+            wf.optimize()
+            assert wf.to_json() == data
+            op.return_results({})
+
+    # Compiling a file whose executable and result nothing uses is dead, and so is its source file.
+    wf = next(package.get_run_operation(package.main_model_solution).get_workflow())
+    data = wf.to_json()
+    unused_wf, _ = package.workflow_manager.get_compile_file_workflow("prog/unused.cpp", use_cache=False)
+    unused_wf.add_external_object(unused_wf.objects_manager.get_or_create_object("prog/unused.cpp"))
+    unused_wf.replace_templates({"obsreg:compilation_result": "r:unused_compilation_result"})
+    wf.union(unused_wf)
+    assert len(wf.tasks) == len(data["tasks"]) + 1
+    wf.optimize()
+    assert wf.to_json() == data
+
+
+@pytest.mark.parametrize("get_package", ["run"], indirect=True)
+def test_eliminate_duplicate_tasks(get_package):
+    package_info: PackageInfo = get_package()
+    package: Sinolpack = _get_package(package_info, "file")
+    program = package.main_model_solution
+
+    def get_compile_wf(register: str) -> Workflow:
+        compile_wf, _ = package.workflow_manager.get_compile_file_workflow(program, use_cache=False)
+        compile_wf.replace_templates({"obsreg:compilation_result": register})
+        return compile_wf
+
+    wf = Workflow("Compile twice")
+    wf.union(get_compile_wf("obsreg:compilation_result"), get_compile_wf("r:second_result"))
+    wf.add_task(
+        ScriptTask(
+            "Use second result",
+            wf,
+            input_registers=["r:second_result"],
+            output_registers=["obsreg:result"],
+            script="return <r:second_result>",
+        )
+    )
+    assert eliminate_duplicate_tasks(wf) == 1
+    assert len(wf.tasks) == 2
+    assert wf.tasks[1].input_registers == ["obsreg:compilation_result"]
+    assert wf.tasks[1].script == "return <obsreg:compilation_result>"
+
+    # A duplicate with a different observable result has to stay.
+    wf.union(get_compile_wf("obsreg:other_result"))
+    assert eliminate_duplicate_tasks(wf) == 0
+    assert len(wf.tasks) == 3
+
+
+@pytest.mark.parametrize("get_package", ["custom_workflows"], indirect=True)
+def test_invalid_custom_workflow(get_package):
+    package_info: PackageInfo = get_package()
+    path = os.path.join(package_info.path, "workflows.json")
+    with open(path) as f:
+        workflows = json.load(f)
+    workflows["run_test"]["tasks"][0]["processes"][1]["mount_namespace"] = 1
+    with open(path, "w") as f:
+        json.dump(workflows, f)
+
+    with pytest.raises(WorkflowValidationError) as e:
+        _get_package(package_info, "file")
+    assert e.value.errors == [
+        "run_test.tasks[0].processes[1].mount_namespace: mount namespace 1 doesn't exist, there are 1"
+    ]
+
+
+@pytest.mark.parametrize("get_package", ["simple", "inwer"], indirect=True)
+def test_async_operations(get_package):
+    package_info: PackageInfo = get_package()
+    package = _get_package(package_info, "file")
+    expected = [wf.name for wf in package.get_unpack_operation().get_workflow()]
+
+    async def run_workflow(workflow: Workflow) -> dict:
+        await asyncio.sleep(0)
+        return {"name": workflow.name}
+
+    returned = []
+
+    async def return_func(workflow: Workflow, data: dict):
+        await asyncio.sleep(0)
+        returned.append(data["name"])
+
+    async def main():
+        # Operations of one package are driven concurrently in one thread.
+        ops = [package.get_unpack_operation(return_func=return_func) for _ in range(3)]
+        results = await asyncio.gather(*[op.run_async(run_workflow) for op in ops])
+        assert results == [{"name": expected[-1]}] * 3
+
+        names = []
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            op = package.get_unpack_operation()
+            async for wf in op.get_workflow_async(executor):
+                names.append(wf.name)
+                await op.return_results_async({})
+        assert names == expected
+
+    asyncio.run(main())
+    assert sorted(returned) == sorted(expected * 3)
+
+
+@pytest.mark.parametrize("get_package", ["simple"], indirect=True)
+def test_resume_unpack_operation(get_package):
+    package_info: PackageInfo = get_package()
+    package = _get_package(package_info, "file")
+
+    op = package.get_unpack_operation()
+    workflows = op.get_workflow()
+    assert next(workflows).name == "Compile files"
+    op.return_results({})
+    assert next(workflows).name == "Run ingen"
+    op.return_results({"input_tests": ["in/abc0a.in"]})
+    checkpoint = json.loads(json.dumps(op.checkpoint()))
+
+    # Outgen was created, but its results weren't returned, so it's created again after resuming.
+    assert next(workflows).name == "Outgen tests"
+    assert op.checkpoint() == checkpoint
+    # Checkpoints are copies of the state.
+    op.checkpoint()["data"]["input_tests"].append("in/abc0b.in")
+    assert op.checkpoint() == checkpoint
+
+    # A restarted dispatcher resumes with a new package, ingen isn't run again.
+    resumed = _get_package(package_info, "file").get_unpack_operation()
+    resumed.restore(checkpoint)
+    workflows = list(resumed.get_workflow())
+    assert [wf.name for wf in workflows] == ["Outgen tests"]
+    assert "in/abc0a.in" in [obj.handle for obj in workflows[0].external_objects]
+    resumed.return_results({})
+    assert resumed.checkpoint()["last"]
+
+    with pytest.raises(ValueError):
+        package.get_run_operation(package.main_model_solution).checkpoint()
+
+
+@pytest.mark.parametrize("get_package", ["run"], indirect=True)
+def test_operation_pending_workflows(get_package):
+    package_info: PackageInfo = get_package()
+    package = _get_package(package_info, "file")
+
+    results = []
+    op = package.get_run_operation(
+        package.main_model_solution, chunk_size=1, return_func=lambda wf, data: results.append((wf, data))
+    )
+    workflows = op.get_workflow()
+    compile_wf, chunk_1, chunk_2 = next(workflows), next(workflows), next(workflows)
+    # Results of many workflows are awaited, so it's not known which one the results are for.
+    with pytest.raises(ValueError):
+        op.return_results({"obsreg:compilation_result": "OK"})
+    op.return_results({"obsreg:compilation_result": "OK"}, compile_wf)
+    op.return_results({"obsreg:group_grade_res_1": "OK"}, chunk_2)
+    # The only awaited workflow is the default. Operations which can't be checkpointed
+    # don't copy results, so they can be anything.
+    op.return_results({"obsreg:group_grade_res_0": threading.Lock()})
+    assert [wf for wf, _ in results] == [compile_wf, chunk_2, chunk_1]
+    assert next(workflows).name == "Run solution (chunk 3 of 3)"
+
+
+@pytest.mark.parametrize("get_package", ["simple", "inwer"], indirect=True)
+def test_concurrent_unpack_operations(get_package):
+    package_info: PackageInfo = get_package()
+    package = _get_package(package_info, "file")
+
+    def describe(wf: Workflow) -> tuple:
+        return wf.name, [task.name for task in wf.tasks], sorted(obj.handle for obj in wf.external_objects)
+
+    expected = [describe(wf) for wf in package.get_unpack_operation().get_workflow()]
+
+    # Interleaved operations don't affect each other.
+    first = package.get_unpack_operation().get_workflow()
+    second = package.get_unpack_operation().get_workflow()
+    interleaved = [[], []]
+    for first_wf, second_wf in zip(first, second):
+        interleaved[0].append(describe(first_wf))
+        interleaved[1].append(describe(second_wf))
+    assert interleaved == [expected, expected]
+
+    def unpack(_) -> list[tuple]:
+        return [describe(wf) for wf in package.get_unpack_operation().get_workflow()]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert list(executor.map(unpack, range(8))) == [expected] * 8
@@ -1,7 +1,8 @@
 import pytest
+from django.db.models import F
 
 import sio3pack
-from sio3pack import LocalFile, SIO3PackConfig
+from sio3pack import LocalFile, SIO3PackConfig, pool
 from sio3pack.django.common.models import SIO3Package, SIO3PackMainModelSolution
 from sio3pack.django.sinolpack.models import (
     SinolpackAdditionalFile,
@@ -273,3 +274,71 @@ def test_extra_files(get_package):
     for path, file in extra_files.items():
         assert path in db_extra_files
         assert_contents_equal(file.read(), db_extra_files[path].read())
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("get_package", ["simple"], indirect=True)
+def test_package_pool(get_package, django_capture_on_commit_callbacks):
+    package_info: PackageInfo = get_package()
+    package_pool = pool.PackagePool()
+    previous = pool.set_package_pool(package_pool)
+    try:
+        with django_capture_on_commit_callbacks(execute=True):
+            _save_and_test_simple(package_info)
+        pooled: Sinolpack = sio3pack.from_pool(1)
+        assert pooled.short_name == sio3pack.from_db(1).short_name
+        assert sio3pack.from_pool(1) is pooled
+
+        # Saving a package with the same problem ID removes it from the pool once committed.
+        SIO3Package.objects.filter(problem_id=1).delete()
+        with django_capture_on_commit_callbacks(execute=True):
+            _save_and_test_simple(package_info)
+            assert 1 in package_pool
+        assert 1 not in package_pool
+
+        # Changes committed by other processes don't invalidate the pool, but change the stored revision.
+        pooled = sio3pack.from_pool(1)
+        assert sio3pack.from_pool(1) is pooled
+        SIO3Package.objects.filter(problem_id=1).update(revision=F("revision") + 1)
+        reloaded = sio3pack.from_pool(1)
+        assert reloaded is not pooled
+        assert reloaded.revision != pooled.revision
+        assert sio3pack.from_pool(1) is reloaded
+    finally:
+        pool.set_package_pool(previous)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("get_package", ["simple"], indirect=True)
+def test_revision(get_package, django_capture_on_commit_callbacks):
+    package_info: PackageInfo = get_package()
+    package, db_package = _save_and_test_simple(package_info)
+    assert db_package.revision == 1
+    assert db_package.fingerprint == package.fingerprint
+
+    from_db: Sinolpack = sio3pack.from_db(1)
+    assert from_db.fingerprint == package.fingerprint
+    revision = from_db.revision
+    from_db.django.bump_revision()
+    assert SIO3Package.objects.get(problem_id=1).revision == 2
+    assert from_db.revision != revision
+    assert sio3pack.from_db(1).revision == from_db.revision
+
+    # Changing the saved workflows bumps the revision and removes the package from the pool.
+    package_pool = pool.PackagePool()
+    previous = pool.set_package_pool(package_pool)
+    try:
+        sio3pack.from_pool(1)
+        workflow = from_db.workflow_manager.get("grade_run")
+        workflow.name = "Changed grade run"
+        from_db.workflow_manager.workflows["grade_run"] = workflow
+        with django_capture_on_commit_callbacks(execute=True):
+            from_db.django.update_workflows()
+            assert 1 in package_pool
+        assert 1 not in package_pool
+    finally:
+        pool.set_package_pool(previous)
+    assert SIO3Package.objects.get(problem_id=1).revision == 3
+    reloaded: Sinolpack = sio3pack.from_db(1)
+    assert reloaded.revision == from_db.revision
+    assert reloaded.workflow_manager.get("grade_run").name == "Changed grade run"
@@ -0,0 +1,55 @@
+import pytest
+
+import sio3pack
+from sio3pack import instrumentation
+from sio3pack.packages.package.configuration import SIO3PackConfig
+from tests.fixtures import PackageInfo, get_package
+
+
+@pytest.fixture
+def aggregator():
+    aggregator = instrumentation.AggregatingInstrumentation()
+    previous = instrumentation.set_instrumentation(aggregator)
+    yield aggregator
+    instrumentation.set_instrumentation(previous)
+
+
+def test_disabled_by_default():
+    assert not instrumentation.get_instrumentation().enabled
+    with instrumentation.span("test") as span:
+        assert span is instrumentation.span("other")
+
+
+@pytest.mark.parametrize("get_package", ["simple"], indirect=True)
+def test_aggregating(get_package, aggregator):
+    package_info: PackageInfo = get_package()
+    package = sio3pack.from_file(package_info.path, SIO3PackConfig.detect())
+    for _ in package.get_run_operation(package.main_model_solution).get_workflow():
+        pass
+
+    stats = aggregator.to_json()
+    assert stats["from_file"]["count"] == 1
+    assert stats["sinolpack.process_config_yml"]["count"] == 1
+    assert stats["sinolpack.workflows.get_run_workflow"]["count"] == 1
+    assert stats["workflow.replace_templates"]["count"] > 0
+    assert "sinolpack.process_config_yml" in aggregator.report()
+
+    aggregator.reset()
+    assert aggregator.to_json() == {}
+
+
+def test_callback():
+    spans = []
+    previous = instrumentation.set_instrumentation(
+        instrumentation.CallbackInstrumentation(lambda name, duration, attributes: spans.append((name, attributes)))
+    )
+    try:
+        with instrumentation.span("outer", size=1):
+            instrumentation.instrumented("inner")(lambda: None)()
+        with pytest.raises(ValueError):
+            with instrumentation.span("failing"):
+                raise ValueError()
+    finally:
+        instrumentation.set_instrumentation(previous)
+
+    assert spans == [("inner", {}), ("outer", {"size": 1}), ("failing", {"error": "ValueError"})]
@@ -0,0 +1,47 @@
+import pytest
+
+from sio3pack import lua
+
+lupa = pytest.importorskip("lupa")
+
+
+def to_python(value):
+    if lupa.lua_type(value) == "table":
+        return {key: to_python(item) for key, item in value.items()}
+    return value
+
+
+def test_to_lua_map():
+    runtime = lupa.LuaRuntime()
+    data = {
+        "0": "OK",
+        "1a": {"status": "WA", "score": 0, "partial": 12.5, "graded": True},
+        'quote"and\\backslash': "line\nbreak\ttab",
+        "tasks": ["Run solution for test 1a", "Grade test 1a"],
+        "nothing": None,
+    }
+    table = runtime.eval(lua.to_lua_map(data))
+    assert to_python(table) == {
+        "0": "OK",
+        "1a": {"status": "WA", "score": 0, "partial": 12.5, "graded": True},
+        'quote"and\\backslash': "line\nbreak\ttab",
+        "tasks": {1: "Run solution for test 1a", 2: "Grade test 1a"},
+    }
+    assert lua.to_lua_map({}) == "{}"
+    assert runtime.eval(lua.to_lua_value(float("inf"))) == float("inf")
+    with pytest.raises(TypeError):
+        lua.to_lua_value(object())
+
+
+def test_grade_run_script_compiles():
+    runtime = lupa.LuaRuntime()
+    script = lua.get_script(
+        "grade_run",
+        {
+            "<LUA_MAP_TEST_ID_REG>": lua.to_lua_map({"1": "<r:group_grade_res_1>"}),
+            "<LUA_MAP_GROUP_RESULTS>": lua.to_lua_map({"0": {"status": "OK", "score": 100}, "2": "WA"}),
+            "<LUA_LIST_GROUP_IDS>": lua.to_lua_value(["1"]),
+        },
+    )
+    # Raises LuaSyntaxError if the script doesn't parse.
+    runtime.compile(script)
@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+from sio3pack import SIO3PackConfig, pool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeLoader:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.calls = []
+
+    def __call__(self, problem_id, configuration):
+        self.calls.append(problem_id)
+        time.sleep(self.delay)
+        return object()
+
+
+def test_lru_eviction():
+    loader = FakeLoader()
+    package_pool = pool.PackagePool(max_size=2, loader=loader)
+    first = package_pool.get(1)
+    package_pool.get(2)
+    assert package_pool.get(1) is first
+    package_pool.get(3)
+
+    # 2 was the least recently used.
+    assert 1 in package_pool and 3 in package_pool and 2 not in package_pool
+    assert len(package_pool) == 2
+    assert loader.calls == [1, 2, 3]
+    assert package_pool.to_json() == {"size": 2, "max_size": 2, "hits": 1, "misses": 3}
+
+    with pytest.raises(ValueError):
+        pool.PackagePool(max_size=0)
+
+
+def test_ttl_and_revisions():
+    clock = FakeClock()
+    loader = FakeLoader()
+    package_pool = pool.PackagePool(ttl=10, loader=loader, clock=clock)
+    first = package_pool.get(1, revision="a")
+    clock.now = 9
+    assert package_pool.get(1, revision="a") is first
+    clock.now = 10
+    assert package_pool.get(1, revision="a") is not first
+
+    # Revisions are separate entries, invalidation without a revision removes all of them.
+    package_pool.get(1, revision="b")
+    package_pool.get(2, revision="a")
+    assert len(package_pool) == 3
+    package_pool.invalidate(1, revision="b")
+    assert (1, "a") in package_pool and (1, "b") not in package_pool
+    package_pool.invalidate(1)
+    assert len(package_pool) == 1
+    package_pool.clear()
+    assert len(package_pool) == 0
+
+
+def test_stored_revision_and_configuration():
+    loader = FakeLoader()
+    stored = {1: 1}
+    package_pool = pool.PackagePool(loader=loader, revision_loader=stored.get)
+    first = package_pool.get(1)
+    assert package_pool.get(1) is first
+
+    # Another process saved the package, so it's loaded again.
+    stored[1] = 2
+    second = package_pool.get(1)
+    assert second is not first
+    assert package_pool.get(1) is second
+    assert len(package_pool) == 1
+
+    # The stored revision isn't checked when the revision is given.
+    assert package_pool.get(1, revision="a") is package_pool.get(1, revision="a")
+    assert loader.calls == [1, 1, 1]
+
+    # Packages loaded with different configurations are separate entries.
+    configuration = SIO3PackConfig()
+    with_configuration = package_pool.get(1, configuration=configuration)
+    assert with_configuration is not second
+    assert package_pool.get(1, configuration=configuration) is with_configuration
+    assert (1, None, configuration) in package_pool
+    package_pool.invalidate(1)
+    assert len(package_pool) == 0
+
+
+def test_concurrent_get():
+    loader = FakeLoader(delay=0.05)
+    package_pool = pool.PackagePool(max_size=4, loader=loader)
+    results = []
+
+    def worker(problem_id):
+        results.append((problem_id, package_pool.get(problem_id)))
+
+    threads = [threading.Thread(target=worker, args=(i % 4,)) for i in range(32)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every package is loaded once and all threads get the same object.
+    assert sorted(loader.calls) == [0, 1, 2, 3]
+    for problem_id, package in results:
+        assert package is package_pool.get(problem_id)
+
+
+def test_set_package_pool():
+    package_pool = pool.PackagePool(loader=FakeLoader())
+    previous = pool.set_package_pool(package_pool)
+    try:
+        assert pool.get_package_pool() is package_pool
+    finally:
+        pool.set_package_pool(previous)
@@ -4,7 +4,10 @@ import os
 import pytest
 from deepdiff import DeepDiff
 
-from sio3pack.workflow import Workflow
+from sio3pack.workflow import ExecutionTask, RegisterMap, ScriptTask, Workflow
+from sio3pack.workflow.parametric import compact_workflow, expand_workflow, is_parametric
+from sio3pack.workflow.schema import SchemaCompiler, get_schema
+from sio3pack.workflow.validation import validate_workflow
 
 
 def test_workflow_parsing():
@@ -35,3 +38,399 @@ def test_workflow_to_int_regs():
     workflow = Workflow.from_json(data)
     # Should not raise an error
     workflow.to_json(to_int_regs=True)
+
+
+def test_workflow_register_map():
+    path = os.path.join(os.path.dirname(__file__), "..", "..", "example_workflows", "string_regs.json")
+    data = json.load(open(path))
+    workflow = Workflow.from_json(data)
+    data_int, register_map = workflow.to_json(to_int_regs=True, with_register_map=True)
+
+    # Serializing with integer registers doesn't change the workflow.
+    assert workflow.to_json() == data
+    assert workflow.to_json(to_int_regs=True) == data_int
+    with pytest.raises(ValueError):
+        workflow.to_json(with_register_map=True)
+
+    assert dict(register_map) == workflow.get_register_map().registers
+    assert register_map.observable_registers == data_int["observable_registers"] == 2
+    for task, task_int in zip(data["tasks"], data_int["tasks"]):
+        for name, number in zip(task.get("input_registers", []), task_int.get("input_registers", [])):
+            assert register_map[name] == number
+            assert register_map.get_name(number) == name
+        if "output_register" in task:
+            assert register_map.get_name(task_int["output_register"]) == task["output_register"]
+    assert register_map.get_name(len(register_map)) is None
+
+    for i, handle in enumerate(data_int["observable_objects"]):
+        assert register_map.get_object_index(handle) == i
+        assert register_map.get_object_handle(i) == handle
+    assert register_map.get_object_handle(len(data_int["observable_objects"])) is None
+
+    number = next(iter(register_map.values()))
+    assert register_map.decode({number: 1, str(number): 2, "other": 3}) == {
+        register_map.get_name(number): 2,
+        "other": 3,
+    }
+    restored = RegisterMap.from_json(json.loads(json.dumps(register_map.to_json())))
+    assert dict(restored) == dict(register_map)
+    assert restored.get_name(number) == register_map.get_name(number)
+
+
+def test_workflow_parametric():
+    path = os.path.join(os.path.dirname(__file__), "..", "..", "example_workflows", "string_regs.json")
+    data = json.load(open(path))
+    workflow = Workflow.from_json(data)
+    compact = workflow.to_json(parametric=True)
+    assert is_parametric(compact) and not is_parametric(data)
+    assert len(json.dumps(compact)) < len(json.dumps(data))
+
+    # Expanding gives back the same dictionary, with the same order of keys.
+    assert json.dumps(expand_workflow(json.loads(json.dumps(compact)))) == json.dumps(data)
+    assert Workflow.from_json(compact).to_json() == data
+    data_int, register_map = workflow.to_json(to_int_regs=True, with_register_map=True)
+    compact_int, compact_register_map = workflow.to_json(to_int_regs=True, with_register_map=True, parametric=True)
+    assert expand_workflow(compact_int) == data_int
+    assert dict(compact_register_map) == dict(register_map)
+
+    # Tasks of tests differ only in the test ID, so it's their only argument.
+    run_tests = [task for task in compact["tasks"] if task[0] == compact["tasks"][1][0]]
+    assert run_tests == [[run_tests[0][0], "0"], [run_tests[0][0], "1a"], [run_tests[0][0], "2a"]]
+    template = compact["templates"][run_tests[0][0]]
+    assert template["task"]["name"] is None
+    assert {"path": ["name"], "argument": 0, "prefix": "Run solution for test ", "suffix": ""} in template["parameters"]
+
+    # Values which are equal, but of different types, aren't mixed up.
+    data = {"name": "test", "external_objects": [], "observable_objects": [], "observable_registers": 0, "tasks": []}
+    for value in [1, 1.0, True, 1, None, "1"]:
+        data["tasks"].append({"name": "Task", "type": "script", "script": "", "limit": value, "other": value})
+    compact = compact_workflow(data)
+    assert len(compact["templates"]) == 5
+    assert json.dumps(expand_workflow(compact)) == json.dumps(data)
+
+    compact["tasks"].append([len(compact["templates"])])
+    with pytest.raises(ValueError):
+        expand_workflow(compact)
+
+
+def test_workflow_union():
+    workflows_dir = os.path.join(os.path.dirname(__file__), "..", "..", "example_workflows")
+    files = [
+        os.path.join(workflows_dir, file)
+        for file in sorted(os.listdir(workflows_dir))
+        # Workflows with string and integer registers can't be mixed.
+        if file.endswith(".json") and not file.endswith("workflows.json") and file != "string_regs.json"
+    ]
+
+    def load(file: str) -> Workflow:
+        return Workflow.from_json(json.load(open(file)))
+
+    one_by_one = Workflow("Union")
+    for file in files:
+        one_by_one.union(load(file))
+    at_once = Workflow("Union")
+    at_once.union(*[load(file) for file in files])
+
+    assert one_by_one.to_json() == at_once.to_json()
+    assert at_once.observable_registers == sum(load(file).observable_registers for file in files)
+    handles = [obj.handle for obj in at_once.external_objects]
+    assert len(handles) == len(set(handles))
+
+
+def test_workflow_metrics():
+    path = os.path.join(os.path.dirname(__file__), "..", "..", "example_workflows", "string_regs.json")
+    data = json.load(open(path))
+    workflow = Workflow.from_json(data)
+    metrics = workflow.get_metrics()
+
+    assert metrics.tasks == len(data["tasks"])
+    assert metrics.execution_tasks == 7
+    assert metrics.script_tasks == 7
+    assert metrics.processes == 7
+    assert metrics.external_objects == len(data["external_objects"])
+    assert metrics.filesystems == sum(len(task.get("filesystems", [])) for task in data["tasks"])
+    assert metrics.script_bytes == sum(len(task.get("script", "").encode()) for task in data["tasks"])
+    assert metrics.observable_registers == 2
+    # Compilation and three checkers have hard time limits, solutions only have time limits of resource groups.
+    assert metrics.hard_time_limit == 60000 + 3 * 30000
+    assert metrics.worst_case_time == 60000 + 3 * 30000 + 3 * 30000
+    assert metrics.worst_case_worker_seconds == 240
+
+    # Computing metrics doesn't change the workflow.
+    assert workflow.to_json() == data
+
+
+def test_workflow_objects_have_no_dict():
+    path = os.path.join(os.path.dirname(__file__), "..", "..", "example_workflows", "string_regs.json")
+    workflow = Workflow.from_json(json.load(open(path)))
+
+    # Every object of the graph should use `__slots__`, also in subclasses.
+    def check(obj):
+        assert not hasattr(obj, "__dict__"), f"{type(obj).__name__} has __dict__"
+
+    check(workflow)
+    check(workflow.objects_manager)
+    check(workflow.external_objects)
+    for obj in workflow.external_objects:
+        check(obj)
+    for task in workflow.tasks:
+        check(task)
+        if isinstance(task, ExecutionTask):
+            for manager in (task.filesystem_manager, task.mountnamespace_manager, task.resource_group_manager):
+                check(manager)
+            for fs in task.filesystem_manager.filesystems:
+                check(fs)
+            for ms in task.mountnamespace_manager.mount_namespaces:
+                check(ms)
+                for mp in ms.mountpoints:
+                    check(mp)
+            for rg in task.resource_group_manager.all():
+                check(rg)
+            for process in task.processes:
+                check(process)
+                check(process.descriptor_manager)
+                for stream in process.descriptor_manager.all().values():
+                    check(stream)
+
+
+def test_workflow_share_components():
+    path = os.path.join(os.path.dirname(__file__), "..", "..", "example_workflows", "string_regs.json")
+    data = json.load(open(path))
+    workflow = Workflow.from_json(data)
+    workflow.share_components()
+    assert workflow.to_json() == data
+
+    # Checkers of all tests use the same image and the same resource group.
+    checkers = [task for task in workflow.tasks if task.name.startswith("Run checker")]
+    assert len(checkers) == 3
+    for checker in checkers[1:]:
+        assert checker.filesystem_manager.get_by_id(0) is checkers[0].filesystem_manager.get_by_id(0)
+        assert checker.resource_group_manager.get_by_id(0) is checkers[0].resource_group_manager.get_by_id(0)
+        assert checker.processes[0].resource_group is checker.resource_group_manager.get_by_id(0)
+
+    # Converting to integer registers works the same on shared components.
+    assert workflow.to_json(to_int_regs=True) == Workflow.from_json(data).to_json(to_int_regs=True)
+
+
+def test_workflow_dag():
+    path = os.path.join(os.path.dirname(__file__), "..", "..", "example_workflows", "string_regs.json")
+    workflow = Workflow.from_json(json.load(open(path)))
+    dag = workflow.get_dag()
+    assert dag.is_valid()
+
+    levels = dag.get_levels()
+    assert [task.name for task in levels[0]] == ["Compile prog/run.cpp using g++"]
+    assert [len(level) for level in levels] == [1, 3, 3, 3, 3, 1]
+    assert all(task.name.startswith("Run solution") for task in levels[1])
+    order = dag.topological_order()
+    for node in dag.nodes:
+        for dependency in node.dependencies:
+            assert order.index(dag.nodes[dependency].task) < order.index(node.task)
+
+    # Compilation, then the solution and the checker for one of the tests.
+    length, critical_path = dag.get_critical_path()
+    assert length == 60000 + 30000 + 30000
+    assert [task.name.split(" for ")[0] for task in critical_path[:3]] == [
+        "Compile prog/run.cpp using g++",
+        "Run solution",
+        "Run checker",
+    ]
+    assert dag.get_parallelism() == pytest.approx((60000 + 6 * 30000) / length)
+    assert dag.get_max_width() == 3
+
+
+def test_workflow_dag_errors():
+    workflow = Workflow("Broken")
+    workflow.add_task(ScriptTask("First", workflow, input_registers=["r:b"], output_registers=["r:a"], script=""))
+    workflow.add_task(ScriptTask("Second", workflow, input_registers=["r:a"], output_registers=["r:b"], script=""))
+    workflow.add_task(ScriptTask("Third", workflow, input_registers=["r:c"], output_registers=["r:a"], script=""))
+    dag = workflow.get_dag()
+
+    assert not dag.is_valid()
+    assert dag.has_cycle()
+    assert dag.cycle == [0, 1]
+    assert dag.dangling_registers == {2: {"r:c"}}
+    assert dag.conflicting_registers == {"r:a": [0, 2]}
+    assert [task.name for task in dag.topological_order()] == ["Third"]
+
+
+def test_workflow_validation():
+    workflows_dir = os.path.join(os.path.dirname(__file__), "..", "..", "example_workflows")
+    data = json.load(open(os.path.join(workflows_dir, "run.json")))
+    assert validate_workflow(data) == []
+
+    task = data["tasks"][0]
+    task["mount_namespaces"][0]["mountpoints"][0]["source"] = len(task["filesystems"])
+    task["processes"][0]["resource_group"] = 5
+    task["processes"][0]["descriptors"]["1"] = {"type": "pipe_write", "pipe": 0}
+    data["tasks"].append(
+        {
+            "name": "Broken script",
+            "type": "script",
+            "reactive": "no",
+            "input_registers": ["r:never_written"],
+            "output_registers": [],
+            "script": "",
+        }
+    )
+    errors = validate_workflow(data)
+    assert errors == [
+        f"workflow.tasks[{len(data['tasks']) - 1}].reactive: expected boolean, got string",
+        f"workflow.tasks[0].mount_namespaces[0].mountpoints[0].source: filesystem {len(task['filesystems'])} "
+        f"doesn't exist, there are {len(task['filesystems'])}",
+        "workflow.tasks[0].processes[0].resource_group: resource group 5 doesn't exist, there are 1",
+        "workflow.tasks[0].processes[0].descriptors[1].pipe: pipe 0 doesn't exist, there are 0",
+        f"workflow.tasks[{len(data['tasks']) - 1}].input_registers[0]: register 'r:never_written' is read but never written",
+    ]
+
+
+def test_workflow_schema():
+    validate = SchemaCompiler(get_schema()).compile()
+    errors = []
+    validate(
+        {
+            "name": "Broken",
+            "external_objects": [1],
+            "observable_objects": [],
+            "observable_registers": -1,
+            "tasks": [
+                {"type": "unknown"},
+                {"name": "Script", "type": "script", "reactive": False, "input_registers": [], "script": ""},
+                {
+                    "name": "Execution",
+                    "type": "execution",
+                    "exclusive": False,
+                    "pid_namespaces": 1,
+                    "filesystems": [{"type": "image", "image": "compiler"}],
+                    "mount_namespaces": [],
+                    "pipes": 0,
+                    "resource_groups": [],
+                    "processes": [],
+                    "channels": [{"buffer_size": 0, "source_pipe": 0, "target_pipe": 0}],
+                },
+            ],
+        },
+        "workflow",
+        errors,
+    )
+    assert errors == [
+        "workflow.external_objects[0]: expected string, got integer",
+        "workflow.observable_registers: must be at least 0, got -1",
+        "workflow.tasks[0].type: expected one of 'execution', 'script', got 'unknown'",
+        "workflow.tasks[1]: missing `output_registers`",
+        "workflow.tasks[2].channels[0].buffer_size: must be greater than 0, got 0",
+        "workflow.tasks[2].filesystems[0]: missing `path`",
+    ]
+
+    with pytest.raises(ValueError):
+        SchemaCompiler({"type": "object", "if": {}}).compile()
+
+
+# For every keyword supported by the schema compiler: a schema using it, values which are valid
+# and values which are invalid.
+SCHEMA_KEYWORD_CASES = {
+    "$ref": ({"$defs": {"id": {"type": "integer"}}, "$ref": "#/$defs/id"}, [1], ["1"]),
+    "type": ({"type": ["integer", "null"]}, [1, 1.0, None], [1.5, True, "1", [], {}]),
+    "const": ({"const": 1}, [1, 1.0], [True, "1", 2]),
+    "enum": ({"enum": ["a", 0, [1]]}, ["a", 0, [1]], [False, "b", [True], None]),
+    "oneOf": (
+        {
+            "properties": {
+                "any": {"oneOf": [{"type": "integer"}, {"type": "number", "minimum": 0}]},
+                # Alternatives told apart by the `type` property.
+                "tagged": {
+                    "oneOf": [
+                        {"type": "object", "required": ["type"], "properties": {"type": {"const": "a"}}},
+                        {
+                            "type": "object",
+                            "required": ["type", "b"],
+                            "properties": {"type": {"enum": ["b", "c"]}, "b": {"type": "integer"}},
+                        },
+                    ]
+                },
+            }
+        },
+        [{"any": -1}, {"any": 0.5}, {"tagged": {"type": "a"}}, {"tagged": {"type": "c", "b": 1}}],
+        [{"any": 1}, {"any": -0.5}, {"any": "x"}, {"tagged": {"type": "b"}}, {"tagged": {"type": "d"}}, {"tagged": 1}],
+    ),
+    "required": ({"required": ["a"]}, [{"a": None}, 1], [{}, {"b": 1}]),
+    "properties": ({"properties": {"a": {"type": "string"}}}, [{"a": "x"}, {"b": 1}, 1], [{"a": 1}]),
+    "additionalProperties": (
+        {"properties": {"a": {}}, "additionalProperties": {"type": "integer"}},
+        [{"a": "x", "b": 1}, "x"],
+        [{"b": "x"}],
+    ),
+    "propertyNames": ({"propertyNames": {"pattern": "^[a-z]+$"}}, [{"ab": 1}, 1], [{"a1": 1}]),
+    "items": ({"items": {"type": "integer"}}, [[], [1, 2], "x"], [[1, "2"]]),
+    "minimum": ({"minimum": 1}, [1, 2.5, "x"], [0, 0.5]),
+    "exclusiveMinimum": ({"exclusiveMinimum": 1}, [1.5, "x"], [1, 0]),
+    "pattern": ({"pattern": "[0-9]"}, ["a1", 1], ["a"]),
+}
+
+
+def _get_schema_keywords(schema, keywords: set[str]):
+    if isinstance(schema, list):
+        for item in schema:
+            _get_schema_keywords(item, keywords)
+    elif isinstance(schema, dict):
+        for keyword, value in schema.items():
+            keywords.add(keyword)
+            if keyword in ("properties", "$defs"):
+                for subschema in value.values():
+                    _get_schema_keywords(subschema, keywords)
+            elif keyword not in ("const", "enum", "required"):
+                _get_schema_keywords(value, keywords)
+
+
+@pytest.mark.parametrize("keyword", list(SCHEMA_KEYWORD_CASES))
+def test_workflow_schema_keyword(keyword):
+    schema, valid, invalid = SCHEMA_KEYWORD_CASES[keyword]
+    validate = SchemaCompiler(schema).compile()
+    for value in valid:
+        errors = []
+        validate(value, "value", errors)
+        assert errors == [], f"{value!r} should be valid"
+    for value in invalid:
+        errors = []
+        validate(value, "value", errors)
+        assert errors != [], f"{value!r} should be invalid"
+
+    try:
+        import jsonschema
+    except ImportError:
+        return
+    validator = jsonschema.Draft202012Validator(schema)
+    assert all(validator.is_valid(value) for value in valid)
+    assert not any(validator.is_valid(value) for value in invalid)
+
+
+def test_workflow_schema_keywords():
+    # Every keyword used by the workflow schema is supported and tested.
+    keywords = set()
+    _get_schema_keywords(get_schema(), keywords)
+    annotations = {"$schema", "$id", "$defs", "title", "description"}
+    assert keywords - annotations <= set(SCHEMA_KEYWORD_CASES)
+    assert set(SCHEMA_KEYWORD_CASES) == set(SchemaCompiler.KEYWORDS)
+
+    # Other keywords are rejected anywhere in the schema, also in definitions which aren't used.
+    for schema in [
+        {"type": "array", "minItems": 1},
+        {"properties": {"a": {"maxLength": 1}}},
+        {"items": {"anyOf": [{}]}},
+        {"$defs": {"unused": {"format": "email"}}},
+        {"type": "number", "oneOf": [{"multipleOf": 2}]},
+        {"properties": {"a": True}},
+        {"type": "float"},
+    ]:
+        with pytest.raises(ValueError):
+            SchemaCompiler(schema).compile()
+
+
+def test_workflow_schema_matches_jsonschema():
+    jsonschema = pytest.importorskip("jsonschema")
+    schema = get_schema()
+    jsonschema.Draft202012Validator.check_schema(schema)
+    workflows_dir = os.path.join(os.path.dirname(__file__), "..", "..", "example_workflows")
+    for file in os.listdir(workflows_dir):
+        if file.endswith(".json") and not file.endswith("workflows.json"):
+            jsonschema.validate(json.load(open(os.path.join(workflows_dir, file))), schema)